@@ -8,10 +8,9 @@ python manage.py collectstatic --noinput
 echo "Apply database migrations"
 python manage.py migrate
 
-# Start the cronjob in the background
-echo "Start fetch data cronjob"
-cron &
-python manage.py crontab add
+# Start the import scheduler in the background (one replica at a time runs the import, see hotels.scheduler)
+echo "Start import scheduler"
+python manage.py run_scheduler &
 
 # Next commands (Start server)
 exec "$@"
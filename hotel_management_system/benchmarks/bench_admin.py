@@ -0,0 +1,94 @@
+"""
+Latency of the admin pages of big tables: the previous admin classes vs the ones of hotels.admin
+
+Previous: hotel list without list_select_related (a query per row for the city column), exact COUNTs,
+icontains search on code and name, and a city page with an inline form per hotel.
+Now: select_related, estimated count of the unfiltered list, code prefix / search_name search,
+and a link to the hotels of the city. The views are called directly (no HTTP) by a superuser;
+the city page is measured for a mid-sized city (~1% of the hotels).
+
+    python -m benchmarks.bench_admin --hotels 1000000
+"""
+import argparse
+import statistics
+import time
+from itertools import islice
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=1_000_000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib import admin
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.test import RequestFactory, override_settings
+    from hotels.admin import CityAdmin, HotelAdmin
+    from hotels.loaders import copy_catalog
+    from hotels.models import City, Hotel
+    from hotels.sync import CityRow, HotelRow
+
+    class PreviousHotelAdmin(admin.ModelAdmin):
+        list_display = ('code', 'name', 'city')
+        search_fields = ('code', 'name')
+
+    class PreviousHotelInline(admin.TabularInline):
+        model = Hotel
+        extra = 0
+
+    class PreviousCityAdmin(admin.ModelAdmin):
+        list_display = ('code', 'name')
+        search_fields = ('code', 'name')
+        inlines = [PreviousHotelInline]
+
+    previous_site = admin.AdminSite(name='previous')
+    admins = {
+        'previous': (PreviousHotelAdmin(Hotel, previous_site), PreviousCityAdmin(City, previous_site)),
+        'now': (HotelAdmin(Hotel, admin.site), CityAdmin(City, admin.site)),
+    }
+
+    def measure(view, params: dict | None = None, *view_args) -> float:
+        timings = []
+        for _ in range(args.repeat):
+            request = RequestFactory().get('/', params or {})
+            request.user = user
+            started = time.perf_counter()
+            view(request, *view_args).render()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
+
+    with test_database(), override_settings(ALLOWED_HOSTS=['testserver']):
+        with transaction.atomic():
+            copy_catalog(
+                city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)),
+                hotel_rows=(HotelRow(*row) for row in synthetic.hotel_rows(args.hotels, args.cities)),
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM ANALYZE')
+        user = get_user_model().objects.create_superuser(username='admin', password='password')
+        city = City.objects.filter(hotel_count__lte=args.hotels // 100).order_by('-hotel_count').first()
+
+        hotel_code = next(islice(synthetic.hotel_rows(args.hotels, args.cities), min(1234, args.hotels - 1), None))[1]
+        pages = [
+            ('hotel list', lambda hotel_admin, _: measure(hotel_admin.changelist_view)),
+            ('hotel search by code', lambda hotel_admin, _: measure(hotel_admin.changelist_view, {'q': hotel_code})),
+            ('hotel search by name', lambda hotel_admin, _: measure(hotel_admin.changelist_view, {'q': 'palace'})),
+            ('city list', lambda _, city_admin: measure(city_admin.changelist_view)),
+            (f'city page ({city.hotel_count} hotels)', lambda _, city_admin: measure(city_admin.change_view, None, str(city.pk))),
+        ]
+        print(f'{"page":<32} {"previous, ms":>13} {"now, ms":>9}')
+        for name, page in pages:
+            previous, now = (page(*admins[key]) for key in ('previous', 'now'))
+            print(f'{name:<32} {previous:>13.1f} {now:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+"""
+Throughput of the hotel search page under concurrent clients: WSGI (sync gunicorn worker, sync views)
+vs ASGI (gunicorn with a uvicorn worker, async views)
+
+Each server runs one worker process against a separate test database with the response cache disabled,
+clients send requests back-to-back for a fixed time.
+
+    python -m benchmarks.bench_asgi --hotels 100000 --clients 1 4 16 64
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from hotels import synthetic
+
+from .common import percentile, setup_django, test_database
+
+SERVERS = {
+    'wsgi': ['hotel_management_system.wsgi', '--worker-class', 'sync'],
+    'asgi': ['hotel_management_system.asgi', '--worker-class', 'uvicorn_worker.UvicornWorker'],
+}
+
+
+@contextmanager
+def gunicorn(mode: str, env: dict[str, str]) -> Iterator[str]:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', *SERVERS[mode], '--workers', '1', '--bind', f'127.0.0.1:{port}'],
+        env={**os.environ, **env, 'ASYNC_VIEWS': str(mode == 'asgi')},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f'http://127.0.0.1:{port}'
+        for _ in range(100):
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        yield url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def load(url: str, clients: int, duration: float) -> list[float]:
+    import requests
+
+    timings: list[float] = []
+    deadline = time.perf_counter() + duration
+
+    def client():
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                session.get(url, timeout=60).raise_for_status()
+                timings.append((time.perf_counter() - started) * 1000)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=100_000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection, transaction
+    from hotels.loaders import copy_catalog
+    from hotels.sync import CityRow, HotelRow
+
+    city_code = next(synthetic.city_rows(args.cities))[0]  # The biggest city
+    with test_database():
+        with transaction.atomic():
+            copy_catalog(
+                city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)),
+                hotel_rows=(HotelRow(*row) for row in synthetic.hotel_rows(args.hotels, args.cities)),
+            )
+        env = {
+            'DB_NAME': connection.settings_dict['NAME'],
+            'DEBUG': 'False',
+            'RESPONSE_CACHE_TIMEOUT': '0',
+            'CACHE_BACKEND': 'locmem',  # Not the file cache of the running site
+            'DB_CONN_MAX_AGE': '0',  # Persistent connections are not supported by the async views (per-request threads)
+        }
+        print(f'{"server":<6} {"clients":>7} {"req/s":>7} {"p50, ms":>8} {"p99, ms":>8}')
+        for mode in SERVERS:
+            with gunicorn(mode, env) as url:
+                url = f'{url}/cities/{city_code}/hotels?search=ber'
+                load(url, clients=1, duration=1)  # Warm-up
+                for clients in args.clients:
+                    timings = load(url, clients=clients, duration=args.duration)
+                    print(
+                        f'{mode:<6} {clients:>7} {len(timings) / args.duration:>7.1f} '
+                        f'{percentile(timings, 50):>8.1f} {percentile(timings, 99):>8.1f}'
+                    )
+
+
+if __name__ == '__main__':
+    main()
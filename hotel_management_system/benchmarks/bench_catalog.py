@@ -0,0 +1,83 @@
+"""
+Latency of the city and hotel views served by the ORM and by the in-memory catalog, and the catalog footprint
+
+The views are called directly with the response cache disabled. "hotels" is the first page of the biggest city,
+"search" is a substring search in it, "deep page" is its last page.
+
+    python -m benchmarks.bench_catalog --hotels 100000 1000000
+"""
+import argparse
+import statistics
+import time
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection, transaction
+    from django.test import RequestFactory, override_settings
+    from hotels import views
+    from hotels.cache import get_data_generation
+    from hotels.catalog import Catalog, get_catalog
+    from hotels.loaders import copy_catalog
+    from hotels.models import Hotel
+    from hotels.sync import CityRow, HotelRow
+
+    factory = RequestFactory()
+    city_code = next(synthetic.city_rows(args.cities))[0]  # The biggest city of the Zipf-like distribution
+
+    def measure(view, params: dict, **kwargs) -> float:
+        timings = []
+        for _ in range(args.repeat):
+            request = factory.get('/', params)
+            started = time.perf_counter()
+            response = view(request, **kwargs)
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200
+        return statistics.median(timings) * 1000
+
+    for hotels in args.hotels:
+        with test_database():
+            with transaction.atomic():
+                copy_catalog(
+                    city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)),
+                    hotel_rows=(HotelRow(*row) for row in synthetic.hotel_rows(hotels, args.cities)),
+                )
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE {Hotel._meta.db_table}')
+
+            started = time.perf_counter()
+            catalog = Catalog.load(generation=get_data_generation())
+            load_time = time.perf_counter() - started
+            memory = sum(catalog.memory_usage().values()) / 2 ** 20
+            last_page = (len(catalog.hotels_by_city[city_code]) - 1) // settings.ITEMS_PER_PAGE + 1
+            print(f'{hotels} hotels: catalog load {load_time:.2f} s, {memory:.1f} MiB')
+
+            cases = [
+                ('cities', views.cities, {}, {}),
+                ('hotels', views.hotels, {}, {'city_code': city_code}),
+                ('search', views.hotels, {'search': 'ber'}, {'city_code': city_code}),
+                ('deep page', views.hotels, {'page': last_page}, {'city_code': city_code}),
+            ]
+            print(f'{"view":<10} {"orm, ms":>8} {"catalog, ms":>12}')
+            for name, view, params, kwargs in cases:
+                with override_settings(RESPONSE_CACHE_TIMEOUT=0, IN_MEMORY_CATALOG=False):
+                    orm = measure(view, params, **kwargs)
+                with override_settings(RESPONSE_CACHE_TIMEOUT=0, IN_MEMORY_CATALOG=True):
+                    get_catalog()  # Loaded once per generation, not per request
+                    in_memory = measure(view, params, **kwargs)
+                print(f'{name:<10} {orm:>8.1f} {in_memory:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
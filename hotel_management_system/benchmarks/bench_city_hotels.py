@@ -0,0 +1,76 @@
+"""
+Latency of the queries of a hotel list page: before (JOIN on city code, city_id index) and after
+(filter by city_id, composite (city_id, code, name) index)
+
+Every measurement runs the queries of the view: the city, the COUNT of its hotels and a page of them
+(the first one and a deep one) for the biggest and a mid-sized city.
+
+    python -m benchmarks.bench_city_hotels --hotels 1000000
+"""
+import argparse
+import statistics
+import time
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=1_000_000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection, transaction
+    from hotels.loaders import copy_catalog
+    from hotels.models import City, Hotel
+    from hotels.sync import CityRow, HotelRow
+
+    def page_queries(city_code: str, page: int, join: bool):
+        city = City.objects.get(code=city_code)
+        hotels = Hotel.objects.filter(city__code=city_code) if join else Hotel.objects.filter(city_id=city.id)
+        hotels = hotels.order_by('code', 'name')
+        count = hotels.count()
+        offset = min(page - 1, (count - 1) // settings.ITEMS_PER_PAGE) * settings.ITEMS_PER_PAGE
+        list(hotels[offset:offset + settings.ITEMS_PER_PAGE])
+
+    def measure(city_code: str, page: int, join: bool) -> float:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            page_queries(city_code, page, join)
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
+
+    city_codes = [code for code, _ in synthetic.city_rows(args.cities)]
+    cases = [(city_code, page) for city_code in (city_codes[0], city_codes[50]) for page in (1, 100)]
+
+    with test_database():
+        with transaction.atomic():
+            copy_catalog(
+                city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)),
+                hotel_rows=(HotelRow(*row) for row in synthetic.hotel_rows(args.hotels, args.cities)),
+            )
+        # As autovacuum would do after the import: the visibility map makes index-only scans (COUNT) possible
+        with connection.cursor() as cursor:
+            cursor.execute(f'VACUUM ANALYZE {Hotel._meta.db_table}')
+        after = {case: measure(*case, join=False) for case in cases}
+
+        # The schema before: a single-column index of the foreign key
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX hotels_hotel_city_code_name')
+            cursor.execute(f'CREATE INDEX hotels_hotel_city_id_bench ON {Hotel._meta.db_table} (city_id)')
+            cursor.execute(f'VACUUM ANALYZE {Hotel._meta.db_table}')
+        before = {case: measure(*case, join=True) for case in cases}
+
+        print(f'{"city":<7} {"page":>5} {"before, ms":>11} {"after, ms":>10}')
+        for city_code, page in cases:
+            print(f'{city_code:<7} {page:>5} {before[city_code, page]:>11.1f} {after[city_code, page]:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Latency of the city list requests with a new database connection per request and with a persistent one
+
+Requests are sent one by one to the application served by a single-threaded WSGI server
+(one sync gunicorn worker), the response cache is disabled.
+
+    python -m benchmarks.bench_connections --requests 2000
+"""
+import argparse
+import statistics
+import time
+
+from hotels import synthetic
+
+from .common import app_server, percentile, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    args = parser.parse_args()
+
+    setup_django()
+    import requests
+    from django.conf import settings
+    from django.db import transaction
+    from django.test import override_settings
+    from hotels.loaders import copy_catalog
+    from hotels.sync import CityRow
+
+    def measure(url: str) -> list[float]:
+        timings = []
+        with requests.Session() as session:
+            for i in range(args.requests):
+                started = time.perf_counter()
+                response = session.get(f'{url}/cities/', params={'page': i % 50 + 1})
+                timings.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+        return timings
+
+    with test_database():
+        with transaction.atomic():
+            copy_catalog(city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)), hotel_rows=[])
+
+        print(f'{"connections":<23} {"p50, ms":>8} {"p99, ms":>8} {"mean, ms":>9}')
+        cases = [
+            ('per request', 0, False),
+            ('persistent', 600, False),
+            ('persistent, health check', 600, True),
+        ]
+        for name, max_age, health_checks in cases:
+            settings.DATABASES['default'].update(CONN_MAX_AGE=max_age, CONN_HEALTH_CHECKS=health_checks)
+            with override_settings(RESPONSE_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['127.0.0.1']), app_server() as url:
+                measure(url)  # Warm-up
+                timings = measure(url)
+            print(
+                f'{name:<23} {percentile(timings, 50):>8.2f} {percentile(timings, 99):>8.2f} '
+                f'{statistics.mean(timings):>9.2f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
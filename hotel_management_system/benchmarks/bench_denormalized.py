@@ -0,0 +1,82 @@
+"""
+Latency of a city list page with hotel counts and of the substring search: computed per request vs denormalized
+
+Hotel counts of a page of cities (by code and the biggest cities first): a COUNT query per city (N+1),
+a Count('hotels') aggregate and the City.hotel_count column. Substring search of hotels by name:
+UPPER(name) LIKE UPPER(...) (name__icontains, the search before) and search_name LIKE ... (search_name__contains).
+Without pg_trgm both searches scan the table, the difference is the function applied to every row.
+
+    python -m benchmarks.bench_denormalized --hotels 1000000
+"""
+import argparse
+import statistics
+import time
+from typing import Callable
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=1_000_000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection, transaction
+    from django.db.models import Count
+    from hotels.loaders import copy_catalog
+    from hotels.models import City, Hotel
+    from hotels.sync import CityRow, HotelRow
+
+    per_page = settings.ITEMS_PER_PAGE
+
+    def measure(query: Callable[[], list]) -> float:
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            query()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
+
+    def n_plus_one(ordering: str) -> list:
+        cities = list(City.objects.order_by(ordering)[:per_page])
+        return [(city.code, city.hotels.count()) for city in cities]
+
+    def aggregate(ordering: str) -> list:
+        cities = City.objects.annotate(count=Count('hotels')).order_by(ordering.replace('hotel_count', 'count'), 'code')
+        return list(cities.values_list('code', 'count')[:per_page])
+
+    def column(ordering: str) -> list:
+        return list(City.objects.order_by(ordering, 'code').values_list('code', 'hotel_count')[:per_page])
+
+    with test_database():
+        with transaction.atomic():
+            copy_catalog(
+                city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)),
+                # Skewed: the first cities get more hotels (see hotels.synthetic.hotel_rows)
+                hotel_rows=(HotelRow(*row) for row in synthetic.hotel_rows(args.hotels, args.cities)),
+            )
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM ANALYZE')
+
+        print(f'{"query":<36} {"by code, ms":>12} {"biggest first, ms":>18}')
+        for name, query in (('COUNT per city (N+1)', n_plus_one), ('Count() aggregate', aggregate), ('hotel_count column', column)):
+            by_code = measure(lambda: query('code'))
+            biggest = f'{measure(lambda: query("-hotel_count")):.1f}' if query is not n_plus_one else '-'
+            print(f'{name:<36} {by_code:>12.1f} {biggest:>18}')
+
+        # A term matching no hotel: the whole table is scanned
+        print(f'{"search":<36} {"ms":>12}')
+        for name, lookup, term in (('UPPER(name) LIKE (icontains)', 'name__icontains', 'Mallorca'),
+                                   ('search_name LIKE (contains)', 'search_name__contains', 'mallorca')):
+            hotels = Hotel.objects.filter(**{lookup: term}).order_by('code')
+            print(f'{name:<36} {measure(lambda: list(hotels.values_list("code", flat=True)[:per_page])):>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Latency of readers and of a concurrent writer during an import: one long transaction ('orm') vs staged feeds and a short merge transaction ('staged')
+
+The catalog is loaded, then every `--renamed-every`-th hotel is renamed by an import running in a child process
+(as the scheduler does), while a reader requests hotel pages of the biggest city from the application
+(single-threaded WSGI server, response cache disabled) and a writer (e.g. the admin panel) renames a random one
+of them every 20 ms.
+The readers and the writer are measured for the same time before the import (baseline) and during it.
+
+    python -m benchmarks.bench_import_readers --hotels 50000
+"""
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+from typing import Callable
+
+from hotels import synthetic
+
+from .common import app_server, percentile, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=50_000)
+    parser.add_argument('--renamed-every', type=int, default=5)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--batch-size', type=int, default=1_000)
+    parser.add_argument('--loaders', nargs='+', default=['orm', 'staged'])
+    args = parser.parse_args()
+
+    setup_django()
+    import requests
+    from django.db import connection, connections, transaction
+    from django.test import override_settings
+    from hotels.loaders import AUTOCOMMIT_LOADERS, LOADERS, copy_catalog
+    from hotels.models import Hotel
+    from hotels.sync import CityRow, HotelRow
+
+    city_rows = [CityRow(*row) for row in synthetic.city_rows(args.cities)]
+    hotel_codes = [code for _, code, _ in synthetic.hotel_rows(args.hotels, args.cities)][::args.renamed_every]
+
+    def hotel_rows(suffix: str) -> list[HotelRow]:
+        return [
+            HotelRow(city, code, f'{name}{suffix}' if i % args.renamed_every == 0 else name)
+            for i, (city, code, name) in enumerate(synthetic.hotel_rows(args.hotels, args.cities))
+        ]
+
+    def run_import(name: str, suffix: str):
+        """Child process: renames every hotel"""
+        loader = LOADERS[name]
+        rows = hotel_rows(suffix)
+        if loader in AUTOCOMMIT_LOADERS:
+            loader(city_rows=city_rows, hotel_rows=rows, batch_size=args.batch_size)
+        else:
+            with transaction.atomic():
+                loader(city_rows=city_rows, hotel_rows=rows, batch_size=args.batch_size)
+        connection.close()
+
+    def read(url: str, stop: threading.Event, timings: list[float]):
+        with requests.Session() as session:
+            page = 0
+            while not stop.is_set():
+                page = page % 20 + 1
+                started = time.perf_counter()
+                session.get(f'{url}/cities/{city_rows[0].code}/hotels', params={'page': page}).raise_for_status()
+                timings.append((time.perf_counter() - started) * 1000)
+
+    def write(stop: threading.Event, timings: list[float]):
+        rnd = random.Random(0)
+        try:
+            while not stop.wait(0.02):
+                started = time.perf_counter()
+                Hotel.objects.filter(code=rnd.choice(hotel_codes)).update(name='Renamed in the admin panel')
+                timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+
+    def measure(url: str, window: Callable[[], None]) -> tuple[list[float], list[float]]:
+        stop = threading.Event()
+        reads, writes = [], []
+        threads = [threading.Thread(target=read, args=(url, stop, reads)), threading.Thread(target=write, args=(stop, writes))]
+        for thread in threads:
+            thread.start()
+        try:
+            window()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        return reads, writes
+
+    def row(name: str, window: str, seconds: float, reads: list[float], writes: list[float]):
+        print(
+            f'{name:<8} {window:<9} {seconds:>8.2f} {len(reads):>6} {percentile(reads, 50):>8.1f} {percentile(reads, 99):>8.1f} '
+            f'{max(reads):>8.1f} {percentile(writes, 50):>9.1f} {max(writes):>9.1f}'
+        )
+
+    with test_database():
+        with transaction.atomic():
+            copy_catalog(city_rows=city_rows, hotel_rows=hotel_rows(''))
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM ANALYZE')
+
+        print(f'{"loader":<8} {"window":<9} {"seconds":>8} {"reads":>6} {"p50, ms":>8} {"p99, ms":>8} {"max, ms":>8} '
+              f'{"write p50":>9} {"write max":>9}')
+        context = multiprocessing.get_context('fork')
+        with override_settings(RESPONSE_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['127.0.0.1']), app_server() as url:
+            for i, name in enumerate(args.loaders):
+                connections.close_all()  # The child process opens its own connection
+                process = context.Process(target=run_import, args=(name, f' #{i + 1}'))
+
+                def import_window():
+                    process.start()
+                    process.join()
+
+                started = time.perf_counter()
+                reads, writes = measure(url, import_window)
+                seconds = time.perf_counter() - started
+                if process.exitcode:
+                    raise SystemExit(f'{name} import failed')
+
+                baseline = measure(url, lambda: time.sleep(seconds))
+                row(name, 'baseline', seconds, *baseline)
+                row(name, 'import', seconds, reads, writes)
+
+
+if __name__ == '__main__':
+    main()
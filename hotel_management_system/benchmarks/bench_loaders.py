@@ -0,0 +1,53 @@
+"""
+Throughput of the import loaders (hotels.loaders.LOADERS): ORM bulk_create/bulk_update vs PostgreSQL COPY
+
+For every size and loader the catalog is loaded into an empty database (initial load),
+then the same feed is loaded again (no changes) and finally a feed with ~10% renamed hotels (update).
+
+    python -m benchmarks.bench_loaders --hotels 10000 100000 1000000
+"""
+import argparse
+import time
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--loaders', nargs='+', default=['orm', 'copy'])
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import transaction
+    from hotels.loaders import LOADERS
+    from hotels.models import City
+    from hotels.sync import CityRow, HotelRow
+
+    def run(loader, hotels: int, renamed_every: int = 0) -> float:
+        # Rows are generated in advance: only the loader is measured
+        city_rows = [CityRow(*row) for row in synthetic.city_rows(args.cities)]
+        hotel_rows = [
+            HotelRow(city_code, code, f'{name} (renamed)' if renamed_every and i % renamed_every == 0 else name)
+            for i, (city_code, code, name) in enumerate(synthetic.hotel_rows(hotels, args.cities))
+        ]
+        started = time.perf_counter()
+        with transaction.atomic():
+            loader(city_rows=city_rows, hotel_rows=hotel_rows)
+        return time.perf_counter() - started
+
+    with test_database():
+        print(f'{"loader":<6} {"hotels":>9} {"phase":<8} {"seconds":>8} {"rows/sec":>10}')
+        for hotels in args.hotels:
+            for name in args.loaders:
+                City.objects.all().delete()
+                for phase, renamed_every in (('initial', 0), ('no-op', 0), ('update', 10)):
+                    seconds = run(LOADERS[name], hotels, renamed_every)
+                    print(f'{name:<6} {hotels:>9} {phase:<8} {seconds:>8.2f} {hotels / seconds:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Overhead of the performance instrumentation (PerformanceMiddleware, query wrapper, instrumented template backend)
+
+The same requests are sent to the application with and without the instrumentation: a rendered city page
+(response cache disabled) and a cached one (the cheapest request, where the relative overhead is the biggest).
+
+    python -m benchmarks.bench_middleware --requests 3000
+"""
+import argparse
+import copy
+import statistics
+import time
+
+from hotels import synthetic
+
+from .common import app_server, percentile, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    args = parser.parse_args()
+
+    setup_django()
+    import requests
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.db import transaction
+    from django.test import override_settings
+    from hotels.loaders import copy_catalog
+    from hotels.sync import CityRow
+
+    templates = copy.deepcopy(settings.TEMPLATES)
+    templates[0]['BACKEND'] = 'django.template.backends.django.DjangoTemplates'
+    uninstrumented = {
+        'MIDDLEWARE': [name for name in settings.MIDDLEWARE if name != 'hotels.middleware.PerformanceMiddleware'],
+        'TEMPLATES': templates,
+    }
+
+    def measure(url: str) -> list[float]:
+        timings = []
+        with requests.Session() as session:
+            for i in range(args.requests):
+                started = time.perf_counter()
+                session.get(url, params={'page': i % 20 + 1}).raise_for_status()
+                timings.append((time.perf_counter() - started) * 1000)
+        return timings
+
+    with test_database():
+        with transaction.atomic():
+            copy_catalog(city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)), hotel_rows=[])
+
+        print(f'{"page":<9} {"instrumentation":<16} {"p50, ms":>8} {"p99, ms":>8} {"mean, ms":>9}')
+        for page, cache_timeout in (('rendered', 0), ('cached', 3600)):
+            for name, overrides in (('off', uninstrumented), ('on', {})):
+                with override_settings(RESPONSE_CACHE_TIMEOUT=cache_timeout, ALLOWED_HOSTS=['127.0.0.1'], **overrides):
+                    cache.clear()  # The locmem cache of test_database()
+                    with app_server() as url:
+                        measure(f'{url}/cities/')  # Warm-up (and the cache)
+                        timings = measure(f'{url}/cities/')
+                print(
+                    f'{page:<9} {name:<16} {percentile(timings, 50):>8.2f} {percentile(timings, 99):>8.2f} '
+                    f'{statistics.mean(timings):>9.2f}'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Latency of the first and a deep page of a hotel list: offset (?page=) vs keyset (?cursor=) pagination
+
+All hotels belong to one city, the hotel list view is called directly (response cache disabled),
+so the timings include the queries and the template rendering.
+
+    python -m benchmarks.bench_pagination --hotels 200000 --page 10000
+"""
+import argparse
+import statistics
+import time
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=200_000)
+    parser.add_argument('--page', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection, transaction
+    from django.test import RequestFactory, override_settings
+    from hotels import views
+    from hotels.loaders import copy_catalog
+    from hotels.models import Hotel
+    from hotels.pagination import CursorPaginator
+    from hotels.sync import CityRow, HotelRow
+
+    factory = RequestFactory()
+    city_code = next(synthetic.city_rows(1))[0]
+
+    def measure(mode: str, params: dict) -> float:
+        timings = []
+        with override_settings(PAGINATION_MODE=mode, RESPONSE_CACHE_TIMEOUT=0):
+            for _ in range(args.repeat):
+                request = factory.get('/', params)
+                started = time.perf_counter()
+                response = views.hotels(request, city_code=city_code)
+                timings.append(time.perf_counter() - started)
+                assert response.status_code == 200
+        return statistics.median(timings) * 1000
+
+    with test_database():
+        with transaction.atomic():
+            copy_catalog(
+                city_rows=[CityRow(code=city_code, name='Benchmark')],
+                hotel_rows=(HotelRow(*row) for row in synthetic.hotel_rows(args.hotels, cities=1)),
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Hotel._meta.db_table}')
+
+        page = min(args.page, args.hotels // settings.ITEMS_PER_PAGE)
+        # The cursor a reader gets by following "Next" up to the page
+        previous_last = Hotel.objects.order_by('code', 'name')[(page - 1) * settings.ITEMS_PER_PAGE - 1]
+        cursor = CursorPaginator.encode_cursor('next', (previous_last.code, previous_last.name))
+
+        print(f'{"mode":<7} {"page 1, ms":>11} {f"page {page}, ms":>15}')
+        print(f'{"offset":<7} {measure("offset", {}):>11.1f} {measure("offset", {"page": page}):>15.1f}')
+        print(f'{"cursor":<7} {measure("cursor", {}):>11.1f} {measure("cursor", {"cursor": cursor}):>15.1f}')
+
+
+if __name__ == '__main__':
+    main()
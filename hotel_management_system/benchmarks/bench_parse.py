@@ -0,0 +1,110 @@
+"""
+Throughput of the parsing and validation of a big hotel feed (hotels.validation.FeedValidator) by the number of workers
+
+The synthetic feed is written to a temporary file (1% of the rows are malformed), then it is parsed
+by the previous single-threaded parser (csv.reader over the decoded lines, no validation) and by the validator
+with 1, 2, 4... worker processes. Then the same feed is parsed by one worker as gzip and zstd compressed CSV
+and as NDJSON (see hotels.feeds.Feed.stream).
+Only the parsing is measured, nothing is written to the database.
+
+    python -m benchmarks.bench_parse --lines 10000000 --workers 1 2 4 8
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+
+from hotels import synthetic
+
+from .common import csv_chunks, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=1_000_000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    setup_django()
+    import zstandard
+    from hotels.feeds import Feed
+    from hotels.parsing import iter_chunks
+    from hotels.validation import FeedValidator, Quarantine
+
+    def rows():
+        for i, row in enumerate(synthetic.hotel_rows(args.lines, args.cities)):
+            yield row if i % 100 else row[:2]
+
+    city_feed = b''.join(csv_chunks(synthetic.city_rows(args.cities)))
+    with tempfile.TemporaryFile() as file:
+        for chunk in csv_chunks(rows()):
+            file.write(chunk)
+        size = file.tell()
+        print(f'Feed: {args.lines} lines, {size / 2 ** 20:.0f} MiB, {os.cpu_count()} CPUs')
+        print(f'{"parser":<16} {"seconds":>8} {"lines/sec":>10} {"speedup":>8}')
+
+        file.seek(0)
+        started = time.perf_counter()
+        lines = io.TextIOWrapper(file, encoding='utf-8', newline='')
+        count = sum(1 for _ in csv.reader(lines, delimiter=';'))
+        lines.detach()  # The file is read again
+        seconds = time.perf_counter() - started
+        print(f'{"csv.reader":<16} {seconds:>8.2f} {count / seconds:>10.0f} {"":>8}')
+
+        baseline = None
+        for workers in args.workers:
+            quarantine = Quarantine()
+            with FeedValidator(quarantine=quarantine, workers=workers) as validator:
+                with tempfile.TemporaryFile() as cities:
+                    cities.write(city_feed)
+                    cities.seek(0)
+                    for _ in validator.city_rows(cities):
+                        pass
+                file.seek(0)
+                started = time.perf_counter()
+                for _ in validator.hotel_rows(file):
+                    pass
+                seconds = time.perf_counter() - started
+            baseline = baseline or seconds
+            name = f'{workers} worker{"s" if workers > 1 else ""}'
+            print(
+                f'{name:<16} {seconds:>8.2f} {validator.lines["hotel"] / seconds:>10.0f} {baseline / seconds:>7.2f}x'
+                f'  ({quarantine.count} quarantined)'
+            )
+
+        def ndjson(data: bytes) -> bytes:
+            lines = csv.reader(data.decode().splitlines(), delimiter=';')
+            return ''.join(json.dumps(dict(zip(('city_code', 'code', 'name'), values))) + '\n' for values in lines).encode()
+
+        print(f'{"reader":<16} {"seconds":>8} {"lines/sec":>10} {"MiB":>8}')
+        encodings = (
+            ('csv.gz', 'csv', lambda data: gzip.compress(data, compresslevel=6)),
+            ('csv.zst', 'csv', zstandard.compress),
+            ('ndjson', 'ndjson', ndjson),
+        )
+        for name, format, encode in encodings:
+            file.seek(0)
+            with tempfile.TemporaryFile() as encoded:
+                for data, _ in iter_chunks(file, 16 * 2 ** 20):
+                    encoded.write(encode(data))  # Compressed streams may consist of several members/frames
+                feed = Feed(url=f'hotel.{name}', file=encoded, size=encoded.tell(), format=format)
+                with FeedValidator(quarantine=Quarantine(), workers=1) as validator:
+                    with tempfile.TemporaryFile() as cities:
+                        cities.write(city_feed)
+                        cities.seek(0)
+                        for _ in validator.city_rows(cities):
+                            pass
+                    started = time.perf_counter()
+                    for _ in validator.hotel_rows(feed.stream(), feed.format):
+                        pass
+                    seconds = time.perf_counter() - started
+                print(f'{name:<16} {seconds:>8.2f} {validator.lines["hotel"] / seconds:>10.0f} {feed.size / 2 ** 20:>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
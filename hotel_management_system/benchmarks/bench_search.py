@@ -0,0 +1,75 @@
+"""
+Latency of the search by hotel name (hotels.search.search_by_name) with and without the GIN indexes
+
+Every search runs the queries of a hotel list page: COUNT and the first page. "seqscan" forces
+sequential scans (index scans disabled), "index" lets the planner use the trigram/full-text indexes.
+
+    python -m benchmarks.bench_search --hotels 1000000
+"""
+import argparse
+import statistics
+import time
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+SEARCHES = ['ber', 'Rolin', 'hotel', 'zelri inn']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=1_000_000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection, transaction
+    from django.test import override_settings
+    from hotels.loaders import copy_catalog
+    from hotels.models import Hotel
+    from hotels.search import search_by_name
+    from hotels.sync import CityRow, HotelRow
+
+    def page(search: str):
+        hotels = search_by_name(Hotel.objects.order_by('code', 'name'), search)
+        hotels.count()
+        list(hotels[:settings.ITEMS_PER_PAGE])
+
+    def measure(search: str, seqscan: bool) -> float:
+        timings = []
+        with transaction.atomic(), connection.cursor() as cursor:
+            if seqscan:
+                cursor.execute('SET LOCAL enable_indexscan = off')
+                cursor.execute('SET LOCAL enable_bitmapscan = off')
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                page(search)
+                timings.append(time.perf_counter() - started)
+        return statistics.median(timings) * 1000
+
+    with test_database():
+        with transaction.atomic():
+            copy_catalog(
+                city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)),
+                hotel_rows=(HotelRow(*row) for row in synthetic.hotel_rows(args.hotels, args.cities)),
+            )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Hotel._meta.db_table}')
+            cursor.execute("SELECT indexname FROM pg_indexes WHERE indexname LIKE 'hotels_hotel_name_%%'")
+            print('Indexes:', ', '.join(sorted(row[0] for row in cursor.fetchall())))
+
+        print(f'{"backend":<9} {"search":<12} {"seqscan, ms":>12} {"index, ms":>10}')
+        for backend in ('contains', 'fulltext'):
+            with override_settings(SEARCH_BACKEND=backend):
+                for search in SEARCHES:
+                    print(
+                        f'{backend:<9} {search:<12} {measure(search, seqscan=True):>12.1f} '
+                        f'{measure(search, seqscan=False):>10.1f}'
+                    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Time, peak memory and file size of a catalog copy: dump_catalog/restore_catalog snapshots vs dumpdata/loaddata
+
+Every command runs in its own process (manage.py, against the test database), its peak RSS is reported.
+The tables are emptied before loaddata, restore_catalog replaces the catalog itself.
+
+    python -m benchmarks.bench_snapshot --hotels 1000000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=1_000_000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--skip-loaddata', action='store_true', help='loaddata of 1M hotels takes tens of minutes')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection, transaction
+    from hotels.loaders import copy_catalog
+    from hotels.models import City, Hotel
+    from hotels.sync import CityRow, HotelRow
+
+    def run(*command: str) -> tuple[float, float]:
+        """Runs the manage.py command, returns its wall time (seconds) and peak RSS (MiB)"""
+        env = {**os.environ, 'DB_NAME': connection.settings_dict['NAME']}
+        started = time.perf_counter()
+        process = subprocess.Popen([sys.executable, 'manage.py', *command], env=env, stdout=subprocess.DEVNULL)
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode:
+            raise RuntimeError(f'{command[0]} failed with exit code {process.returncode}')
+        return time.perf_counter() - started, usage.ru_maxrss / 1024
+
+    with test_database(), tempfile.TemporaryDirectory() as directory:
+        with transaction.atomic():
+            copy_catalog(
+                city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)),
+                hotel_rows=(HotelRow(*row) for row in synthetic.hotel_rows(args.hotels, args.cities)),
+            )
+        expected = City.objects.count(), Hotel.objects.count()
+        connection.close()  # restore_catalog truncates the tables
+
+        paths = {name: Path(directory) / name for name in ('catalog.ndjson.zst', 'catalog.ndjson.gz', 'catalog.json')}
+        steps = [
+            ('dump_catalog (zstd)', paths['catalog.ndjson.zst'], ('dump_catalog', str(paths['catalog.ndjson.zst']))),
+            ('dump_catalog (gzip)', paths['catalog.ndjson.gz'], ('dump_catalog', str(paths['catalog.ndjson.gz']))),
+            ('dumpdata (JSON)', paths['catalog.json'], ('dumpdata', 'hotels.City', 'hotels.Hotel', '-o', str(paths['catalog.json']))),
+            ('restore_catalog (zstd)', paths['catalog.ndjson.zst'], ('restore_catalog', str(paths['catalog.ndjson.zst']), '--no-input')),
+            ('restore_catalog (gzip)', paths['catalog.ndjson.gz'], ('restore_catalog', str(paths['catalog.ndjson.gz']), '--no-input')),
+        ]
+        if not args.skip_loaddata:
+            steps.append(('loaddata (JSON)', paths['catalog.json'], ('loaddata', str(paths['catalog.json']))))
+
+        print(f'{"command":<24} {"seconds":>8} {"peak RSS, MiB":>14} {"file, MiB":>10}')
+        for name, path, command in steps:
+            if command[0] == 'loaddata':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'TRUNCATE {Hotel._meta.db_table}, {City._meta.db_table}')
+                connection.close()
+            seconds, peak = run(*command)
+            print(f'{name:<24} {seconds:>8.1f} {peak:>14.0f} {path.stat().st_size / 2 ** 20:>10.1f}')
+            if (City.objects.count(), Hotel.objects.count()) != expected:
+                raise RuntimeError(f'{name} did not restore the catalog')
+            connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Peak memory of the hotel feed ingestion: buffered (whole body in memory) vs streaming
+
+Streaming downloads the body into a spooled temporary file (hotels.feeds.download_feed)
+and parses it chunk by chunk with the parser of the import (hotels.parsing.parse_file).
+
+Each mode runs in its own process, so the reported peak RSS is not affected by the other one.
+
+    python -m benchmarks.bench_streaming --rows 1000 100000 3000000
+"""
+import argparse
+import csv
+import io
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from hotels import synthetic
+
+from .common import csv_chunks, feed_server, setup_django
+
+MODES = ('buffered', 'streaming')
+
+
+def consume(mode: str, url: str) -> dict:
+    setup_django()
+    import requests
+    from django.conf import settings
+    from hotels.feeds import download_feed
+    from hotels.parsing import parse_file
+    from hotels.sync import HotelRow
+    from hotels.validation import HOTEL_COLUMNS
+
+    started = time.perf_counter()
+    rows = 0
+    if mode == 'buffered':
+        # The ingestion before streaming: content -> str -> StringIO -> list
+        content = requests.get(url).content.decode('utf-8')
+        parsed = list(csv.reader(io.StringIO(content), delimiter=';'))
+        for h in parsed:
+            HotelRow(city_code=h[0], code=h[1], name=h[2])
+            rows += 1
+    else:
+        feed = download_feed(url)
+        batch = []
+        for chunk in parse_file(feed.stream(), HOTEL_COLUMNS, settings.IMPORT_PARSE_CHUNK_SIZE, format=feed.format):
+            for _, values in chunk.rows(len(HOTEL_COLUMNS)):
+                batch.append(HotelRow(*values))
+                if len(batch) == settings.IMPORT_BATCH_SIZE:
+                    rows += len(batch)
+                    batch = []
+        rows += len(batch)
+        feed.close()
+
+    return {
+        'mode': mode,
+        'rows': rows,
+        'seconds': round(time.perf_counter() - started, 3),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--worker', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(consume(args.worker, args.url)))
+        return
+
+    feeds = {
+        f'/hotel-{rows}.csv': (lambda rows=rows: csv_chunks(synthetic.hotel_rows(rows, args.cities)))
+        for rows in args.rows
+    }
+    with feed_server(feeds) as base_url:
+        print(f'{"mode":<10} {"rows":>10} {"seconds":>9} {"peak RSS, MB":>13}')
+        for rows in args.rows:
+            for mode in MODES:
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.bench_streaming',
+                     '--worker', mode, '--url', f'{base_url}/hotel-{rows}.csv'],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(f'{mode:<10} {result["rows"]:>10} {result["seconds"]:>9} {result["peak_rss_mb"]:>13}')
+
+
+if __name__ == '__main__':
+    main()
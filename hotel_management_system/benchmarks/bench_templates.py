@@ -0,0 +1,96 @@
+"""
+Template render time of the city and hotel pages: template loaders and the cached fragments of the pages
+
+The views are called directly with the response cache disabled. Render and DB times come from the metrics
+of hotels.performance (the same as in the Server-Timing header). Configurations:
+
+    uncached   templates are loaded and compiled for every request, no fragment cache (DummyCache): as before
+    loader     the cached template loader, no fragment cache
+    miss       the cached template loader, fragments are rendered and stored (the data generation is bumped every time)
+    hit        the cached template loader, the item cards and pagination come from the fragment cache
+
+    python -m benchmarks.bench_templates --hotels 100000
+"""
+import argparse
+import copy
+import statistics
+import time
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+CONFIGURATIONS = ('uncached', 'loader', 'miss', 'hit')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=100_000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import transaction
+    from django.test import RequestFactory, override_settings
+    from hotels import views
+    from hotels.cache import bump_data_generation
+    from hotels.loaders import copy_catalog
+    from hotels.performance import finish_request, start_request
+    from hotels.sync import CityRow, HotelRow
+
+    factory = RequestFactory()
+    uncached_templates = copy.deepcopy(settings.TEMPLATES)
+    for engine in uncached_templates:
+        engine['OPTIONS']['loaders'] = engine['OPTIONS']['loaders'][0][1]
+    dummy_caches = {**settings.CACHES, 'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    overrides = {
+        'uncached': {'TEMPLATES': uncached_templates, 'CACHES': dummy_caches},
+        'loader': {'CACHES': dummy_caches},
+        'miss': {},
+        'hit': {},
+    }
+
+    def measure(configuration: str, view, params: dict, **kwargs) -> tuple[float, float, float]:
+        """Median render, DB and total times (ms) of the requests"""
+        samples = []
+        with override_settings(RESPONSE_CACHE_TIMEOUT=0, **overrides[configuration]):
+            view(factory.get('/', params), **kwargs)  # Warm-up (and the fragment of 'hit')
+            for _ in range(args.repeat):
+                if configuration == 'miss':
+                    bump_data_generation()
+                metrics, token = start_request()
+                started = time.perf_counter()
+                try:
+                    response = view(factory.get('/', params), **kwargs)
+                finally:
+                    finish_request(token)
+                samples.append((metrics.render_time, metrics.db_time, time.perf_counter() - started))
+                assert response.status_code == 200
+        return tuple(statistics.median(sample[i] for sample in samples) * 1000 for i in range(3))
+
+    with test_database():
+        with transaction.atomic():
+            copy_catalog(
+                city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)),
+                hotel_rows=(HotelRow(*row) for row in synthetic.hotel_rows(args.hotels, args.cities)),
+            )
+        city_code = next(synthetic.city_rows(args.cities))[0]
+        last_page = -(-args.cities // settings.ITEMS_PER_PAGE)
+        pages = [
+            ('cities, page 1', views.cities, {}, {}),
+            (f'cities, page {last_page}', views.cities, {'page': last_page}, {}),
+            ('cities, search', views.cities, {'search': 'a'}, {}),
+            (f'hotels of {city_code}', views.hotels, {}, {'city_code': city_code}),
+        ]
+
+        print(f'{"page":<20} {"configuration":<14} {"render, ms":>11} {"DB, ms":>8} {"total, ms":>10}')
+        for name, view, params, kwargs in pages:
+            for configuration in CONFIGURATIONS:
+                render, db, total = measure(configuration, view, params, **kwargs)
+                print(f'{name:<20} {configuration:<14} {render:>11.2f} {db:>8.2f} {total:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Import time and index sizes with random (uuid4) and time-ordered (uuid7) primary keys
+
+For every key type (settings.PRIMARY_KEY_UUID) the catalog is loaded into empty tables (initial),
+then a feed with 10% more hotels is loaded (incremental: new keys go into a populated index).
+Sizes of the indexes on the keys (primary keys and the (city_id, code, name) index of hotels)
+are reported after every phase.
+
+    python -m benchmarks.bench_uuid_keys --hotels 1000000 --loader copy
+"""
+import argparse
+import time
+from itertools import chain
+
+from hotels import synthetic
+
+from .common import setup_django, test_database
+
+INDEXES = ('hotels_city_pkey', 'hotels_hotel_pkey', 'hotels_hotel_city_code_name')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hotels', type=int, default=1_000_000)
+    parser.add_argument('--cities', type=int, default=1_000)
+    parser.add_argument('--loader', default='copy')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection, transaction
+    from django.test import override_settings
+    from hotels.loaders import LOADERS
+    from hotels.models import City, Hotel
+    from hotels.sync import CityRow, HotelRow
+
+    city_codes = [code for code, _ in synthetic.city_rows(args.cities)]
+
+    def hotel_rows(extra: int = 0):
+        added = ((city_codes[i % args.cities], f'N{i:08d}', f'New Hotel {i}') for i in range(extra))
+        return (HotelRow(*row) for row in chain(synthetic.hotel_rows(args.hotels, args.cities), added))
+
+    def load(extra: int = 0) -> float:
+        started = time.perf_counter()
+        with transaction.atomic():
+            LOADERS[args.loader](city_rows=(CityRow(*row) for row in synthetic.city_rows(args.cities)), hotel_rows=hotel_rows(extra))
+        return time.perf_counter() - started
+
+    def index_sizes() -> list[float]:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT relname, pg_relation_size(oid) FROM pg_class WHERE relname = ANY(%s)', [list(INDEXES)])
+            sizes = dict(cursor.fetchall())
+        return [sizes[name] / 2 ** 20 for name in INDEXES]
+
+    with test_database():
+        print(f'{"keys":<6} {"phase":<12} {"seconds":>8} ' + ' '.join(f'{name + ", MiB":>32}' for name in INDEXES))
+        for kind in ('uuid4', 'uuid7'):
+            with connection.cursor() as cursor:
+                cursor.execute(f'TRUNCATE {Hotel._meta.db_table}, {City._meta.db_table}')
+                cursor.execute('CHECKPOINT')
+            with override_settings(PRIMARY_KEY_UUID=kind):
+                for phase, extra in (('initial', 0), ('incremental', args.hotels // 10)):
+                    seconds = load(extra)
+                    print(f'{kind:<6} {phase:<12} {seconds:>8.1f} ' + ' '.join(f'{size:>32.1f}' for size in index_sizes()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Shared helpers of the benchmark scripts
+
+Benchmarks are run from the Django project directory, e.g. `python -m benchmarks.bench_streaming`
+"""
+import os
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Iterable, Iterator
+
+from hotels.synthetic import feed_chunks as csv_chunks
+
+
+# The benchmarks must not use the file cache of the application (settings.CACHE_LOCATION): the running site
+# would serve the pages and the data generation of the benchmark database (see test_database)
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hotels-benchmarks',
+    }
+}
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hotel_management_system.settings')
+    os.environ.setdefault('DEBUG', 'False')  # Measure the production configuration (e.g. no query logging)
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb: bool = False) -> Iterator[None]:
+    """
+    Runs the benchmark against a separate test database, so that the development data stays untouched
+
+    The cache is a locmem one (LOCMEM_CACHES) meanwhile: the data generation bumped by the benchmark and the pages
+    of the test database don't reach the cache of the running site.
+    """
+    from django.db import connection
+    from django.test import override_settings
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        with override_settings(CACHES=LOCMEM_CACHES):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+@contextmanager
+def feed_server(feeds: dict[str, Callable[[], Iterable[bytes]]]) -> Iterator[str]:
+    """
+    Local HTTP stand-in for the feed provider
+
+    `feeds` maps a path ('/city.csv') to a callable producing the body chunks, so bodies can be
+    generated on the fly and never have to be held in memory. Yields the base url of the server.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in feeds:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/csv; charset=utf-8')
+            self.end_headers()
+            for chunk in feeds[self.path]():
+                self.wfile.write(chunk)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@contextmanager
+def app_server() -> Iterator[str]:
+    """
+    Serves the Django application from a single-threaded WSGI server, as one sync gunicorn worker does
+
+    Requests run the full request cycle (middleware, request_started/request_finished signals,
+    so database connections are closed or kept according to CONN_MAX_AGE). Yields the base url of the server.
+    """
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    from django.db import connections
+
+    def serve():
+        try:
+            server.serve_forever(poll_interval=0.05)
+        finally:
+            connections.close_all()  # Persistent connections of the server thread
+
+    server = make_server('127.0.0.1', 0, get_wsgi_application(), server_class=WSGIServer, handler_class=QuietHandler)
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+def percentile(timings: list[float], percent: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(timings)
+    return ordered[max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))]
@@ -0,0 +1,203 @@
+"""
+Benchmark suite: import and page latency of synthetic catalogs of growing size, saved as JSON
+
+For every size (number of hotels, see hotels.synthetic) a separate test database is filled by the import job
+(hotels.jobs.fetch_hotel_data) from feeds served by a local HTTP stand-in: an initial import, an import
+of unchanged feeds and one of a hotel feed with 1% renamed hotels. Then the city and hotel pages
+(first and last page, with and without search) and the admin lists are requested through the test client,
+with the response and fragment caches disabled (as when benchmarks/baseline.json was recorded). The current
+settings are used (loader, search backend, pagination, ...), they are saved with the results.
+
+Results (median, p95 and min latency per benchmark) are written as JSON. With --baseline the medians are
+compared with the ones of a stored run (e.g. benchmarks/baseline.json): the exit status is 1 if a benchmark
+is slower than the baseline by more than --tolerance. A stored run can be compared without running the suite:
+
+    python -m benchmarks.suite --sizes 1k 100k 1M --output logs/benchmarks.json --baseline benchmarks/baseline.json
+    python -m benchmarks.suite --compare logs/benchmarks.json --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+from hotels.synthetic import city_rows, default_city_count, feed_chunks, format_size, hotel_rows, parse_size
+
+from .common import feed_server, percentile, setup_django, test_database
+
+SETTINGS = ('IMPORT_LOADER', 'IMPORT_BATCH_SIZE', 'IMPORT_PARSE_WORKERS', 'SEARCH_BACKEND', 'PAGINATION_MODE',
+            'ITEMS_PER_PAGE', 'IN_MEMORY_CATALOG', 'ASYNC_VIEWS', 'ADMIN_COUNT_ESTIMATE_THRESHOLD')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=parse_size, nargs='+', default=[1_000, 100_000], help='Numbers of hotels: 1k 100k 1M 10M')
+    parser.add_argument('--repeat', type=int, default=5, help='Requests per page benchmark (after a warm-up one)')
+    parser.add_argument('--output', type=Path, default=Path(f'logs/benchmarks-{datetime.now():%Y%m%d-%H%M%S}.json'))
+    parser.add_argument('--baseline', type=Path, help='Results of a previous run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown vs the baseline (default 0.25: 25%%)')
+    parser.add_argument('--compare', type=Path, metavar='RESULTS', help='Compare stored results with the baseline, no run')
+    args = parser.parse_args()
+
+    if args.compare:
+        results = json.loads(args.compare.read_text())
+    else:
+        results = run_suite(args.sizes, args.repeat)
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + '\n')
+        print(f'Results are written to {args.output}')
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        sys.exit(1 if compare(results, baseline, args.tolerance) else 0)
+
+
+def run_suite(sizes: list[int], repeat: int) -> dict:
+    setup_django()
+    import django
+    from django.conf import settings
+    from django.db import connection
+
+    results = {}
+    for hotels in sizes:
+        for name, result in run_size(hotels, repeat):
+            key = f'{format_size(hotels)}/{name}'
+            results[key] = result
+            print(f'{key:<40} {result["median_ms"]:>12.1f} ms' + (f' {result["rows_per_sec"]:>10.0f} rows/sec' if 'rows_per_sec' in result else ''))
+
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': f'{connection.display_name} {getattr(connection, "pg_version", "")}'.strip(),
+            'machine': f'{platform.machine()}, {os.cpu_count()} CPU',
+            'settings': {name: getattr(settings, name) for name in SETTINGS},
+        },
+        'results': results,
+    }
+
+
+def run_size(hotels: int, repeat: int):
+    """Yields (name, result) of the benchmarks of a catalog of `hotels` hotels"""
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.urls import reverse
+    from hotels.jobs import fetch_hotel_data
+    from hotels.models import City, Hotel
+
+    cities = default_city_count(hotels)
+
+    def renamed_hotel_rows():
+        for i, (city_code, code, name) in enumerate(hotel_rows(hotels, cities)):
+            yield city_code, code, f'{name} (renamed)' if i % 100 == 0 else name
+
+    feeds = {
+        '/city.csv': lambda: feed_chunks(city_rows(cities)),
+        '/hotel.csv': lambda: feed_chunks(hotel_rows(hotels, cities)),
+    }
+
+    with test_database(), override_settings(RESPONSE_CACHE_TIMEOUT=0, FRAGMENT_CACHE_TIMEOUT=0, ALLOWED_HOSTS=['testserver']):
+        with feed_server(feeds) as url:
+            for name in ('initial', 'unchanged', 'update'):
+                if name == 'update':
+                    feeds['/hotel.csv'] = lambda: feed_chunks(renamed_hotel_rows())
+                started = time.perf_counter()
+                if fetch_hotel_data(f'{url}/city.csv', f'{url}/hotel.csv', None, None) is None:
+                    raise RuntimeError(f'{name} import failed, see the log')
+                seconds = time.perf_counter() - started
+                yield f'import/{name}', {**_stats([seconds]), 'rows_per_sec': round((hotels + cities) / seconds)}
+
+        with connection.cursor() as cursor:
+            cursor.execute('VACUUM ANALYZE')
+
+        client = Client()
+        biggest = City.objects.order_by('-hotel_count').first()
+        hotel = Hotel.objects.filter(city=biggest).order_by('code').first()
+        per_page = settings.ITEMS_PER_PAGE
+        pages = {
+            'cities/first': (reverse('cities'), {}),
+            'cities/last': (reverse('cities'), {'page': -(-cities // per_page)}),
+            'cities/search': (reverse('cities'), {'search': biggest.name[:3]}),
+            'hotels/first': (reverse('hotels', args=[biggest.code]), {}),
+            'hotels/last': (reverse('hotels', args=[biggest.code]), {'page': -(-biggest.hotel_count // per_page)}),
+            'hotels/search': (reverse('hotels', args=[biggest.code]), {'search': hotel.name.split()[0]}),
+        }
+        for name, (path, params) in pages.items():
+            yield f'views/{name}', measure(lambda: client.get(path, params), repeat)
+
+        client.force_login(get_user_model().objects.create_superuser(username='admin', password='password'))
+        hotel_list, city_list = reverse('admin:hotels_hotel_changelist'), reverse('admin:hotels_city_changelist')
+        pages = {
+            'hotel-list/first': (hotel_list, {}),
+            'hotel-list/last': (hotel_list, {'p': -(-hotels // 100)}),
+            'hotel-list/search-code': (hotel_list, {'q': hotel.code}),
+            'hotel-list/search-name': (hotel_list, {'q': hotel.name.split()[0]}),
+            'hotel-list/city': (hotel_list, {'city': biggest.pk}),
+            'city-list/first': (city_list, {}),
+            'city/change': (reverse('admin:hotels_city_change', args=[biggest.pk]), {}),
+        }
+        for name, (path, params) in pages.items():
+            yield f'admin/{name}', measure(lambda: client.get(path, params), repeat)
+
+
+def measure(request: Callable, repeat: int) -> dict:
+    """Latency of the request, after a warm-up one (which fills the per-process caches)"""
+    response = request()
+    if response.status_code != 200:
+        raise RuntimeError(f'{response.request["PATH_INFO"]} responded with {response.status_code}')
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        request()
+        timings.append(time.perf_counter() - started)
+    return _stats(timings)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Prints the medians of both runs, returns the names of the benchmarks slower than the baseline (beyond tolerance)"""
+    regressions = []
+    print(f'{"benchmark":<40} {"baseline, ms":>13} {"current, ms":>12} {"change":>8}')
+    for name, result in results['results'].items():
+        if name not in baseline['results']:
+            print(f'{name:<40} {"-":>13} {result["median_ms"]:>12.1f}')
+            continue
+        before, after = baseline['results'][name]['median_ms'], result['median_ms']
+        change = after / before - 1 if before else 0
+        slower = change > tolerance
+        if slower:
+            regressions.append(name)
+        print(f'{name:<40} {before:>13.1f} {after:>12.1f} {change:>+8.0%}' + ('  SLOWER' if slower else ''))
+    if regressions:
+        print(f'{len(regressions)} benchmarks are slower than the baseline by more than {tolerance:.0%} '
+              f'(baseline: commit {baseline["meta"]["commit"]}, {baseline["meta"]["created"]})')
+    return regressions
+
+
+def _stats(timings: list[float]) -> dict:
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+        'p95_ms': round(percentile(timings, 95) * 1000, 2),
+        'min_ms': round(min(timings) * 1000, 2),
+        'runs': len(timings),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+if __name__ == '__main__':
+    main()
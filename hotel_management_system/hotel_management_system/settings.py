@@ -1,4 +1,6 @@
 import os
+import sys
+import tempfile
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -37,15 +39,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
-
-    # libraries
-    'django_crontab',
+    'django.contrib.postgres',
 
     # local apps
     'hotels.apps.HotelsConfig',
 ]
 
 MIDDLEWARE = [
+    'hotels.middleware.PerformanceMiddleware',  # First, so that it measures the whole request
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,12 +60,18 @@ ROOT_URLCONF = 'hotel_management_system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'hotels.performance.InstrumentedDjangoTemplates',  # DjangoTemplates measuring the render time
         'DIRS': [
             BASE_DIR / 'hotel_management_system/templates',
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Templates are compiled once per process, also with DEBUG (Django resets the cache when a template changes)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -76,9 +83,75 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'hotel_management_system.wsgi.application'
+ASGI_APPLICATION = 'hotel_management_system.asgi.application'
+
+# Async city and hotel views (for the ASGI deployment, e.g. gunicorn with uvicorn workers)
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='False') == 'True'
+
+# Primary keys of new cities and hotels: 'uuid4' (random) or 'uuid7' (time-ordered, see hotels.ids)
+PRIMARY_KEY_UUID = os.getenv('PRIMARY_KEY_UUID', default='uuid4')
 
 # Pagination
 ITEMS_PER_PAGE = 15
+PAGINATION_MODE = os.getenv('PAGINATION_MODE', default='offset')  # 'offset' (numbered pages) or 'cursor' (keyset)
+ADMIN_COUNT_ESTIMATE_THRESHOLD = 100_000  # rows, counts of bigger unfiltered admin lists are estimated (PostgreSQL)
+
+# In-memory catalog of cities and hotels (per process, reloaded when the data generation changes)
+IN_MEMORY_CATALOG = os.getenv('IN_MEMORY_CATALOG', default='False') == 'True'
+
+# JSON API
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', default='100'))
+API_EXPORT_CHUNK_SIZE = 2000  # rows fetched from the database (and sent) at a time by the NDJSON export
+
+# Search by name: 'contains' (substring, trigram index on PostgreSQL) or 'fulltext' (ranked word-prefix search)
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', default='contains')
+
+# Cache
+# 'file' is shared by all the processes (gunicorn workers and the import job), 'locmem' is per process:
+# the data generation has to be shared with the import process (system check hotels.W001)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', default='file')
+CACHE_LOCATION = os.getenv('CACHE_LOCATION', default=str(Path(tempfile.gettempdir()) / 'hotel_management_cache'))
+
+CACHES = {
+    'default': {
+        'BACKEND': {
+            'file': 'django.core.cache.backends.filebased.FileBasedCache',
+            'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+        }[CACHE_BACKEND],
+        'LOCATION': CACHE_LOCATION,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# Responses of the city and hotel views are cached until the data generation changes (0 disables the cache)
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=str(24 * 60 * 60)))  # seconds
+RESPONSE_CACHE_PARAMS = ('search', 'page', 'cursor')  # GET parameters which are part of the cache key
+# Rendered item cards and pagination of a page, also used when a response is not cached (see hotels.cache.fragment_cache_key)
+FRAGMENT_CACHE_TIMEOUT = int(os.getenv('FRAGMENT_CACHE_TIMEOUT', default=str(24 * 60 * 60)))  # seconds
+
+# Performance metrics of the requests (hotels.middleware.PerformanceMiddleware)
+PERFORMANCE_SAMPLES = int(os.getenv('PERFORMANCE_SAMPLES', default='1000'))  # Latest requests kept per url name
+PERFORMANCE_FLUSH_INTERVAL = 10  # seconds between writes of the samples of a process to the cache
+PERFORMANCE_SAMPLES_TIMEOUT = 24 * 60 * 60  # seconds, samples of a stopped process expire
+PERFORMANCE_SLOW_REQUEST = int(os.getenv('PERFORMANCE_SLOW_REQUEST', default='1000'))  # ms, slower requests are logged as warnings
+
+# Data import
+IMPORT_LOADER = os.getenv('IMPORT_LOADER', default='orm')  # 'orm', 'copy' (PostgreSQL COPY FROM STDIN) or 'staged' (COPY outside of a transaction, short merge transaction)
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', default='1000'))
+IMPORT_PARSE_WORKERS = int(os.getenv('IMPORT_PARSE_WORKERS', default='1'))  # Parsing processes, 0 for one per CPU
+IMPORT_PARSE_CHUNK_SIZE = 4 * 1024 * 1024  # bytes of a feed parsed by a worker at a time
+IMPORT_QUARANTINE_LIMIT = 1000  # Rejected rows saved per import (all of them are counted)
+FETCH_TIMEOUT = float(os.getenv('FETCH_TIMEOUT', default='30'))  # seconds (connect and read)
+FETCH_RETRIES = int(os.getenv('FETCH_RETRIES', default='3'))
+FETCH_CHUNK_SIZE = 64 * 1024  # bytes
+FETCH_SPOOL_SIZE = 16 * 1024 * 1024  # bytes, bigger feeds are spooled to disk during the import
+
+# Import scheduler (the `run_scheduler` command)
+IMPORT_INTERVAL = int(os.getenv('IMPORT_INTERVAL', default=str(24 * 60 * 60)))  # seconds, runs are aligned to it (midnight UTC)
+IMPORT_RETRIES = int(os.getenv('IMPORT_RETRIES', default='3'))  # Retries of a failed import
+IMPORT_RETRY_BACKOFF = int(os.getenv('IMPORT_RETRY_BACKOFF', default='60'))  # seconds before the first retry, doubled after
 
 # Database
 DB_NAME = os.getenv('DB_NAME')
@@ -90,6 +163,12 @@ DB_HOST = '127.0.0.1' if DB_HOST == 'localhost' else DB_HOST
 
 DB_PORT = os.getenv('DB_PORT')
 
+# Persistent connections: every process (gunicorn worker, import job) reuses its connection between requests
+# Async requests run their queries in threads of their own, a persistent connection per thread would leak
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', default='0' if ASYNC_VIEWS else '600'))  # seconds, 0 closes it after every request
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True'  # Check it before reuse
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', default='10'))  # seconds
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -98,43 +177,19 @@ DATABASES = {
         'PASSWORD': DB_PASSWORD,
         'HOST': DB_HOST,
         'PORT': DB_PORT,
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
         'OPTIONS': {
             'isolation_level': IsolationLevel.READ_COMMITTED,
+            'connect_timeout': DB_CONNECT_TIMEOUT,
         },
     }
 }
 
 
-# CronJobs
-CRONTAB_COMMAND_PREFIX = (  # "Needed to ensure environment variables are accessible in the cronjob
-    f'CITY_FETCH_URL={CITY_FETCH_URL} '
-    f'HOTEL_FETCH_URL={HOTEL_FETCH_URL} '
-    f'FETCH_USERNAME={FETCH_USERNAME} '
-    f'FETCH_PASSWORD={FETCH_PASSWORD} '
-    
-    f'DB_NAME={DB_NAME} '
-    f'DB_USERNAME={DB_USERNAME} '
-    f'DB_PASSWORD={DB_PASSWORD} '
-    f'DB_HOST={DB_HOST} '
-    f'DB_PORT={DB_PORT}'
-)
-
-CRONJOBS = [
-    # Fetch city and hotel data every day
-    (
-        '0 0 * * *',  # '* * * * *' -- for execution every minute
-        'hotels.jobs.fetch_hotel_data',
-        [],
-        {
-            'city_url': CITY_FETCH_URL,
-            'hotel_url': HOTEL_FETCH_URL,
-            'username': FETCH_USERNAME,
-            'password': FETCH_PASSWORD,
-        }
-    ),
-]
-
 # Logging
+TESTING = sys.argv[1:2] == ['test']  # manage.py test
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -162,6 +217,14 @@ LOGGING = {
             'filename': BASE_DIR / 'logs/logfile.log',
             'formatter': 'verbose',
         },
+        'performance_file': {
+            'level': 'DEBUG',
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'logs/performance.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'formatter': 'simple',
+        },
     },
     'loggers': {
         'django': {
@@ -173,7 +236,14 @@ LOGGING = {
             'handlers': ['console', 'file'],
             'level': 'INFO',
             'propagate': True
-        }
+        },
+        # A line per slow request (WARNING), or per request (INFO), see hotels.middleware.PerformanceMiddleware.
+        # Silenced while the tests run
+        'hotels.performance': {
+            'handlers': ['performance_file'],
+            'level': 'CRITICAL' if TESTING else os.getenv('PERFORMANCE_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
     },
 }
 
@@ -1,22 +1,164 @@
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections, transaction
+from django.db.models import Q, QuerySet
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
-from .models import City, Hotel
+from .cache import bump_data_generation
+from .models import City, Hotel, ImportRun, QuarantinedRow
+from .search import normalize_name
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator of the admin lists: the number of rows of a whole (unfiltered) big table is estimated on PostgreSQL
+
+    COUNT(*) reads the whole table, so the estimate of the planner (pg_class.reltuples, refreshed by autovacuum
+    and ANALYZE) is used instead once it is above settings.ADMIN_COUNT_ESTIMATE_THRESHOLD.
+    Filtered lists are counted exactly (e.g. the hotels of a city are counted by an index).
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            connection = connections[queryset.db]
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [queryset.model._meta.db_table]
+                    )
+                    estimate = cursor.fetchone()[0]
+                if estimate >= settings.ADMIN_COUNT_ESTIMATE_THRESHOLD:
+                    return estimate
+        return super().count
+
+
+class DataGenerationAdminMixin:
+    """Bumps the data generation (invalidates cached pages) once changes made in the admin are committed"""
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        transaction.on_commit(bump_data_generation)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        transaction.on_commit(bump_data_generation)
+
+    def delete_queryset(self, request, queryset):
+        super().delete_queryset(request, queryset)
+        transaction.on_commit(bump_data_generation)
+
+
+class CatalogAdminMixin:
+    """
+    Changelists of the big City and Hotel tables
+
+    The count of an unfiltered list is estimated (see EstimatedCountPaginator) and the total count is not shown.
+    A search matches code prefixes (the unique index of code supports LIKE 'prefix%') and substrings of the
+    normalized search_name (trigram index), instead of icontains on every search field; search_fields only enable
+    the search box and the autocomplete.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    search_fields = ('code', 'name')
+    search_help_text = 'Code prefix or part of the name'
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        codes = Q(code__startswith=search_term) | Q(code__startswith=search_term.upper())
+        return queryset.filter(codes | Q(search_name__contains=normalize_name(search_term))), False
 
 
 @admin.register(Hotel)
-class HotelAdmin(admin.ModelAdmin):
+class HotelAdmin(CatalogAdminMixin, DataGenerationAdminMixin, admin.ModelAdmin):
+    """Changes of the hotels refresh the hotel counts of their (previous and new) cities"""
     list_display = ('code', 'name', 'city')
-    search_fields = ('code', 'name')
+    list_select_related = ('city',)
+    ordering = ('code',)
+    autocomplete_fields = ('city',)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        previous_city_id = form.initial.get('city') if change else None
+        City.objects.filter(id__in={obj.city_id, previous_city_id} - {None}).refresh_hotel_counts()
 
-class HotelInline(admin.TabularInline):
-    model = Hotel
-    extra = 0
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        City.objects.filter(id=obj.city_id).refresh_hotel_counts()
+
+    def delete_queryset(self, request, queryset):
+        city_ids = set(queryset.values_list('city_id', flat=True))
+        super().delete_queryset(request, queryset)
+        City.objects.filter(id__in=city_ids).refresh_hotel_counts()
+
+
+class HotelCountFilter(admin.SimpleListFilter):
+    """Ranges of City.hotel_count (an indexed column)"""
+    title = 'hotels'
+    parameter_name = 'hotels'
+    ranges = {'0': (0, 0), '1-10': (1, 10), '11-100': (11, 100), '101+': (101, None)}
+
+    def lookups(self, request, model_admin):
+        return [(name, name) for name in self.ranges]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.ranges:
+            return queryset
+        low, high = self.ranges[self.value()]
+        queryset = queryset.filter(hotel_count__gte=low)
+        return queryset if high is None else queryset.filter(hotel_count__lte=high)
 
 
 @admin.register(City)
-class CityAdmin(admin.ModelAdmin):
-    list_display = ('code', 'name')
-    search_fields = ('code', 'name')
+class CityAdmin(CatalogAdminMixin, DataGenerationAdminMixin, admin.ModelAdmin):
+    """Hotels of a city are not edited inline (thousands of forms): they are linked to the paginated hotel list"""
+    list_display = ('code', 'name', 'hotels')
+    list_filter = (HotelCountFilter,)
+    ordering = ('code',)
+    readonly_fields = ('hotels',)
+
+    @admin.display(description='Hotels', ordering='hotel_count')
+    def hotels(self, obj: City) -> str:
+        if obj.pk is None:
+            return '-'
+        url = reverse('admin:hotels_hotel_changelist')
+        return format_html('<a href="{}?city={}">{}</a>', url, obj.pk, obj.hotel_count)
+
+
+class QuarantinedRowInline(admin.TabularInline):
+    model = QuarantinedRow
+    fields = ('feed', 'line', 'reason', 'content')
+    extra = 0
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ImportRun)
+class ImportRunAdmin(admin.ModelAdmin):
+    """Read-only history of the imports"""
+    list_display = (
+        'started_at', 'status', 'loader', 'duration', 'bytes_downloaded', 'city_rows', 'hotel_rows', 'rows_per_second',
+        'cities_created', 'cities_updated', 'cities_deleted', 'hotels_created', 'hotels_updated', 'hotels_deleted',
+        'quarantined_rows',
+    )
+    list_filter = ('status', 'loader')
+    date_hierarchy = 'started_at'
+
+    inlines = [QuarantinedRowInline]
+
+    def has_add_permission(self, request):
+        return False
 
-    inlines = [HotelInline]
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,83 @@
+import json
+from itertools import islice
+from typing import Iterator
+
+from django.conf import settings
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import condition, require_GET
+
+from .cache import get_data_generation
+from .models import City, Hotel
+from .pagination import cursor_paginator
+from .search import search_by_name
+
+
+def data_etag(request: HttpRequest, *args, **kwargs) -> str:
+    """Responses change only with the data, so the data generation is a valid ETag of any API url"""
+    return str(get_data_generation())
+
+
+def _list_response(request: HttpRequest, queryset: QuerySet, fields: dict[str, str]) -> HttpResponse:
+    """
+    A page of the queryset as JSON (`?cursor=` paging by (code, name), or by rank for the full-text search)
+    or, with `?format=ndjson`, the whole queryset
+
+    {"results": [{"code": "AMS", "name": "Amsterdam"}, ...], "previous": <cursor or null>, "next": <cursor or null>}
+    `fields` maps the keys of the objects to the lookups of their values.
+    """
+    queryset = queryset.order_by('code', 'name')  # Breaks the ties of the ranked search
+    search = request.GET.get('search')
+    if search:
+        queryset = search_by_name(queryset=queryset, search=search)
+
+    if request.GET.get('format') == 'ndjson':
+        rows = queryset.values_list(*fields.values()).iterator(chunk_size=settings.API_EXPORT_CHUNK_SIZE)
+        return StreamingHttpResponse(_ndjson_chunks(rows, fields), content_type='application/x-ndjson')
+
+    page = cursor_paginator(queryset=queryset, per_page=settings.API_PAGE_SIZE).get_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [{name: _value(obj, lookup) for name, lookup in fields.items()} for obj in page],
+        'previous': page.previous_cursor,
+        'next': page.next_cursor,
+    })
+
+
+def _value(obj, lookup: str):
+    for attr in lookup.split('__'):  # 'city__code' -> obj.city.code
+        obj = getattr(obj, attr)
+    return obj
+
+
+def _ndjson_chunks(rows: Iterator[tuple], fields: dict[str, str]) -> Iterator[str]:
+    """One JSON object per line, lines are sent in chunks of settings.API_EXPORT_CHUNK_SIZE rows"""
+    while chunk := list(islice(rows, settings.API_EXPORT_CHUNK_SIZE)):
+        yield ''.join(json.dumps(dict(zip(fields, row)), ensure_ascii=False) + '\n' for row in chunk)
+
+
+@require_GET
+@condition(etag_func=data_etag)
+def cities(request: HttpRequest) -> HttpResponse:
+    queryset = City.objects.only('code', 'name', 'hotel_count')
+    return _list_response(
+        request=request, queryset=queryset, fields={'code': 'code', 'name': 'name', 'hotel_count': 'hotel_count'},
+    )
+
+
+@require_GET
+@condition(etag_func=data_etag)
+def hotels(request: HttpRequest) -> HttpResponse:
+    queryset = Hotel.objects.select_related('city').only('code', 'name', 'city__code')
+    return _list_response(
+        request=request, queryset=queryset, fields={'code': 'code', 'name': 'name', 'city': 'city__code'},
+    )
+
+
+@require_GET
+@condition(etag_func=data_etag)
+def city_hotels(request: HttpRequest, city_code: str) -> HttpResponse:
+    city_id = City.objects.filter(code=city_code).values_list('id', flat=True).first()
+    if city_id is None:
+        return JsonResponse({'detail': 'City code does not exist'}, status=404)
+    queryset = Hotel.objects.filter(city_id=city_id).only('code', 'name')
+    return _list_response(request=request, queryset=queryset, fields={'code': 'code', 'name': 'name'})
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class HotelsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hotels'
+
+    def ready(self):
+        from . import checks  # noqa: F401 (registers the system checks)
+        from .performance import install_query_recorder
+        connection_created.connect(install_query_recorder, dispatch_uid='hotels_query_recorder')
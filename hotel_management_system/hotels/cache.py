@@ -0,0 +1,123 @@
+import hashlib
+import time
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Callable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Page
+from django.http import HttpRequest, HttpResponse
+
+from .pagination import CursorPage
+
+GENERATION_KEY = 'hotels:data-generation'
+HITS_KEY = 'hotels:response-cache:hits'
+MISSES_KEY = 'hotels:response-cache:misses'
+
+
+def get_data_generation() -> int:
+    """
+    Returns the current data generation: it is changed whenever cities or hotels are changed
+
+    A missing (e.g. evicted) generation is initialized with the current time,
+    so it never goes back to a value which could have been used before.
+    """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_data_generation():
+    """Invalidates everything cached for the previous data generation"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:  # The key is missing
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def _count(key: str):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_response_cache_stats() -> dict[str, int]:
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {'hits': counters.get(HITS_KEY, 0), 'misses': counters.get(MISSES_KEY, 0)}
+
+
+def reset_response_cache_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
+
+
+def response_cache_key(view_name: str, request: HttpRequest, view_kwargs: dict) -> str:
+    """Key of (data generation, view, view kwargs (e.g. city_code), settings.RESPONSE_CACHE_PARAMS)"""
+    params = [(name, request.GET.get(name)) for name in settings.RESPONSE_CACHE_PARAMS]
+    digest = hashlib.md5(repr((sorted(view_kwargs.items()), params)).encode()).hexdigest()
+    return f'hotels:response:{get_data_generation()}:{view_name}:{digest}'
+
+
+def fragment_cache_key(view_name: str, request: HttpRequest, view_kwargs: dict, page: Page | CursorPage) -> str:
+    """
+    Vary-on value of the cached item cards and pagination of a page (see the {% cache %} blocks of the templates)
+
+    Key of (data generation, view, view kwargs, search, pagination settings, page number or cursor):
+    numbered pages are keyed by the number they resolved to, so e.g. ?page=0 and ?page=1 share the fragment.
+    """
+    position = page.number if isinstance(page, Page) else request.GET.get('cursor')
+    key = (sorted(view_kwargs.items()), request.GET.get('search'), settings.PAGINATION_MODE, settings.ITEMS_PER_PAGE, position)
+    return f'{get_data_generation()}:{view_name}:{hashlib.md5(repr(key).encode()).hexdigest()}'
+
+
+def cache_response(view: Callable[..., HttpResponse]) -> Callable[..., HttpResponse]:
+    """
+    Caches successful responses of a view (sync or async) until the data generation changes
+
+    The "X-Cache" header tells whether the response was served from the cache (HIT) or rendered (MISS).
+    """
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            if not settings.RESPONSE_CACHE_TIMEOUT:
+                return await view(request, *args, **kwargs)
+
+            key = await sync_to_async(response_cache_key)(view_name=view.__name__, request=request, view_kwargs=kwargs)
+            response = await cache.aget(key)
+            if response is None:
+                await sync_to_async(_count)(MISSES_KEY)
+                response = await view(request, *args, **kwargs)
+                if response.status_code == 200:
+                    await cache.aset(key, response, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+                response['X-Cache'] = 'MISS'
+            else:
+                await sync_to_async(_count)(HITS_KEY)
+                response['X-Cache'] = 'HIT'
+            return response
+
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if not settings.RESPONSE_CACHE_TIMEOUT:
+            return view(request, *args, **kwargs)
+
+        key = response_cache_key(view_name=view.__name__, request=request, view_kwargs=kwargs)
+        response = cache.get(key)
+        if response is None:
+            _count(MISSES_KEY)
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+        else:
+            _count(HITS_KEY)
+            response['X-Cache'] = 'HIT'
+        return response
+
+    return wrapper
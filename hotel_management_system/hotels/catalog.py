@@ -0,0 +1,144 @@
+import sys
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .cache import get_data_generation
+from .models import City, Hotel
+from .search import normalize_name
+
+
+class CatalogCity(NamedTuple):
+    code: str
+    name: str
+    search_name: str
+    hotel_count: int
+
+
+class CatalogHotel(NamedTuple):
+    code: str
+    name: str
+    search_name: str
+
+
+class Catalog:
+    """
+    Read-only in-memory copy of the cities and hotels of one data generation
+
+    Cities and the hotels of every city are lists of (code, name, ...) tuples sorted by (code, name), so a city
+    is found by its code in O(1) and pages are plain list slices (or binary searches, see CursorPaginator).
+    The lists are sorted in Python (by code points): the binary searches compare the keys the same way, whatever
+    the collation of the database is. It is the order of the database pages under the "C" collation only.
+    """
+
+    def __init__(self, generation: int, cities: list[CatalogCity], hotels_by_city: dict[str, list[CatalogHotel]]):
+        self.generation = generation
+        self.cities = cities
+        self.cities_by_code = {city.code: city for city in cities}
+        self.hotels_by_city = hotels_by_city
+
+    @classmethod
+    def load(cls, generation: int) -> 'Catalog':
+        city_codes = {}
+        cities = []
+        cities_data = City.objects.order_by('code', 'name').values_list('id', 'code', 'name', 'search_name', 'hotel_count')
+        for city_id, code, name, search_name, hotel_count in cities_data:
+            city_codes[city_id] = code
+            cities.append(CatalogCity(code=code, name=name, search_name=_shared(search_name, name), hotel_count=hotel_count))
+        hotels_by_city: dict[str, list[CatalogHotel]] = {city.code: [] for city in cities}
+        hotels = Hotel.objects.order_by('code', 'name').values_list('city_id', 'code', 'name', 'search_name')
+        for city_id, code, name, search_name in hotels.iterator(chunk_size=settings.IMPORT_BATCH_SIZE):
+            if city_id in city_codes:  # Otherwise the city was created after it was read: the generation is bumped
+                hotels_by_city[city_codes[city_id]].append(CatalogHotel(code, name, _shared(search_name, name)))
+        # The database order depends on its collation (e.g. 'b01' < 'C01' under en_US.UTF-8), the sort is cheap
+        # on the mostly sorted rows
+        cities.sort(key=_sort_key)
+        for hotels in hotels_by_city.values():
+            hotels.sort(key=_sort_key)
+        return cls(generation=generation, cities=cities, hotels_by_city=hotels_by_city)
+
+    def get_city(self, code: str) -> CatalogCity | None:
+        return self.cities_by_code.get(code)
+
+    def search_cities(self, search: str | None) -> list[CatalogCity]:
+        return _search(self.cities, search)
+
+    def search_hotels(self, city_code: str, search: str | None) -> list[CatalogHotel]:
+        return _search(self.hotels_by_city.get(city_code, []), search)
+
+    @property
+    def hotel_count(self) -> int:
+        return sum(len(hotels) for hotels in self.hotels_by_city.values())
+
+    def memory_usage(self) -> dict[str, int]:
+        """
+        Approximate size in bytes: records (tuples and their strings) and containers (lists and dicts)
+
+        Strings shared by several records (e.g. equal names) are counted once.
+        """
+        seen: set[int] = set()
+
+        def records_size(records: list[NamedTuple]) -> int:
+            size = 0
+            for record in records:
+                size += sys.getsizeof(record)
+                for value in record:
+                    if id(value) not in seen:
+                        seen.add(id(value))
+                        size += sys.getsizeof(value)
+            return size
+
+        all_hotels = self.hotels_by_city.values()
+        return {
+            'cities': records_size(self.cities),
+            'hotels': sum(records_size(hotels) for hotels in all_hotels),
+            'containers': (
+                sys.getsizeof(self.cities) + sys.getsizeof(self.cities_by_code) + sys.getsizeof(self.hotels_by_city)
+                + sum(sys.getsizeof(hotels) for hotels in all_hotels)
+            ),
+        }
+
+
+def _sort_key(record: CatalogCity | CatalogHotel) -> tuple[str, str]:
+    return record.code, record.name
+
+
+def _shared(search_name: str, name: str) -> str:
+    """The search name is not stored twice if it is the same as the name (e.g. a lowercase one)"""
+    return name if search_name == name else search_name
+
+
+def _search(records: list, search: str | None) -> list:
+    """Case and accent-insensitive substring search by the search name (the 'contains' search backend)"""
+    if not search:
+        return records
+    search = normalize_name(search)
+    return [record for record in records if search in record.search_name]
+
+
+_catalog: Catalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def catalog_enabled(search: str | None = None) -> bool:
+    """The catalog is enabled by settings.IN_MEMORY_CATALOG and serves only the substring search"""
+    return settings.IN_MEMORY_CATALOG and (not search or settings.SEARCH_BACKEND == 'contains')
+
+
+def get_catalog() -> Catalog:
+    """
+    Returns the catalog of this process for the current data generation
+
+    It is reloaded lazily by the first request after the generation has changed. The generation is read
+    before the data, so a change committed during the load makes the next request reload the catalog again.
+    """
+    global _catalog
+    generation = get_data_generation()
+    catalog = _catalog
+    if catalog is None or catalog.generation != generation:
+        with _catalog_lock:
+            if _catalog is None or _catalog.generation != generation:
+                _catalog = Catalog.load(generation=generation)
+            catalog = _catalog
+    return catalog
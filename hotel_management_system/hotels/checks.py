@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache', 'django.core.cache.backends.dummy.DummyCache')
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The data generation (hotels.cache) has to be shared by the web processes and the import process
+
+    With a per-process cache the import bumps only its own generation: the cached responses, fragments,
+    API ETags and the in-memory catalog of the web processes are never invalidated.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f'The default cache ({backend}) is not shared between processes: the pages are not invalidated '
+        'after an import made by another process (run_scheduler, import_hotels)',
+        hint='Use CACHE_BACKEND=file (or a shared cache server) unless the imports run in the web process',
+        id='hotels.W001',
+    )]
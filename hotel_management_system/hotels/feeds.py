@@ -0,0 +1,207 @@
+import gzip
+import hashlib
+import io
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import formatdate
+from http import HTTPStatus
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Callable
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+import requests
+import zstandard
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.auth import AuthBase
+from urllib3.util.retry import Retry
+
+from .models import FeedState
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the process-wide HTTP session
+
+    Connections are pooled and kept alive between the feeds (and between runs of a long-living process),
+    failed requests are retried with an exponential backoff.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=settings.FETCH_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=('GET',),
+            )
+            adapter = HTTPAdapter(pool_maxsize=4, max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+
+# Compressed bodies are detected by their magic number and decompressed on the fly (whatever the source),
+# so a decompressed feed is never held as a whole
+DECOMPRESSORS: dict[bytes, Callable[[BinaryIO], BinaryIO]] = {
+    b'\x1f\x8b': lambda file: gzip.GzipFile(fileobj=file, mode='rb'),
+    b'\x28\xb5\x2f\xfd': lambda file: zstandard.ZstdDecompressor().stream_reader(file, read_across_frames=True, closefd=False),
+}
+
+
+def decompressed(file: BinaryIO) -> BinaryIO:
+    """The seekable file from its current position, decompressed on the fly if it is gzip or zstd compressed"""
+    position = file.tell()
+    magic = file.read(4)
+    file.seek(position)
+    for prefix, decompressor in DECOMPRESSORS.items():
+        if magic.startswith(prefix):
+            return decompressor(file)
+    return file
+
+
+# Formats (see hotels.parsing.PARSERS) by the extension of the URL path (after the compression one) or the Content-Type
+FORMAT_EXTENSIONS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson'}
+FORMAT_CONTENT_TYPES = {'application/x-ndjson': 'ndjson', 'application/jsonl': 'ndjson', 'text/csv': 'csv'}
+COMPRESSION_EXTENSIONS = ('.gz', '.zst')
+
+
+def detect_format(url: str, content_type: str = '') -> str:
+    """Format of a feed: by the extension of its URL, then by its Content-Type, 'csv' by default"""
+    root, extension = os.path.splitext(urlsplit(url).path.lower())
+    if extension in COMPRESSION_EXTENSIONS:
+        extension = os.path.splitext(root)[1]
+    if extension in FORMAT_EXTENSIONS:
+        return FORMAT_EXTENSIONS[extension]
+    return FORMAT_CONTENT_TYPES.get(content_type.split(';')[0].strip().lower(), 'csv')
+
+
+@dataclass
+class Feed:
+    """
+    Fetched feed: a downloaded body is spooled to a temporary file (kept in memory while it is small),
+    a local one is memory-mapped
+    """
+    url: str
+    not_modified: bool = False
+    file: BinaryIO | None = None
+    size: int = 0
+    etag: str = ''
+    last_modified: str = ''
+    content_hash: str = ''
+    format: str = 'csv'
+
+    def is_unchanged(self, state: FeedState | None) -> bool:
+        """The server answered "304 Not Modified" or the body is the same as the imported one"""
+        return self.not_modified or (state is not None and state.content_hash == self.content_hash)
+
+    def stream(self) -> BinaryIO:
+        """The body from its start, decompressed on the fly if it is gzip or zstd compressed"""
+        self.file.seek(0)
+        return decompressed(self.file)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def download_feed(url: str, auth: AuthBase | None = None, state: FeedState | None = None) -> Feed:
+    """
+    Downloads a feed, conditionally if the validators (ETag/Last-Modified) of its last import are known
+
+    The body is streamed into a spooled temporary file while its SHA-256 hash is computed.
+    """
+    headers = {}
+    if state is not None:
+        if state.etag:
+            headers['If-None-Match'] = state.etag
+        if state.last_modified:
+            headers['If-Modified-Since'] = state.last_modified
+
+    with get_session().get(url, auth=auth, headers=headers, stream=True, timeout=settings.FETCH_TIMEOUT) as response:
+        if response.status_code == HTTPStatus.NOT_MODIFIED:
+            return Feed(
+                url=url,
+                not_modified=True,
+                etag=state.etag,
+                last_modified=state.last_modified,
+                content_hash=state.content_hash,
+            )
+        response.raise_for_status()
+
+        feed = Feed(
+            url=url,
+            file=SpooledTemporaryFile(max_size=settings.FETCH_SPOOL_SIZE),
+            etag=response.headers.get('ETag', ''),
+            last_modified=response.headers.get('Last-Modified', ''),
+            format=detect_format(url, response.headers.get('Content-Type', '')),
+        )
+        digest = hashlib.sha256()
+        for chunk in response.iter_content(chunk_size=settings.FETCH_CHUNK_SIZE):
+            digest.update(chunk)
+            feed.file.write(chunk)
+            feed.size += len(chunk)
+        feed.content_hash = digest.hexdigest()
+        return feed
+
+
+def open_local_feed(url: str, auth: AuthBase | None = None, state: FeedState | None = None) -> Feed:
+    """
+    Opens a feed dropped on the local file system (a file:// URL or a path), `auth` is ignored
+
+    The file is memory-mapped instead of being copied: its pages are read (and evicted) by the OS while it is parsed.
+    Its size and modification time play the role of the ETag, so an unchanged file is not even hashed.
+    """
+    path = url2pathname(urlsplit(url).path) if url.startswith('file:') else url
+    stat = os.stat(path)
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    if state is not None and state.etag == etag:
+        return Feed(url=url, not_modified=True, etag=etag, last_modified=last_modified, content_hash=state.content_hash)
+
+    with open(path, 'rb') as file:
+        # An empty file can not be mapped
+        body = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else io.BytesIO()
+    return Feed(
+        url=url,
+        file=body,
+        size=stat.st_size,
+        etag=etag,
+        last_modified=last_modified,
+        content_hash=hashlib.sha256(body if stat.st_size else b'').hexdigest(),
+        format=detect_format(url),
+    )
+
+
+# Feed sources by URL scheme (a URL without scheme is a local path)
+SOURCES: dict[str, Callable[[str, AuthBase | None, FeedState | None], Feed]] = {
+    'http': download_feed,
+    'https': download_feed,
+    'file': open_local_feed,
+    '': open_local_feed,
+}
+
+
+def fetch_feed(url: str, auth: AuthBase | None = None, state: FeedState | None = None) -> Feed:
+    """Fetches a feed from the source of its URL scheme (see SOURCES)"""
+    scheme = urlsplit(url).scheme
+    if scheme not in SOURCES:
+        raise ValueError(f'Unsupported feed URL {url}')
+    return SOURCES[scheme](url, auth, state)
+
+
+def download_feeds(urls: list[str], auth: AuthBase | None = None, states: dict[str, FeedState] | None = None) -> list[Feed]:
+    """Fetches the feeds in parallel (see fetch_feed), the result is in the order of urls"""
+    states = states or {}
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        futures = [executor.submit(fetch_feed, url, auth, states.get(url)) for url in urls]
+        return [future.result() for future in futures]
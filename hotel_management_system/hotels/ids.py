@@ -0,0 +1,46 @@
+"""
+Primary keys of the cities and hotels: random (UUIDv4) or time-ordered (UUIDv7) UUIDs
+
+Random keys of a bulk import are inserted all over the primary key index, which splits its pages
+and keeps all of it hot. UUIDv7 keys (RFC 9562) start with a millisecond timestamp, so the keys of an import
+are appended next to each other in the index. Both are stored in the same uuid column: the key type
+of the new rows is selected by settings.PRIMARY_KEY_UUID, the existing rows keep their keys (UUIDv7 keys
+sort after each other wherever the random keys are, so the locality does not depend on the old rows).
+"""
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_last_timestamp = 0
+_counter = 0
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID: 48-bit Unix time in milliseconds, version, 12-bit counter, variant, 62 random bits
+
+    The counter makes the keys generated by the process monotonic within a millisecond (it starts
+    at a random value below 2048); when it overflows, the timestamp is advanced ahead of the clock.
+    """
+    global _last_timestamp, _counter
+    data = int.from_bytes(os.urandom(10))
+    random_bits = data & 0x3FFF_FFFF_FFFF_FFFF
+    with _lock:
+        timestamp = time.time_ns() // 1_000_000
+        if timestamp > _last_timestamp:
+            _last_timestamp, _counter = timestamp, data >> 69  # 11 random bits
+        else:
+            _counter += 1
+            if _counter > 0xFFF:
+                _last_timestamp, _counter = _last_timestamp + 1, 0
+        timestamp, counter = _last_timestamp, _counter
+    return uuid.UUID(int=(timestamp << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | random_bits)
+
+
+def new_id() -> uuid.UUID:
+    """Primary key of a new city or hotel, of the type selected by settings.PRIMARY_KEY_UUID"""
+    return uuid7() if settings.PRIMARY_KEY_UUID == 'uuid7' else uuid.uuid4()
@@ -1,73 +1,149 @@
-import csv
-import io
 import logging
-from collections import defaultdict
+import time
+import traceback
+from contextlib import ExitStack, nullcontext
+from dataclasses import asdict
 
-import requests
+from django.conf import settings
 from django.db import transaction, DatabaseError
+from django.utils import timezone
 from requests.auth import HTTPBasicAuth
 
-from .models import City, Hotel
+from .cache import bump_data_generation
+from .feeds import Feed, download_feeds
+from .loaders import AUTOCOMMIT_LOADERS, get_loader
+from .models import FeedState, ImportRun
+from .sync import SyncStats
+from .timing import PhaseTimer
+from .validation import FeedValidator, Quarantine
 
 logger = logging.getLogger(__name__)
 
 
-def fetch_csv_data(url: str, username: str, password: str) -> list[list[str]]:
-    response: requests.models.Response = requests.get(url, auth=HTTPBasicAuth(username=username, password=password))
-    csv_content = response.content.decode('utf-8')
-    csv_file = io.StringIO(csv_content)
-    csv_reader = csv.reader(csv_file, delimiter=';')
-    return list(csv_reader)
-
-
-def fetch_hotel_data(city_url: str, hotel_url: str, username: str, password: str):
+def fetch_hotel_data(city_url: str, hotel_url: str, username: str | None, password: str | None) -> SyncStats | None:
     """
-    Fetches CSV files with cities and hotels using authenticated HTTP and loads them into the database
-
-    The first revision: clear all previous data and load the new one
-    This approach has some conflicts with management system.
-    I plan to discuss alternative solutions during the interview.
+    Fetches the city and hotel feeds and loads them into the database
+
+    A feed is fetched from the source of its URL (see hotels.feeds.SOURCES): HTTP(S), with basic auth if a username
+    is given, or a local file. It is decompressed on the fly if it is gzip or zstd compressed and parsed
+    as ';'-delimited CSV or NDJSON (detected by the URL extension or the Content-Type), so every source yields
+    the same rows.
+    Both feeds are downloaded in parallel and conditionally (ETag/Last-Modified of the last import).
+    If neither feed has changed (304 Not Modified or the same content hash) the run stops before any DB write.
+    Otherwise only the difference between the feeds and the database is written, so unchanged cities and hotels
+    keep their primary keys, and the data generation is bumped if anything has changed.
+    The feeds are streamed into the loader selected by settings.IMPORT_LOADER: the ORM one (hotels.sync.sync_catalog)
+    or the PostgreSQL COPY one (hotels.loaders.copy_catalog), both run in one transaction, or the COPY one
+    staging the feeds before a short merge transaction (hotels.loaders.staged_catalog).
+    Malformed, duplicate and orphan rows are quarantined (see hotels.validation) instead of failing the run.
+    Phase timings, volumes, written and quarantined rows of the run are saved as an ImportRun.
+    Returns the sync statistics or None if the run failed.
     """
     logger.info('Data fetch cronjob started')
 
+    run = ImportRun(started_at=timezone.now(), loader=settings.IMPORT_LOADER)
+    timer = PhaseTimer()
+    quarantine = Quarantine()
+    started = time.perf_counter()
+    with timer.activate():
+        stats = _import(
+            city_url=city_url, hotel_url=hotel_url, auth=HTTPBasicAuth(username, password) if username else None,
+            run=run, timer=timer, quarantine=quarantine,
+        )
+    run.duration = time.perf_counter() - started
+    run.timings = {name: round(seconds, 6) for name, seconds in timer.timings.items()}
+    logger.info('Data fetch cronjob timings (%s)', ', '.join(f'{name}: {seconds:.2f} s' for name, seconds in run.timings.items()))
+
+    if quarantine.count:
+        logger.warning('Data fetch cronjob: %s rows are quarantined', quarantine.count)
+    if run.status:
+        _save_run(run=run, stats=stats, quarantine=quarantine)
+    return stats
+
+
+def _import(
+    city_url: str, hotel_url: str, auth: HTTPBasicAuth | None, run: ImportRun, timer: PhaseTimer, quarantine: Quarantine,
+) -> SyncStats | None:
+    """The run of fetch_hotel_data, `run` gets its status (not set if the feeds are not modified) and volumes"""
+    urls = [city_url, hotel_url]
+    feeds: list[Feed] = []
     try:
-        # [['AMS', 'Amsterdam'], ['ANT', 'Antwerpen'], ... ]
-        city_list = fetch_csv_data(url=city_url, username=username, password=password)
-
-        # [['AMS', 'AMS01', 'Ibis'], ['AMS', 'AMS02', 'Novotel'], ... ]
-        hotel_list = fetch_csv_data(url=hotel_url, username=username, password=password)
-
-        # {'AMS': 'Amsterdam', 'ANT': 'Antwerpen', ... }
-        city_dict: dict[str, str] = {c[0]: c[1] for c in city_list}
-
-        # {'AMS': [('AMS01', 'Ibis'), ('AMS02', 'Novotel'), ... ], 'ANT': [(...), (...), ... ], ... }
-        hotel_dict: dict[str, list] = defaultdict(list)
-        for h in hotel_list:
-            hotel_dict[h[0]].append((h[1], h[2]))
-    except Exception:
-        logger.error('Data fetch cronjob parsing error', exc_info=True)
-        return
-
+        try:
+            states = FeedState.objects.in_bulk(urls, field_name='url')
+            with timer.phase('download'):
+                feeds = download_feeds(urls=urls, auth=auth, states=states)
+            if all(feed.is_unchanged(states.get(feed.url)) for feed in feeds):
+                # Validators are saved in case the server changed them for the same content
+                _save_feed_states(feeds=feeds, states=states)
+                logger.info('Data fetch cronjob: feeds are not modified, nothing to upload')
+                return SyncStats()
+
+            # Both feeds are needed for the import, so the not modified one is downloaded again
+            not_modified = [feed.url for feed in feeds if feed.not_modified]
+            if not_modified:
+                with timer.phase('download'):
+                    downloaded = dict(zip(not_modified, download_feeds(urls=not_modified, auth=auth)))
+                feeds = [downloaded.get(feed.url, feed) for feed in feeds]
+            run.bytes_downloaded = sum(feed.size for feed in feeds)
+        except Exception:
+            logger.error('Data fetch cronjob download error', exc_info=True)
+            run.status, run.error = ImportRun.Status.FAILED, traceback.format_exc()
+            return None
+
+        city_feed, hotel_feed = feeds
+        loader = get_loader()
+        autocommit = loader in AUTOCOMMIT_LOADERS
+        validator = FeedValidator(quarantine=quarantine)
+        try:
+            # The stack exits the commit phase once the transaction is committed or rolled back
+            with validator, ExitStack() as commit, nullcontext() if autocommit else transaction.atomic():
+                # Rows are parsed and validated lazily, while the loader consumes them
+                # CityRow(code='AMS', name='Amsterdam'), CityRow(code='ANT', name='Antwerpen'), ...
+                city_rows = timer.timed(validator.city_rows(city_feed.stream(), city_feed.format), 'parse')
+                # HotelRow(city_code='AMS', code='AMS01', name='Ibis'), HotelRow(city_code='AMS', code='AMS02', ...), ...
+                hotel_rows = timer.timed(validator.hotel_rows(hotel_feed.stream(), hotel_feed.format), 'parse')
+
+                stats = loader(city_rows=city_rows, hotel_rows=hotel_rows)
+                _save_feed_states(feeds=feeds, states=states)
+                commit.enter_context(timer.phase('commit'))
+        except Exception as error:
+            if isinstance(error, DatabaseError):
+                logger.error('Data fetch cronjob transaction rollback', exc_info=True)
+            else:
+                # Rows are parsed while they are written, so the transaction is rolled back as well
+                logger.error('Data fetch cronjob parsing error', exc_info=True)
+            run.status, run.error = ImportRun.Status.FAILED, traceback.format_exc()
+            return None
+        finally:
+            run.city_rows, run.hotel_rows = validator.lines['city'], validator.lines['hotel']
+    finally:
+        for feed in feeds:
+            feed.close()
+
+    if stats.writes:
+        bump_data_generation()
+    logger.info('New data (cronjob) uploaded successfully (%s)', stats)
+    run.status = ImportRun.Status.SUCCESS
+    return stats
+
+
+def _save_run(run: ImportRun, stats: SyncStats | None, quarantine: Quarantine):
+    for name, value in asdict(stats or SyncStats()).items():
+        setattr(run, name, value)
+    run.quarantined_rows = quarantine.count
     try:
         with transaction.atomic():
-            # Clear all data (Impossible to execute "truncate" without raw sql)
-            City.objects.all().delete()
-
-            # Prepare models
-            cities: list[City] = []
-            hotels: list[Hotel] = []
-            for city_code, city_name in city_dict.items():
-                city = City(code=city_code, name=city_name)
-                cities.append(city)
-                for hotel_code, hotel_name in hotel_dict[city_code]:
-                    hotel = Hotel(code=hotel_code, name=hotel_name, city=city)
-                    hotels.append(hotel)
-
-            # Create all new models
-            City.objects.bulk_create(cities)
-            Hotel.objects.bulk_create(hotels)
+            run.save()
+            quarantine.save(run)
     except DatabaseError:
-        logger.error('Data fetch cronjob transaction rollback', exc_info=True)
-        return
+        logger.error('Data fetch cronjob: the import run is not saved', exc_info=True)
+
 
-    logger.info('New data (cronjob) uploaded successfully')
+def _save_feed_states(feeds: list[Feed], states: dict[str, FeedState]):
+    """Saves validators and content hashes of the imported feeds (only the changed ones)"""
+    for feed in feeds:
+        state = states.get(feed.url) or FeedState(url=feed.url)
+        validators = (feed.etag, feed.last_modified, feed.content_hash)
+        if state._state.adding or (state.etag, state.last_modified, state.content_hash) != validators:
+            state.etag, state.last_modified, state.content_hash = validators
+            state.save()
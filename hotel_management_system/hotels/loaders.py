@@ -0,0 +1,269 @@
+import csv
+import io
+import logging
+from typing import Callable, Iterable, Iterator
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+from .models import City, Hotel
+from .search import normalize_name
+from .sync import CityRow, HotelRow, SyncStats, _batches, sync_catalog
+from .timing import phase
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[Iterable[CityRow], Iterable[HotelRow]], SyncStats]
+
+
+def copy_catalog(city_rows: Iterable[CityRow], hotel_rows: Iterable[HotelRow], batch_size: int | None = None) -> SyncStats:
+    """
+    PostgreSQL loader: streams the feeds into staging tables with COPY FROM STDIN and merges them set-based
+
+    Semantics are the same as the ones of hotels.sync.sync_catalog (the ORM loader):
+    rows are matched by code, unchanged rows are not rewritten, the last duplicate wins
+    and hotels referring to a city which is absent from the city feed are skipped.
+    (The import job passes no duplicates: hotels.validation keeps the first row of a code and quarantines the others.)
+    Search names are computed while the rows are copied, hotel counts of the cities are refreshed at the end.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        _stage_feeds(cursor, city_rows=city_rows, hotel_rows=hotel_rows, batch_size=batch_size)
+        stats = _merge_feeds(cursor)
+        # A failed load drops the temporary tables by rolling back
+        cursor.execute('DROP TABLE city_staging, hotel_staging, city_feed, hotel_feed')
+
+    return stats
+
+
+def staged_catalog(city_rows: Iterable[CityRow], hotel_rows: Iterable[HotelRow], batch_size: int | None = None) -> SyncStats:
+    """
+    copy_catalog staging the feeds outside of a transaction and merging them in one short transaction
+
+    The staging tables are temporary ones of the session: every COPY of a batch commits on its own,
+    so no transaction stays open while the feeds are downloaded and parsed (old row versions can be vacuumed meanwhile)
+    and the catalog is not touched. Only the set-based merge writes to it: the changed rows are locked
+    for the merge only, readers see either the old or the new catalog and a failed import changes nothing.
+    Has to be called outside of a transaction.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+
+    with connection.cursor() as cursor:
+        try:
+            _stage_feeds(cursor, city_rows=city_rows, hotel_rows=hotel_rows, batch_size=batch_size, copy_batches=True)
+            with transaction.atomic():
+                stats = _merge_feeds(cursor)
+        finally:
+            cursor.execute('DROP TABLE IF EXISTS city_staging, hotel_staging, city_feed, hotel_feed')
+
+    return stats
+
+
+def _stage_feeds(
+    cursor, city_rows: Iterable[CityRow], hotel_rows: Iterable[HotelRow], batch_size: int, copy_batches: bool = False,
+):
+    """Copies the feeds into the city_feed and hotel_feed temporary tables, a COPY per batch if `copy_batches`"""
+
+    with phase('prepare'):  # Staging, the feeds are parsed while they are copied (see PhaseTimer)
+        # "pos" keeps the feed order, so that the last duplicate of a code wins
+        cursor.execute(
+            'CREATE TEMPORARY TABLE city_staging (pos bigserial, id uuid, code text, name text, search_name text)'
+        )
+        cursor.execute(
+            'CREATE TEMPORARY TABLE hotel_staging '
+            '(pos bigserial, id uuid, city_code text, code text, name text, search_name text)'
+        )
+
+        new_city_id = City._meta.pk.get_default
+        new_hotel_id = Hotel._meta.pk.get_default
+        city_values = ((new_city_id(), row.code, row.name, normalize_name(row.name)) for row in city_rows)
+        hotel_values = (
+            (new_hotel_id(), row.city_code, row.code, row.name, normalize_name(row.name)) for row in hotel_rows
+        )
+        for table, columns, values in (
+            ('city_staging', ('id', 'code', 'name', 'search_name'), city_values),
+            ('hotel_staging', ('id', 'city_code', 'code', 'name', 'search_name'), hotel_values),
+        ):
+            for batch in _batches(values, batch_size) if copy_batches else [values]:
+                _copy(cursor, table, columns, batch, batch_size)
+        cursor.execute('ANALYZE city_staging')
+        cursor.execute('ANALYZE hotel_staging')
+
+        # Keep the last row per code and (for hotels) only the ones with a city in the city feed
+        cursor.execute(
+            'CREATE TEMPORARY TABLE city_feed AS '
+            'SELECT DISTINCT ON (code) id, code, name, search_name FROM city_staging ORDER BY code, pos DESC'
+        )
+        cursor.execute(
+            'CREATE TEMPORARY TABLE hotel_feed AS '
+            'SELECT DISTINCT ON (s.code) s.id, s.city_code, s.code, s.name, s.search_name FROM hotel_staging s '
+            'WHERE EXISTS (SELECT 1 FROM city_feed c WHERE c.code = s.city_code) '
+            'ORDER BY s.code, s.pos DESC'
+        )
+
+
+def _merge_feeds(cursor) -> SyncStats:
+    """Upserts the staged feeds into the catalog and deletes the rows absent from them"""
+    city_table = connection.ops.quote_name(City._meta.db_table)
+    hotel_table = connection.ops.quote_name(Hotel._meta.db_table)
+    stats = SyncStats()
+
+    with phase('insert'):  # Upserts: inserts and updates
+        # (xmax = 0) is true for inserted rows and false for updated ones
+        cursor.execute(
+            f'WITH upserted AS ('
+            f'  INSERT INTO {city_table} (id, code, name, search_name, hotel_count)'
+            f'  SELECT id, code, name, search_name, 0 FROM city_feed'
+            f'  ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name, search_name = EXCLUDED.search_name'
+            f'  WHERE {city_table}.name IS DISTINCT FROM EXCLUDED.name'
+            f'  RETURNING (xmax = 0) AS inserted'
+            f') SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted'
+        )
+        stats.cities_created, stats.cities_updated = cursor.fetchone()
+
+        cursor.execute(
+            f'WITH upserted AS ('
+            f'  INSERT INTO {hotel_table} (id, code, name, search_name, city_id)'
+            f'  SELECT f.id, f.code, f.name, f.search_name, c.id FROM hotel_feed f JOIN {city_table} c ON c.code = f.city_code'
+            f'  ON CONFLICT (code) DO UPDATE SET name = EXCLUDED.name, search_name = EXCLUDED.search_name,'
+            f'  city_id = EXCLUDED.city_id'
+            f'  WHERE ({hotel_table}.name, {hotel_table}.city_id) IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.city_id)'
+            f'  RETURNING (xmax = 0) AS inserted'
+            f') SELECT count(*) FILTER (WHERE inserted), count(*) FILTER (WHERE NOT inserted) FROM upserted'
+        )
+        stats.hotels_created, stats.hotels_updated = cursor.fetchone()
+
+    with phase('delete'):
+        # Stale hotels go first: the foreign key has no "ON DELETE CASCADE" in the database
+        cursor.execute(
+            f'DELETE FROM {hotel_table} h WHERE NOT EXISTS (SELECT 1 FROM hotel_feed f WHERE f.code = h.code)'
+        )
+        stats.hotels_deleted = cursor.rowcount
+        cursor.execute(
+            f'DELETE FROM {city_table} c WHERE NOT EXISTS (SELECT 1 FROM city_feed f WHERE f.code = c.code)'
+        )
+        stats.cities_deleted = cursor.rowcount
+
+    if stats.hotels_created or stats.hotels_updated or stats.hotels_deleted:
+        with phase('update'):
+            City.objects.refresh_hotel_counts()
+
+    return stats
+
+
+def replace_catalog(
+    cities: Iterable[tuple], hotels: Iterable[tuple], batch_size: int | None = None,
+) -> SyncStats:
+    """
+    Replaces all the cities and hotels by the given rows, keeping their primary keys (see hotels.snapshots)
+
+    Cities are (id, code, name) and hotels (id, city id, code, name) rows, the cities are consumed first.
+    On PostgreSQL the tables are truncated and the rows are streamed into them with COPY FROM STDIN,
+    other databases get bulk_create() batches. Search names are computed while the rows are written,
+    hotel counts of the cities are refreshed at the end. Run it in a transaction.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    stats = SyncStats(cities_deleted=City.objects.count(), hotels_deleted=Hotel.objects.count())
+
+    if connection.vendor == 'postgresql':
+        city_table = connection.ops.quote_name(City._meta.db_table)
+        hotel_table = connection.ops.quote_name(Hotel._meta.db_table)
+        # Checks the deferred foreign keys of the writes made before in the transaction, TRUNCATE refuses pending ones
+        connection.check_constraints()
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {hotel_table}, {city_table}')
+            _copy(
+                cursor, city_table, ('id', 'code', 'name', 'search_name', 'hotel_count'),
+                ((id, code, name, normalize_name(name), 0) for id, code, name in cities), batch_size,
+            )
+            _copy(
+                cursor, hotel_table, ('id', 'city_id', 'code', 'name', 'search_name'),
+                ((id, city_id, code, name, normalize_name(name)) for id, city_id, code, name in hotels), batch_size,
+            )
+            cursor.execute(f'ANALYZE {city_table}, {hotel_table}')
+    else:
+        Hotel.objects.all().delete()
+        City.objects.all().delete()
+        for batch in _batches((City(id=id, code=code, name=name) for id, code, name in cities), batch_size):
+            City.objects.bulk_create(batch)
+        for batch in _batches(
+            (Hotel(id=id, city_id=city_id, code=code, name=name) for id, city_id, code, name in hotels), batch_size,
+        ):
+            Hotel.objects.bulk_create(batch)
+
+    City.objects.refresh_hotel_counts()
+    stats.cities_created, stats.hotels_created = City.objects.count(), Hotel.objects.count()
+    return stats
+
+
+def _csv_chunks(rows: Iterable[tuple], batch_size: int) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)  # Quoted empty strings are not NULL for COPY
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % batch_size == 0:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _ChunkReader(io.RawIOBase):
+    """File-like wrapper over chunks for psycopg2 copy_expert()"""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _copy(cursor, table: str, columns: tuple[str, ...], rows: Iterable[tuple], batch_size: int):
+    sql = f'COPY {table} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)'
+    chunks = _csv_chunks(rows, batch_size)
+    # COPY is not wrapped by Django: translate driver errors to django.db errors (IntegrityError, DataError)
+    with cursor.db.wrap_database_errors:
+        if is_psycopg3:
+            with cursor.copy(sql) as copy:
+                for chunk in chunks:
+                    copy.write(chunk)
+        else:
+            cursor.copy_expert(sql, _ChunkReader(chunks), 64 * 1024)
+
+
+LOADERS: dict[str, Loader] = {
+    'orm': sync_catalog,
+    'copy': copy_catalog,
+    'staged': staged_catalog,
+}
+
+# Loaders managing their transactions themselves, they are run outside of a transaction
+AUTOCOMMIT_LOADERS = {staged_catalog}
+
+
+def get_loader() -> Loader:
+    """
+    Returns the loader selected by settings.IMPORT_LOADER
+
+    The COPY loaders are PostgreSQL-only, the ORM loader is used as a fallback for other databases.
+    """
+    name = settings.IMPORT_LOADER
+    if name in ('copy', 'staged') and connection.vendor != 'postgresql':
+        logger.warning('%s loader is not supported by "%s", the ORM loader is used', name, connection.vendor)
+        name = 'orm'
+    return LOADERS[name]
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from hotels.cache import get_data_generation, get_response_cache_stats, reset_response_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Shows hit/miss counters of the city and hotel response cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after showing them')
+
+    def handle(self, *args, **options):
+        stats = get_response_cache_stats()
+        requests = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / requests if requests else 0
+        self.stdout.write(f'Data generation: {get_data_generation()}')
+        self.stdout.write(f'Hits: {stats["hits"]}')
+        self.stdout.write(f'Misses: {stats["misses"]}')
+        self.stdout.write(f'Hit ratio: {ratio:.1%}')
+        if options['reset']:
+            reset_response_cache_stats()
+            self.stdout.write('Counters are reset')
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hotels.cache import get_data_generation
+from hotels.catalog import Catalog
+
+
+class Command(BaseCommand):
+    help = 'Loads the in-memory catalog of cities and hotels and shows its load time and memory footprint'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        catalog = Catalog.load(generation=get_data_generation())
+        elapsed = time.perf_counter() - started
+
+        usage = catalog.memory_usage()
+        self.stdout.write(f'Cities: {len(catalog.cities)}')
+        self.stdout.write(f'Hotels: {catalog.hotel_count}')
+        self.stdout.write(f'Load time: {elapsed:.2f} s')
+        for name, size in usage.items():
+            self.stdout.write(f'Memory ({name}): {size / 2 ** 20:.1f} MiB')
+        self.stdout.write(f'Memory (total): {sum(usage.values()) / 2 ** 20:.1f} MiB')
@@ -0,0 +1,21 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from hotels.snapshots import dump_catalog, open_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Writes a snapshot of the cities and hotels (see hotels.snapshots), compressed if the path ends with .gz or .zst'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path, help='Snapshot file, e.g. catalog.ndjson.zst')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        started = time.perf_counter()
+        with open_snapshot(path, 'wb') as file:
+            cities, hotels = dump_catalog(file)
+        self.stdout.write(f'Dumped {cities} cities and {hotels} hotels to {path} ({path.stat().st_size / 2 ** 20:.1f} MiB) '
+                          f'in {time.perf_counter() - started:.1f} s')
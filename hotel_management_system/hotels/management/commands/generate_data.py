@@ -0,0 +1,66 @@
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from hotels.cache import bump_data_generation
+from hotels.loaders import AUTOCOMMIT_LOADERS, LOADERS, get_loader
+from hotels.sync import CityRow, HotelRow
+from hotels.synthetic import city_rows, default_city_count, feed_chunks, hotel_rows, parse_size
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates a synthetic catalog (see hotels.synthetic) of the given number of hotels, e.g. 1k, 100k, 1M or 10M: '
+        'replaces the cities and hotels of the database or writes city.csv and hotel.csv feeds'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hotels', type=parse_size, default='1k', help='Number of hotels: 1000, 100k, 1M, ... (default 1k)')
+        parser.add_argument('--cities', type=parse_size, help='Number of cities (default: a city per 100 hotels)')
+        parser.add_argument('--seed', type=int, default=0, help='The same seed gives the same catalog')
+        parser.add_argument('--loader', choices=LOADERS, help='Import loader (default settings.IMPORT_LOADER)')
+        parser.add_argument(
+            '--feeds', metavar='DIR', type=Path,
+            help='Write the feeds to DIR instead of the database (import them with file:// URLs or serve them)',
+        )
+        parser.add_argument(
+            '--no-input', '--noinput', action='store_false', dest='interactive',
+            help='Do not ask to confirm the replacement of the catalog',
+        )
+
+    def handle(self, *args, **options):
+        hotels = options['hotels']
+        cities = options['cities'] or default_city_count(hotels)
+        seed = options['seed']
+        started = time.perf_counter()
+
+        if options['feeds']:
+            directory = options['feeds']
+            directory.mkdir(parents=True, exist_ok=True)
+            for name, rows in (('city.csv', city_rows(cities, seed)), ('hotel.csv', hotel_rows(hotels, cities, seed))):
+                with open(directory / name, 'wb') as file:
+                    file.writelines(feed_chunks(rows))
+            self.stdout.write(f'Feeds of {cities} cities and {hotels} hotels are written to {directory} '
+                              f'in {time.perf_counter() - started:.1f} s')
+            return
+
+        if options['interactive']:
+            answer = input(
+                f'All cities and hotels of the database "{connection.settings_dict["NAME"]}" will be replaced '
+                f'by {cities} cities and {hotels} hotels. Type "yes" to continue: '
+            )
+            if answer != 'yes':
+                raise CommandError('Generation is cancelled')
+
+        loader = LOADERS[options['loader']] if options['loader'] else get_loader()
+        with nullcontext() if loader in AUTOCOMMIT_LOADERS else transaction.atomic():
+            stats = loader(
+                city_rows=(CityRow(*row) for row in city_rows(cities, seed)),
+                hotel_rows=(HotelRow(*row) for row in hotel_rows(hotels, cities, seed)),
+            )
+        bump_data_generation()
+        self.stdout.write(f'Generated: {stats}')
+        self.stdout.write(f'Time: {time.perf_counter() - started:.1f} s')
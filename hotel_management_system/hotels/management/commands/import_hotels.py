@@ -0,0 +1,54 @@
+import cProfile
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from hotels.jobs import fetch_hotel_data
+from hotels.models import ImportRun
+from hotels.scheduler import IMPORT_LOCK_KEY, advisory_lock
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports the city and hotel feeds now (the job of the daily cronjob) and shows its phase timings, '
+        'unless a scheduler is running the import'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile', nargs='?', const='', metavar='PATH',
+            help='Run the import under cProfile and save the stats (by default to logs/import-<time>.prof)',
+        )
+
+    def handle(self, *args, **options):
+        kwargs = {
+            'city_url': settings.CITY_FETCH_URL,
+            'hotel_url': settings.HOTEL_FETCH_URL,
+            'username': settings.FETCH_USERNAME,
+            'password': settings.FETCH_PASSWORD,
+        }
+        started_at = timezone.now()
+        # The lock of the scheduler (see hotels.scheduler): two concurrent imports would write the same rows
+        with advisory_lock(IMPORT_LOCK_KEY) as locked:
+            if not locked:
+                raise CommandError('The import is running in another process, try again once it is finished')
+            if options['profile'] is None:
+                stats = fetch_hotel_data(**kwargs)
+            else:
+                path = options['profile'] or settings.BASE_DIR / f'logs/import-{datetime.now():%Y%m%d-%H%M%S}.prof'
+                profiler = cProfile.Profile()
+                stats = profiler.runcall(fetch_hotel_data, **kwargs)
+                profiler.dump_stats(path)
+                self.stdout.write(f'Profile is saved to {path} (python -m pstats {path})')
+
+        if stats is None:
+            raise CommandError('Import failed, see the log')
+        self.stdout.write(f'Imported: {stats}')
+
+        # Not modified feeds are not recorded as a run
+        run = ImportRun.objects.filter(started_at__gte=started_at).first()
+        if run is not None:
+            for name, seconds in run.timings.items():
+                self.stdout.write(f'{name}: {seconds:.3f} s')
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from hotels.performance import BUCKETS, get_performance_samples, histogram, reset_performance_samples, summarize
+
+
+class Command(BaseCommand):
+    help = 'Shows latency percentiles, DB/render time and latency histograms of the latest requests by url name'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the samples after showing them')
+
+    def handle(self, *args, **options):
+        samples = get_performance_samples()
+        if not samples:
+            self.stdout.write('No samples (they are flushed by the server processes periodically)')
+        for url_name, url_samples in sorted(samples.items()):
+            summary = summarize(url_samples)
+            self.stdout.write(
+                f'{url_name}: {summary["requests"]} requests, p50 {summary["p50"]:.1f} ms, '
+                f'p90 {summary["p90"]:.1f} ms, p99 {summary["p99"]:.1f} ms, DB {summary["db"]:.1f} ms, '
+                f'render {summary["render"]:.1f} ms, {summary["queries"]:.1f} queries, {summary["bytes"]:.0f} bytes'
+            )
+            counts = histogram([sample[0] for sample in url_samples])
+            bounds = [f'<={bound}' for bound in BUCKETS] + [f'>{BUCKETS[-1]}']
+            for bound, count in zip(bounds, counts):
+                if count:
+                    self.stdout.write(f'  {bound:>7} ms {count:>6} {"#" * round(40 * count / len(url_samples))}')
+        if options['reset']:
+            reset_performance_samples()
+            self.stdout.write('Samples are reset')
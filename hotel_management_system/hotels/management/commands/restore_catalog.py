@@ -0,0 +1,40 @@
+import time
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from hotels.snapshots import open_snapshot, restore_catalog
+
+
+class Command(BaseCommand):
+    help = 'Replaces the cities and hotels by a snapshot written by dump_catalog, keeping their primary keys'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=Path, help='Snapshot file (plain, gzip or zstd compressed)')
+        parser.add_argument(
+            '--no-input', '--noinput', action='store_false', dest='interactive',
+            help='Do not ask to confirm the replacement of the catalog',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if options['interactive']:
+            answer = input(
+                f'All cities and hotels of the database "{connection.settings_dict["NAME"]}" will be replaced '
+                f'by the snapshot {path}. Type "yes" to continue: '
+            )
+            if answer != 'yes':
+                raise CommandError('Restore is cancelled')
+
+        started = time.perf_counter()
+        try:
+            with open_snapshot(path) as file:
+                stats = restore_catalog(file)
+        except (OSError, EOFError, ValueError, KeyError, TypeError, ValidationError, DatabaseError) as error:
+            # E.g. a truncated file, a malformed record, an invalid id or a hotel of an unknown city (IntegrityError)
+            raise CommandError(f'Restore failed: {error}')
+        self.stdout.write(f'Restored {stats.cities_created} cities and {stats.hotels_created} hotels '
+                          f'(replaced {stats.cities_deleted} cities and {stats.hotels_deleted} hotels) '
+                          f'in {time.perf_counter() - started:.1f} s')
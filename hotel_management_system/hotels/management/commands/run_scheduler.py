@@ -0,0 +1,23 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from hotels.scheduler import Scheduler
+
+
+class Command(BaseCommand):
+    help = 'Runs the import of the city and hotel feeds on a schedule (a long-running process, stopped by SIGTERM/SIGINT)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Seconds between the imports (IMPORT_INTERVAL by default)')
+        parser.add_argument('--now', action='store_true', help='Run the import at start as well')
+        parser.add_argument('--once', action='store_true', help='Run the import (with retries) once and exit')
+
+    def handle(self, *args, **options):
+        scheduler = Scheduler(interval=options['interval'])
+        signal.signal(signal.SIGTERM, scheduler.stop)
+        signal.signal(signal.SIGINT, scheduler.stop)
+        if options['once']:
+            scheduler.run_once()
+        else:
+            scheduler.run_forever(run_now=options['now'])
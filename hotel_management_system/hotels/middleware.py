@@ -0,0 +1,77 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from .performance import RequestMetrics, finish_request, start_request, stats
+
+logger = logging.getLogger('hotels.performance')
+
+
+class PerformanceMiddleware:
+    """
+    Measures every request: total latency, query count and DB time, template render time and response size
+
+    The metrics are sent in the "Server-Timing" header, logged as a key=value line (the "hotels.performance" logger:
+    a warning for requests slower than settings.PERFORMANCE_SLOW_REQUEST ms, info otherwise) and added to the rolling
+    samples of the url name (see hotels.performance.PerformanceStats).
+    Works for sync and async views.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            finish_request(token)
+        snapshot = self.record(request, response, metrics, time.perf_counter() - started)
+        if snapshot is not None:
+            stats.flush(snapshot)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        metrics, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            finish_request(token)
+        snapshot = self.record(request, response, metrics, time.perf_counter() - started)
+        if snapshot is not None:
+            await sync_to_async(stats.flush)(snapshot)  # The cache backends block
+        return response
+
+    @staticmethod
+    def record(request: HttpRequest, response: HttpResponse, metrics: RequestMetrics, elapsed: float) -> dict | None:
+        """Sets the header, logs the request and adds its sample; returns the samples to flush (see PerformanceStats.add)"""
+        total_ms, db_ms, render_ms = elapsed * 1000, metrics.db_time * 1000, metrics.render_time * 1000
+        size = 0 if response.streaming else len(response.content)
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{metrics.queries} queries", '
+            f'render;dur={render_ms:.1f}, total;dur={total_ms:.1f}'
+        )
+
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        snapshot = stats.add(url_name, (total_ms, db_ms, render_ms, metrics.queries, size)) if url_name else None
+
+        level = logging.WARNING if total_ms >= settings.PERFORMANCE_SLOW_REQUEST else logging.INFO
+        if logger.isEnabledFor(level):
+            logger.log(
+                level,
+                'request method=%s path=%s view=%s status=%s duration_ms=%.1f db_ms=%.1f queries=%s render_ms=%.1f bytes=%s',
+                request.method, request.path, url_name or '-', response.status_code,
+                total_ms, db_ms, metrics.queries, render_ms, size,
+            )
+        return snapshot
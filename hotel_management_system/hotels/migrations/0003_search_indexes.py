@@ -0,0 +1,65 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:45
+
+import warnings
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations
+
+TRIGRAM_INDEXES = {
+    'city': django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='hotels_city_name_trgm'),
+    'hotel': django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='hotels_hotel_name_trgm'),
+}
+
+
+def trigram_available(schema_editor) -> bool:
+    if schema_editor.connection.vendor != 'postgresql':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """The pg_trgm extension is part of PostgreSQL contrib: without it substring search keeps working unindexed"""
+    if not trigram_available(schema_editor):
+        warnings.warn('pg_trgm extension is not available, trigram search indexes are not created')
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for model_name, index in TRIGRAM_INDEXES.items():
+        schema_editor.add_index(apps.get_model('hotels', model_name), index)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for model_name, index in TRIGRAM_INDEXES.items():
+        schema_editor.remove_index(apps.get_model('hotels', model_name), index)  # DROP INDEX IF EXISTS
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0002_feedstate'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index)
+                for model_name, index in TRIGRAM_INDEXES.items()
+            ],
+            database_operations=[
+                migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='city',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', config='simple'), name='hotels_city_name_fts'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('name', config='simple'), name='hotels_hotel_name_fts'),
+        ),
+    ]
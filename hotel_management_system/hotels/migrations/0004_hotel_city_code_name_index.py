@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0003_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(fields=['city', 'code', 'name'], name='hotels_hotel_city_code_name'),
+        ),
+        migrations.AlterField(
+            model_name='hotel',
+            name='city',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='hotels', to='hotels.city'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:13
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0004_hotel_city_code_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('started_at', models.DateTimeField()),
+                ('duration', models.FloatField(default=0)),
+                ('status', models.CharField(choices=[('success', 'Success'), ('failed', 'Failed')], max_length=20)),
+                ('loader', models.CharField(blank=True, max_length=20)),
+                ('bytes_downloaded', models.BigIntegerField(default=0)),
+                ('city_rows', models.IntegerField(default=0)),
+                ('hotel_rows', models.IntegerField(default=0)),
+                ('cities_created', models.IntegerField(default=0)),
+                ('cities_updated', models.IntegerField(default=0)),
+                ('cities_deleted', models.IntegerField(default=0)),
+                ('hotels_created', models.IntegerField(default=0)),
+                ('hotels_updated', models.IntegerField(default=0)),
+                ('hotels_deleted', models.IntegerField(default=0)),
+                ('timings', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Import run',
+                'verbose_name_plural': 'Import runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:37
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0005_importrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importrun',
+            name='quarantined_rows',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='QuarantinedRow',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('feed', models.CharField(choices=[('city', 'City'), ('hotel', 'Hotel')], max_length=10)),
+                ('line', models.IntegerField()),
+                ('reason', models.CharField(max_length=255)),
+                ('content', models.TextField()),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quarantine', to='hotels.importrun')),
+            ],
+            options={
+                'verbose_name': 'Quarantined row',
+                'verbose_name_plural': 'Quarantined rows',
+                'ordering': ['feed', 'line'],
+            },
+        ),
+    ]
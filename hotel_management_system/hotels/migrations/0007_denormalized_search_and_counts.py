@@ -0,0 +1,137 @@
+# Generated by Django 5.0.14 on 2026-10-18 17:57
+
+import warnings
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from hotels.search import normalize_name
+
+TRIGRAM_INDEXES = {
+    'city': django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('search_name', name='gin_trgm_ops'), name='hotels_city_search_name_trgm'),
+    'hotel': django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('search_name', name='gin_trgm_ops'), name='hotels_hotel_search_name_trgm'),
+}
+# Created by 0003_search_indexes (if pg_trgm is available)
+OLD_TRIGRAM_INDEXES = {
+    'city': django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='hotels_city_name_trgm'),
+    'hotel': django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='gin_trgm_ops'), name='hotels_hotel_name_trgm'),
+}
+
+
+def trigram_available(schema_editor) -> bool:
+    if schema_editor.connection.vendor != 'postgresql':
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def trigram_operations(indexes: dict) -> tuple:
+    """RunPython functions creating and dropping the `indexes`, see 0003_search_indexes"""
+
+    def create(apps, schema_editor):
+        """The pg_trgm extension is part of PostgreSQL contrib: without it substring search keeps working unindexed"""
+        if not trigram_available(schema_editor):
+            warnings.warn('pg_trgm extension is not available, trigram search indexes are not created')
+            return
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for model_name, index in indexes.items():
+            schema_editor.add_index(apps.get_model('hotels', model_name), index)
+
+    def drop(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for model_name, index in indexes.items():
+            schema_editor.remove_index(apps.get_model('hotels', model_name), index)  # DROP INDEX IF EXISTS
+
+    return create, drop
+
+
+create_trigram_indexes, drop_trigram_indexes = trigram_operations(TRIGRAM_INDEXES)
+create_old_trigram_indexes, drop_old_trigram_indexes = trigram_operations(OLD_TRIGRAM_INDEXES)
+
+
+def fill_denormalized_columns(apps, schema_editor):
+    """search_name of the existing cities and hotels (in batches) and hotel_count of the cities"""
+    City = apps.get_model('hotels', 'City')
+    Hotel = apps.get_model('hotels', 'Hotel')
+    for model in (City, Hotel):
+        batch = []
+        for obj in model.objects.only('id', 'name').iterator(chunk_size=1000):
+            obj.search_name = normalize_name(obj.name)
+            batch.append(obj)
+            if len(batch) == 1000:
+                model.objects.bulk_update(batch, fields=['search_name'])
+                batch = []
+        model.objects.bulk_update(batch, fields=['search_name'])
+
+    counts = Hotel.objects.filter(city=OuterRef('pk')).order_by().values('city').annotate(count=Count('*')).values('count')
+    City.objects.update(hotel_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0006_quarantinedrow'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(model_name=model_name, name=index.name)
+                for model_name, index in OLD_TRIGRAM_INDEXES.items()
+            ],
+            database_operations=[
+                migrations.RunPython(drop_old_trigram_indexes, create_old_trigram_indexes),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='city',
+            name='hotels_city_name_fts',
+        ),
+        migrations.RemoveIndex(
+            model_name='hotel',
+            name='hotels_hotel_name_fts',
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='hotel_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='search_name',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='hotel',
+            name='search_name',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(fill_denormalized_columns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='city',
+            index=models.Index(fields=['hotel_count'], name='hotels_city_hotel_c_a3291b_idx'),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name=model_name, index=index)
+                for model_name, index in TRIGRAM_INDEXES.items()
+            ],
+            database_operations=[
+                migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='city',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('search_name', config='simple'), name='hotels_city_search_name_fts'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('search_name', config='simple'), name='hotels_hotel_search_name_fts'),
+        ),
+    ]
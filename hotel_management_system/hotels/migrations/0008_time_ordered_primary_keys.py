@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-18 19:01
+
+import hotels.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hotels', '0007_denormalized_search_and_counts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='city',
+            name='id',
+            field=models.UUIDField(default=hotels.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='hotel',
+            name='id',
+            field=models.UUIDField(default=hotels.ids.new_id, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 20:10
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    The trigram indexes exist only if pg_trgm is available (see 0007_denormalized_search_and_counts),
+    so they are removed from the model state: the state does not claim indexes the database may not have.
+    The database is not changed.
+    """
+
+    dependencies = [
+        ('hotels', '0008_time_ordered_primary_keys'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(model_name='city', name='hotels_city_search_name_trgm'),
+                migrations.RemoveIndex(model_name='hotel', name='hotels_hotel_search_name_trgm'),
+            ],
+            database_operations=[],
+        ),
+    ]
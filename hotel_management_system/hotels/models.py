@@ -1,54 +1,224 @@
 import uuid
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
+from .ids import new_id
+from .search import normalize_name
 
-class City(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+class SearchNameQuerySet(models.QuerySet):
+    """Fills search_name (see hotels.search.normalize_name) of the objects written in bulk, as save() does"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.search_name = normalize_name(obj.name)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'name' in fields and 'search_name' not in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.search_name = normalize_name(obj.name)
+            fields = [*fields, 'search_name']
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
+class CityQuerySet(SearchNameQuerySet):
+
+    def refresh_hotel_counts(self) -> int:
+        """
+        Recomputes hotel_count of the cities (one statement, counted by the (city_id, code, name) index of Hotel)
+
+        Only the changed cities are written, their number is returned.
+        """
+        counts = Hotel.objects.filter(city=OuterRef('pk')).order_by().values('city').annotate(count=Count('*')).values('count')
+        return (
+            self.annotate(actual_hotel_count=Coalesce(Subquery(counts), 0))
+            .exclude(hotel_count=F('actual_hotel_count'))
+            .update(hotel_count=F('actual_hotel_count'))
+        )
+
+
+class SearchNameMixin:
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_name(self.name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'search_name'}
+        super().save(*args, **kwargs)
+
+
+class City(SearchNameMixin, models.Model):
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)  # uuid4 or uuid7, see hotels.ids
     code = models.CharField(max_length=10, unique=True)
     name = models.CharField(max_length=255)
+    # Denormalized: maintained by the import (in bulk) and by the admin panel, see CityQuerySet.refresh_hotel_counts
+    hotel_count = models.PositiveIntegerField(default=0, editable=False)
+    search_name = models.TextField(default='', editable=False)  # normalize_name(name), see SearchNameQuerySet
+
+    objects = CityQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'City'
         verbose_name_plural = 'Cities'
         indexes = [
             models.Index(fields=['name']),
+            models.Index(fields=['hotel_count']),
+            # Full-text search by name (see hotels.search). The trigram index of the substring search
+            # (hotels_city_search_name_trgm) is created by the migrations only if pg_trgm is available,
+            # so it is not part of the model state
+            GinIndex(SearchVector('search_name', config='simple'), name='hotels_city_search_name_fts'),
         ]
 
     def __str__(self):
         return self.name
 
-    # For tests (maybe it's better to remove)
+    # Equality of the local fields and a hash of the primary key (it does not change, unlike the other fields),
+    # so that cities can be compared and put in sets without queries
     def __eq__(self, other):
         if not isinstance(other, City):
-            return False
+            return NotImplemented
         return self.id == other.id and self.code == other.code and self.name == other.name
 
     def __hash__(self):
-        return hash((self.id, self.code, self.name))
+        return hash(self.id)
 
+    def same_values(self, other: 'City') -> bool:
+        """Structural comparison, whatever the primary keys: the same code and name"""
+        return (self.code, self.name) == (other.code, other.name)
 
-class Hotel(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+
+class Hotel(SearchNameMixin, models.Model):
+    id = models.UUIDField(primary_key=True, default=new_id, editable=False)  # uuid4 or uuid7, see hotels.ids
     code = models.CharField(max_length=10, unique=True)
     name = models.CharField(max_length=255)
-    city = models.ForeignKey(to=City, on_delete=models.CASCADE, related_name='hotels')
+    # Indexed by the composite index below (city_id is its first column)
+    city = models.ForeignKey(to=City, on_delete=models.CASCADE, related_name='hotels', db_index=False)
+    search_name = models.TextField(default='', editable=False)  # normalize_name(name), see SearchNameQuerySet
+
+    objects = SearchNameQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Hotel'
         verbose_name_plural = 'Hotels'
         indexes = [
+            # Hotels of a city ordered by (code, name): an index range scan
+            models.Index(fields=['city', 'code', 'name'], name='hotels_hotel_city_code_name'),
             models.Index(fields=['name']),
+            # Full-text search by name (see hotels.search). The trigram index of the substring search
+            # (hotels_hotel_search_name_trgm) is created by the migrations only if pg_trgm is available,
+            # so it is not part of the model state
+            GinIndex(SearchVector('search_name', config='simple'), name='hotels_hotel_search_name_fts'),
         ]
 
     def __str__(self):
         return self.name
 
-    # For tests (maybe it's better to remove)
+    # As for cities: the city is compared by city_id, comparing or hashing hotels never fetches their cities
     def __eq__(self, other):
         if not isinstance(other, Hotel):
-            return False
-        return self.id == other.id and self.code == other.code and self.name == other.name and self.city == other.city
+            return NotImplemented
+        return (
+            self.id == other.id and self.code == other.code and self.name == other.name and self.city_id == other.city_id
+        )
 
     def __hash__(self):
-        return hash((self.id, self.code, self.name, hash(self.city)))
+        return hash(self.id)
+
+    def same_values(self, other: 'Hotel') -> bool:
+        """
+        Structural comparison, whatever the primary keys: the same code, name and city (code and name)
+
+        Fetches the cities which are not loaded yet (use select_related('city') for many hotels).
+        """
+        return (self.code, self.name) == (other.code, other.name) and self.city.same_values(other.city)
+
+
+class FeedState(models.Model):
+    """HTTP validators and content hash of the last imported version of a feed"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    url = models.CharField(max_length=2048, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=255, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of the body
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Feed state'
+        verbose_name_plural = 'Feed states'
+
+    def __str__(self):
+        return self.url
+
+
+class ImportRun(models.Model):
+    """
+    History of the imports (hotels.jobs.fetch_hotel_data): phase timings, volumes and written rows
+
+    Runs stopped because the feeds are not modified are not recorded: they make no database writes.
+    """
+
+    class Status(models.TextChoices):
+        SUCCESS = 'success', 'Success'
+        FAILED = 'failed', 'Failed'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    started_at = models.DateTimeField()
+    duration = models.FloatField(default=0)  # seconds
+    status = models.CharField(max_length=20, choices=Status.choices)
+    loader = models.CharField(max_length=20, blank=True)
+    bytes_downloaded = models.BigIntegerField(default=0)
+    city_rows = models.IntegerField(default=0)  # Parsed rows of the feeds
+    hotel_rows = models.IntegerField(default=0)
+    cities_created = models.IntegerField(default=0)
+    cities_updated = models.IntegerField(default=0)
+    cities_deleted = models.IntegerField(default=0)
+    hotels_created = models.IntegerField(default=0)
+    hotels_updated = models.IntegerField(default=0)
+    hotels_deleted = models.IntegerField(default=0)
+    quarantined_rows = models.IntegerField(default=0)  # Rows rejected by the validation, see QuarantinedRow
+    timings = models.JSONField(default=dict, blank=True)  # Seconds by phase, see hotels.timing.PhaseTimer
+    error = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = 'Import run'
+        verbose_name_plural = 'Import runs'
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f'{self.started_at:%Y-%m-%d %H:%M:%S} ({self.get_status_display()})'
+
+    @property
+    def rows_per_second(self) -> float | None:
+        """Parse throughput of the feeds"""
+        parse_time = self.timings.get('parse')
+        return (self.city_rows + self.hotel_rows) / parse_time if parse_time else None
+
+
+class QuarantinedRow(models.Model):
+    """A feed row rejected by the validation of an import (hotels.validation), instead of failing the import"""
+
+    class Feed(models.TextChoices):
+        CITY = 'city', 'City'
+        HOTEL = 'hotel', 'Hotel'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    run = models.ForeignKey(to=ImportRun, on_delete=models.CASCADE, related_name='quarantine')
+    feed = models.CharField(max_length=10, choices=Feed.choices)
+    line = models.IntegerField()
+    reason = models.CharField(max_length=255)
+    content = models.TextField()
+
+    class Meta:
+        verbose_name = 'Quarantined row'
+        verbose_name_plural = 'Quarantined rows'
+        ordering = ['feed', 'line']
+
+    def __str__(self):
+        return f'{self.feed} feed, line {self.line}: {self.reason}'
@@ -0,0 +1,231 @@
+import base64
+import bisect
+import binascii
+import json
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.paginator import Page, Paginator
+from django.db.models import Q, QuerySet
+from django.http import HttpRequest
+
+
+class CursorPage(Sequence):
+    """Page of a CursorPaginator: only knows whether there are pages before and after it"""
+
+    def __init__(self, object_list: list, previous_cursor: str | None, next_cursor: str | None):
+        self.object_list = object_list
+        self.previous_cursor = previous_cursor
+        self.next_cursor = next_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_previous() or self.has_next()
+
+
+class CursorPaginator:
+    """
+    Keyset (cursor) pagination over the unique `ordering` (('code', 'name') by default)
+
+    Instead of "OFFSET n" a page is selected by "WHERE (code, name) > (<last code>, <last name>)",
+    so every page costs the same as the first one, and no COUNT is needed.
+    Cursors are opaque url-safe strings: the direction and the key of the first/last object of the current page.
+    `object_list` may also be a sequence sorted by the ordering (e.g. of the in-memory catalog).
+    """
+
+    def __init__(self, object_list: QuerySet | Sequence, per_page: int, ordering: tuple[str, ...] = ('code', 'name')):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.ordering = ordering
+
+    @staticmethod
+    def encode_cursor(direction: str, key: tuple) -> str:
+        return base64.urlsafe_b64encode(json.dumps([direction, *key]).encode()).decode().rstrip('=')
+
+    @staticmethod
+    def load_cursor(cursor: str) -> list | None:
+        """The JSON array of an encoded cursor, None for an invalid one"""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        except (binascii.Error, ValueError, TypeError):
+            return None
+        return values if isinstance(values, list) and values else None
+
+    def decode_cursor(self, cursor: str) -> tuple[str, tuple] | None:
+        """Returns (direction, key) or None for an invalid cursor (the values of the key are strings, as the ordering fields)"""
+        values = self.load_cursor(cursor)
+        if values is None:
+            return None
+        direction, *key = values
+        if direction not in ('next', 'previous') or len(key) != len(self.ordering):
+            return None
+        if not all(isinstance(value, str) for value in key):
+            return None
+        return direction, tuple(key)
+
+    def _compare(self, key: tuple, lookup: str) -> Q:
+        """
+        (f1, f2, ...) > key (lookup='gt'), expanded for the ORM: f1 > k1 OR (f1 = k1 AND f2 > k2) OR ...
+
+        The redundant "f1 >= k1" lets the planner use it as an index condition instead of filtering the OR row by row.
+        """
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            condition |= Q(**dict(zip(self.ordering[:i], key[:i])), **{f'{field}__{lookup}': key[i]})
+        return Q(**{f'{self.ordering[0]}__{lookup}e': key[0]}) & condition
+
+    def _key(self, obj) -> tuple:
+        return tuple(getattr(obj, field) for field in self.ordering)
+
+    def _page_queryset(self, decoded: tuple[str, tuple] | None) -> QuerySet:
+        """One object more than a page after (or before) the key: tells whether there is a page further"""
+        queryset = self.object_list.order_by(*self.ordering)
+        if decoded is None:
+            return queryset[:self.per_page + 1]
+        if decoded[0] == 'next':
+            return queryset.filter(self._compare(decoded[1], 'gt'))[:self.per_page + 1]
+        reverse = [f'-{field}' for field in self.ordering]
+        return queryset.filter(self._compare(decoded[1], 'lt')).order_by(*reverse)[:self.per_page + 1]
+
+    def _split_fetched(self, decoded: tuple[str, tuple] | None, objects: list) -> tuple[list, bool, bool]:
+        if decoded is None:
+            return objects[:self.per_page], False, len(objects) > self.per_page
+        if decoded[0] == 'next':
+            return objects[:self.per_page], True, len(objects) > self.per_page
+        return objects[:self.per_page][::-1], len(objects) > self.per_page, True
+
+    def _fetch_sequence(self, decoded: tuple[str, tuple] | None) -> tuple[list, bool, bool]:
+        """Page of a list already sorted by the ordering (by Python comparison): the key is found by a binary search"""
+        objects = self.object_list
+        if decoded is None:
+            return objects[:self.per_page], False, len(objects) > self.per_page
+        if decoded[0] == 'next':
+            start = bisect.bisect_right(objects, decoded[1], key=self._key)
+            return objects[start:start + self.per_page], True, len(objects) > start + self.per_page
+        end = bisect.bisect_left(objects, decoded[1], key=self._key)
+        start = max(end - self.per_page, 0)
+        return objects[start:end], start > 0, True
+
+    def _make_page(self, objects: list, has_previous: bool, has_next: bool) -> CursorPage:
+        return CursorPage(
+            object_list=objects,
+            previous_cursor=self.encode_cursor('previous', self._key(objects[0])) if has_previous else None,
+            next_cursor=self.encode_cursor('next', self._key(objects[-1])) if has_next else None,
+        )
+
+    def get_page(self, cursor: str | None) -> CursorPage:
+        """Returns the page the cursor points to; the first page for a missing or invalid cursor"""
+        decoded = self.decode_cursor(cursor) if cursor else None
+        if isinstance(self.object_list, QuerySet):
+            objects, has_previous, has_next = self._split_fetched(decoded, list(self._page_queryset(decoded)))
+        else:
+            objects, has_previous, has_next = self._fetch_sequence(decoded)
+
+        if decoded is not None and not objects:
+            # The data has changed since the cursor was issued
+            return self.get_page(None)
+        return self._make_page(objects, has_previous, has_next)
+
+    async def aget_page(self, cursor: str | None) -> CursorPage:
+        """Async version of get_page for querysets"""
+        decoded = self.decode_cursor(cursor) if cursor else None
+        fetched = [obj async for obj in self._page_queryset(decoded)]
+        objects, has_previous, has_next = self._split_fetched(decoded, fetched)
+
+        if decoded is not None and not objects:
+            return await self.aget_page(None)
+        return self._make_page(objects, has_previous, has_next)
+
+
+class OffsetCursorPaginator(CursorPaginator):
+    """
+    Cursor pagination by offset, for querysets ordered by something else than a unique key (e.g. by search rank)
+
+    The cursors are opaque as the ones of CursorPaginator, so the clients page both the same way,
+    but a page costs an OFFSET of the objects before it.
+    """
+
+    def decode_cursor(self, cursor: str) -> tuple[str, int] | None:
+        values = self.load_cursor(cursor)
+        if values is None or len(values) != 2 or values[0] != 'offset':
+            return None
+        offset = values[1]
+        if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+            return None
+        return 'offset', offset
+
+    def get_page(self, cursor: str | None) -> CursorPage:
+        decoded = self.decode_cursor(cursor) if cursor else None
+        offset = decoded[1] if decoded is not None else 0
+        objects = list(self.object_list[offset:offset + self.per_page + 1])
+        if offset and not objects:
+            return self.get_page(None)
+        return CursorPage(
+            object_list=objects[:self.per_page],
+            previous_cursor=self.encode_cursor('offset', (max(offset - self.per_page, 0),)) if offset else None,
+            next_cursor=self.encode_cursor('offset', (offset + self.per_page,)) if len(objects) > self.per_page else None,
+        )
+
+
+def cursor_paginator(queryset: QuerySet, per_page: int) -> CursorPaginator:
+    """
+    Cursor pagination of a queryset ordered by ('code', 'name') (keyset) or by something else (e.g. the rank
+    of the full-text search, by offset: CursorPaginator would re-order it)
+    """
+    if _keyset_ordered(queryset):
+        return CursorPaginator(object_list=queryset, per_page=per_page)
+    return OffsetCursorPaginator(object_list=queryset, per_page=per_page)
+
+
+def paginate(request: HttpRequest, queryset: QuerySet | Sequence) -> Page | CursorPage:
+    """
+    Paginates the ordered queryset (or a sequence sorted by ('code', 'name')) according to settings.PAGINATION_MODE
+
+    'offset': numbered pages (?page=), `page_strip` of the page is a window of page numbers around the current one.
+    'cursor': keyset pagination (?cursor=) for querysets ordered by ('code', 'name');
+    other orderings (ranked full-text search) are paginated by offset.
+    """
+    if _use_cursor(queryset):
+        paginator = CursorPaginator(object_list=queryset, per_page=settings.ITEMS_PER_PAGE)
+        return paginator.get_page(request.GET.get('cursor'))
+
+    paginator = Paginator(object_list=queryset, per_page=settings.ITEMS_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    page.page_strip = list(paginator.get_elided_page_range(page.number, on_each_side=2, on_ends=1))
+    return page
+
+
+async def apaginate(request: HttpRequest, queryset: QuerySet) -> Page | CursorPage:
+    """Async version of paginate for querysets: the count and the objects of the page are fetched by the async ORM"""
+    if _use_cursor(queryset):
+        paginator = CursorPaginator(object_list=queryset, per_page=settings.ITEMS_PER_PAGE)
+        return await paginator.aget_page(request.GET.get('cursor'))
+
+    paginator = Paginator(object_list=queryset, per_page=settings.ITEMS_PER_PAGE)
+    paginator.count = await queryset.acount()  # Otherwise the cached property would run a sync query
+    page = paginator.get_page(request.GET.get('page'))
+    page.object_list = [obj async for obj in page.object_list]
+    page.page_strip = list(paginator.get_elided_page_range(page.number, on_each_side=2, on_ends=1))
+    return page
+
+
+def _use_cursor(queryset: QuerySet | Sequence) -> bool:
+    return settings.PAGINATION_MODE == 'cursor' and (not isinstance(queryset, QuerySet) or _keyset_ordered(queryset))
+
+
+def _keyset_ordered(queryset: QuerySet) -> bool:
+    return tuple(queryset.query.order_by) == ('code', 'name')
@@ -0,0 +1,252 @@
+"""
+Parsing and row-level validation of the feeds (';'-delimited CSV or NDJSON), in parallel for big feeds
+
+The feed is split into line-aligned chunks which are parsed by a pool of processes. This module is imported
+by the worker processes, so it must not depend on Django (see hotels.validation for the feed-level checks).
+A record is expected on a single line: line numbers of the rejected rows are reported
+(a quoted CSV field spanning lines is rejected).
+"""
+import csv
+import gc
+import json
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import BinaryIO, Callable, Iterator, NamedTuple
+
+
+class Column(NamedTuple):
+    name: str
+    max_length: int
+    required: bool = False
+
+    @property
+    def key(self) -> str:
+        """Key of the column in NDJSON objects ('city code' -> 'city_code')"""
+        return self.name.replace(' ', '_')
+
+
+class RejectedRow(NamedTuple):
+    line: int
+    reason: str
+    content: str
+
+
+class ParsedChunk(NamedTuple):
+    lines: list[int]  # Line numbers of the valid rows
+    values: list[str]  # Values of the valid rows, flat: cheaper to send from a worker process than a list per row
+    rejected: list[RejectedRow]
+
+    def rows(self, width: int) -> Iterator[tuple[int, tuple[str, ...]]]:
+        """(line, values) of the valid rows of `width` columns"""
+        return zip(self.lines, zip(*[iter(self.values)] * width))
+
+
+def iter_chunks(file: BinaryIO, chunk_size: int) -> Iterator[tuple[bytes, int]]:
+    """
+    Yields (data, number of its first line) chunks of about `chunk_size` bytes, split at line ends
+
+    The file is read from its current position with read() only, so it may be a decompressing stream.
+    """
+    first_line = 1
+    tail = b''
+    while True:
+        data = file.read(chunk_size)
+        if not data:
+            break
+        end = data.rfind(b'\n') + 1
+        if not end:
+            tail += data
+            continue
+        data, tail = tail + data[:end], data[end:]
+        yield data, first_line
+        first_line += data.count(b'\n')
+    if tail:
+        yield tail, first_line
+
+
+def check_row(values: list[str], columns: tuple[Column, ...]) -> str | None:
+    """Returns the reason to reject the row or None"""
+    if len(values) != len(columns):
+        return f'expected {len(columns)} columns, got {len(values)}'
+    for value, column in zip(values, columns):
+        if column.required and not value:
+            return f'empty {column.name}'
+        if len(value) > column.max_length:
+            return f'{column.name} is longer than {column.max_length} characters'
+    return None
+
+
+def row_check(columns: tuple[Column, ...]) -> Callable[[list[str]], bool]:
+    """
+    Fast check of a row, specialized for the columns: whether check_row accepts it
+
+    It runs for every row, so the feeds of 2 and 3 columns get a check without Python-level loops.
+    """
+    bounds = [(1 if column.required else 0, column.max_length) for column in columns]
+    if len(columns) == 2:
+        (min0, max0), (min1, max1) = bounds
+        return lambda values: len(values) == 2 and min0 <= len(values[0]) <= max0 and min1 <= len(values[1]) <= max1
+    if len(columns) == 3:
+        (min0, max0), (min1, max1), (min2, max2) = bounds
+        return lambda values: (
+            len(values) == 3 and min0 <= len(values[0]) <= max0 and min1 <= len(values[1]) <= max1
+            and min2 <= len(values[2]) <= max2
+        )
+    return lambda values: check_row(values, columns) is None
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+    Pauses the cyclic garbage collector: parsing allocates a list per row, which triggers needless collections
+
+    (the rows hold strings only, they are freed by reference counting)
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def parse_chunk(
+    data: bytes, first_line: int, columns: tuple[Column, ...], format: str = 'csv', encoding: str = 'utf-8',
+) -> ParsedChunk:
+    """Parses (see PARSERS) and checks the rows of a chunk, blank lines are skipped"""
+    try:
+        lines = data.decode(encoding).split('\n')
+        rejected = []
+    except UnicodeDecodeError:
+        lines, rejected = [], []
+        for i, line in enumerate(data.split(b'\n')):
+            try:
+                lines.append(line.decode(encoding))
+            except UnicodeDecodeError:
+                lines.append('')
+                rejected.append(RejectedRow(first_line + i, f'invalid {encoding}', line.decode(encoding, 'replace')))
+    if lines[-1] == '':
+        lines.pop()  # After the last '\n'
+    if first_line == 1 and lines and lines[0].startswith('\ufeff'):
+        lines[0] = lines[0][1:]  # UTF-8 byte order mark
+
+    chunk = ParsedChunk([], [], rejected)
+    with gc_paused():
+        PARSERS[format](lines, first_line, columns, chunk)
+    rejected.sort()
+    return chunk
+
+
+def parse_csv(lines: list[str], first_line: int, columns: tuple[Column, ...], chunk: ParsedChunk, delimiter: str = ';'):
+    """
+    ';'-delimited CSV, a record per line
+
+    A row whose quoted field spans lines (e.g. an unbalanced quote, also on the last line) is rejected
+    with its first line, the parsing goes on from the next line.
+    """
+    is_valid = row_check(columns)  # check_row gives the reason of the rejection
+    start = 0
+    while start < len(lines):
+        start = _parse_csv_lines(lines, start, first_line, columns, chunk, delimiter, is_valid)
+
+
+def _parse_csv_lines(
+    lines: list[str], start: int, first_line: int, columns: tuple[Column, ...], chunk: ParsedChunk, delimiter: str,
+    is_valid: Callable[[list[str]], bool],
+) -> int:
+    """Parses lines[start:] up to a row spanning lines, returns the index of the line to go on from"""
+    # The empty line after the last one: a quoted field still open at the end of the chunk takes it in,
+    # so it is rejected as spanning lines, wherever the chunk boundary falls
+    reader = csv.reader(chain(islice(lines, start, None), ['']), delimiter=delimiter)
+    offset = first_line + start - 1  # Line number of a row = offset + reader.line_num
+    line_num = 0  # Of the reader, after the previous row
+    while True:
+        try:
+            for values in reader:
+                if reader.line_num - line_num > 1:
+                    content = lines[start + line_num]
+                    chunk.rejected.append(RejectedRow(offset + line_num + 1, 'quoted field spans lines', content))
+                    return start + line_num + 1
+                line_num = reader.line_num
+                if is_valid(values):
+                    chunk.lines.append(offset + line_num)
+                    chunk.values.extend(values)
+                elif values:
+                    content = lines[start + line_num - 1]
+                    chunk.rejected.append(RejectedRow(offset + line_num, check_row(values, columns), content))
+            return len(lines)
+        except csv.Error as error:
+            line_num = reader.line_num
+            content = lines[start + line_num - 1]
+            chunk.rejected.append(RejectedRow(offset + line_num, f'CSV error: {error}', content))
+
+
+def parse_ndjson(lines: list[str], first_line: int, columns: tuple[Column, ...], chunk: ParsedChunk):
+    """
+    JSON Lines: a record per line, either an object keyed by Column.key (other keys are ignored)
+    or an array of the values in the column order
+    """
+    is_valid = row_check(columns)
+    keys = [column.key for column in columns]
+    for line_number, line in enumerate(lines, start=first_line):
+        if not line or line.isspace():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            chunk.rejected.append(RejectedRow(line_number, f'JSON error: {error}', line))
+            continue
+        if isinstance(record, dict):
+            values = [record.get(key, '') for key in keys]
+        elif isinstance(record, list):
+            values = record
+        else:
+            chunk.rejected.append(RejectedRow(line_number, 'expected a JSON object or array', line))
+            continue
+
+        if not all(isinstance(value, str) for value in values):
+            chunk.rejected.append(RejectedRow(line_number, 'expected string values', line))
+        elif is_valid(values):
+            chunk.lines.append(line_number)
+            chunk.values.extend(values)
+        else:
+            chunk.rejected.append(RejectedRow(line_number, check_row(values, columns), line))
+
+
+# Parsers of the chunk lines by feed format: they append the valid rows and the rejected ones to the chunk
+PARSERS: dict[str, Callable[[list[str], int, tuple[Column, ...], ParsedChunk], None]] = {
+    'csv': parse_csv,
+    'ndjson': parse_ndjson,
+}
+
+
+def parse_file(
+    file: BinaryIO, columns: tuple[Column, ...], chunk_size: int, executor: Executor | None = None, workers: int = 1,
+    format: str = 'csv',
+) -> Iterator[ParsedChunk]:
+    """
+    Parses the file chunk by chunk in the executor (in this process without one), yields the chunks in the file order
+
+    At most two chunks per worker (of the executor) are in flight, so the memory use does not depend on the file size.
+    """
+    if executor is None:
+        for data, first_line in iter_chunks(file, chunk_size):
+            yield parse_chunk(data, first_line, columns, format)
+        return
+
+    in_flight = deque()
+    for data, first_line in iter_chunks(file, chunk_size):
+        in_flight.append(executor.submit(parse_chunk, data, first_line, columns, format))
+        if len(in_flight) >= 2 * workers:
+            yield in_flight.popleft().result()
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def parse_pool(workers: int) -> ProcessPoolExecutor:
+    """Worker processes are spawned: they do not inherit the database connections and threads of the parent"""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
@@ -0,0 +1,186 @@
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.backends.django import DjangoTemplates, Template
+
+PROCESSES_KEY = 'hotels:performance:processes'  # Counter of the processes, spreads the slots they claim
+SAMPLES_KEY = 'hotels:performance:samples:{slot}'
+MAX_PROCESSES = 1024  # Slots of the samples in the cache: one per process, freed when its samples expire
+
+# Upper bounds (ms) of the latency histogram buckets, the last bucket is unbounded
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+@dataclass
+class RequestMetrics:
+    """Metrics of the current request, collected by the query wrapper and the template backend"""
+    queries: int = 0
+    db_time: float = 0  # seconds
+    render_time: float = 0  # seconds
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar('hotels_request_metrics', default=None)
+
+
+def start_request() -> tuple[RequestMetrics, object]:
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token: object):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper (see connection.execute_wrapper) counting the queries and their time
+
+    It is installed on every database connection (see HotelsConfig.ready) and records into the metrics
+    of the current request only. The context is copied to the threads of the async ORM, so it works for async views.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created signal receiver"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class InstrumentedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context=context, request=request)
+        started = time.perf_counter()
+        try:
+            return super().render(context=context, request=request)
+        finally:
+            metrics.render_time += time.perf_counter() - started
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Django template backend measuring the render time of the (top-level) templates for RequestMetrics"""
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+class PerformanceStats:
+    """
+    Rolling samples of the latest requests of every url name (in this process)
+
+    A sample is (total ms, DB ms, render ms, queries, bytes). The samples are written to the cache every
+    settings.PERFORMANCE_FLUSH_INTERVAL seconds, so the `performance_stats` command can merge them for all processes.
+    Every process writes to its own key (a slot claimed with the atomic cache.incr and cache.add), so no write
+    is lost; the key expires after settings.PERFORMANCE_SAMPLES_TIMEOUT once the process has stopped.
+    """
+
+    def __init__(self):
+        self.samples: dict[str, deque] = {}
+        self.flushed_at = time.monotonic()
+        self.lock = threading.Lock()
+        self.slot: int | None = None
+        self.slot_pid: int | None = None
+
+    def add(self, url_name: str, sample: tuple) -> dict[str, list[tuple]] | None:
+        """Adds the sample, returns a snapshot of the samples when they are due to be flushed (see flush)"""
+        with self.lock:
+            if url_name not in self.samples:
+                self.samples[url_name] = deque(maxlen=settings.PERFORMANCE_SAMPLES)
+            self.samples[url_name].append(sample)
+            if time.monotonic() - self.flushed_at < settings.PERFORMANCE_FLUSH_INTERVAL:
+                return None
+            self.flushed_at = time.monotonic()
+            return {name: list(samples) for name, samples in self.samples.items()}
+
+    def flush(self, snapshot: dict[str, list[tuple]]):
+        """Writes the snapshot to the cache (blocking: async callers run it in a thread)"""
+        cache.set(SAMPLES_KEY.format(slot=self._claim_slot()), snapshot, timeout=settings.PERFORMANCE_SAMPLES_TIMEOUT)
+
+    def _claim_slot(self) -> int:
+        """Slot of this process, claimed by its first flush (again in a forked child): the next one without samples"""
+        with self.lock:
+            if self.slot is None or self.slot_pid != os.getpid():
+                cache.add(PROCESSES_KEY, 0, timeout=None)
+                try:
+                    start = cache.incr(PROCESSES_KEY)
+                except ValueError:  # The counter was evicted in the meantime
+                    start = 0
+                slots = [(start + i) % MAX_PROCESSES for i in range(MAX_PROCESSES)]
+                self.slot = next(
+                    (slot for slot in slots
+                     if cache.add(SAMPLES_KEY.format(slot=slot), {}, timeout=settings.PERFORMANCE_SAMPLES_TIMEOUT)),
+                    slots[0],  # All taken: shared with another process
+                )
+                self.slot_pid = os.getpid()
+            return self.slot
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+
+stats = PerformanceStats()
+
+
+def _samples_keys() -> list[str]:
+    """All the slots are read: the counter only hands them out (and may have been evicted)"""
+    return [SAMPLES_KEY.format(slot=slot) for slot in range(MAX_PROCESSES)]
+
+
+def get_performance_samples() -> dict[str, list[tuple]]:
+    """Samples of all the processes (flushed to the cache), by url name"""
+    snapshots = cache.get_many(_samples_keys())
+    merged: dict[str, list[tuple]] = {}
+    for snapshot in snapshots.values():
+        for url_name, samples in snapshot.items():
+            merged.setdefault(url_name, []).extend(samples)
+    return merged
+
+
+def reset_performance_samples():
+    cache.delete_many(_samples_keys())  # The processes keep their slots
+    stats.clear()
+
+
+def histogram(latencies: list[float]) -> list[int]:
+    """Counts of the latencies (ms) in BUCKETS (and above the last one)"""
+    counts = [0] * (len(BUCKETS) + 1)
+    for latency in latencies:
+        counts[next((i for i, bound in enumerate(BUCKETS) if latency <= bound), len(BUCKETS))] += 1
+    return counts
+
+
+def summarize(samples: list[tuple]) -> dict[str, float]:
+    total, db, render, queries, size = zip(*samples)
+    quantiles = statistics.quantiles(total, n=100, method='inclusive') if len(total) > 1 else list(total) * 99
+    return {
+        'requests': len(samples),
+        'p50': quantiles[49],
+        'p90': quantiles[89],
+        'p99': quantiles[98],
+        'db': statistics.mean(db),
+        'render': statistics.mean(render),
+        'queries': statistics.mean(queries),
+        'bytes': statistics.mean(size),
+    }
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .jobs import fetch_hotel_data
+from .sync import SyncStats
+
+logger = logging.getLogger(__name__)
+
+# Key of the PostgreSQL advisory lock held by the scheduler running the import
+IMPORT_LOCK_KEY = 0x686f74656c73  # "hotels"
+
+
+@contextmanager
+def advisory_lock(key: int) -> Iterator[bool]:
+    """
+    Tries to take the session-level PostgreSQL advisory lock `key`, yields whether it is taken
+
+    The lock is held by the database connection (of this thread), so it is released if the process dies.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_try_advisory_lock(%s)', [key])
+        locked = cursor.fetchone()[0]
+    try:
+        yield locked
+    finally:
+        if locked:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [key])
+
+
+def import_job() -> SyncStats | None:
+    """fetch_hotel_data with the feeds and credentials of the settings"""
+    return fetch_hotel_data(
+        city_url=settings.CITY_FETCH_URL,
+        hotel_url=settings.HOTEL_FETCH_URL,
+        username=settings.FETCH_USERNAME,
+        password=settings.FETCH_PASSWORD,
+    )
+
+
+class Scheduler:
+    """
+    Runs the import every `interval` seconds in a long-running process (see the `run_scheduler` command)
+
+    The runs are aligned to multiples of the interval since the epoch (every midnight UTC for a day), so the
+    schedulers of all the replicas start together and only the one taking the advisory lock runs the import;
+    the others skip the run. A run lasting longer than the interval skips the missed runs instead of queueing them.
+    A failed run is retried `retries` times, waiting `backoff`, 2 * `backoff`, 4 * `backoff`... seconds.
+    """
+
+    def __init__(
+        self,
+        job: Callable[[], SyncStats | None] = import_job,
+        interval: float | None = None,
+        retries: int | None = None,
+        backoff: float | None = None,
+    ):
+        self.job = job
+        self.interval = interval if interval is not None else settings.IMPORT_INTERVAL
+        self.retries = retries if retries is not None else settings.IMPORT_RETRIES
+        self.backoff = backoff if backoff is not None else settings.IMPORT_RETRY_BACKOFF
+        self.stopped = threading.Event()
+
+    def next_run(self, now: float) -> float:
+        return (now // self.interval + 1) * self.interval
+
+    def run_forever(self, run_now: bool = False):
+        """
+        Runs the import on schedule until stopped
+
+        An error of a run (e.g. the database is unreachable) is logged and the run is attempted again after
+        `backoff`, 2 * `backoff`, 4 * `backoff`... seconds (but not later than the next scheduled run).
+        """
+        logger.info('Import scheduler started (every %s s)', self.interval)
+        failures = 0
+        next_run = time.time() if run_now else self.next_run(time.time())
+        while not self.stopped.wait(max(next_run - time.time(), 0)):
+            close_old_connections()  # The connection may have been closed by the server since the last run
+            try:
+                self.run_once()
+            except Exception:
+                failures += 1
+                delay = self.backoff * 2 ** min(failures - 1, 10)
+                logger.exception('Import scheduler: the run failed, next attempt in %s s', delay)
+                next_run = min(time.time() + delay, self.next_run(time.time()))
+            else:
+                failures = 0
+                next_run = self.next_run(time.time())
+        logger.info('Import scheduler stopped')
+
+    def run_once(self) -> SyncStats | None:
+        """Runs the import (with retries) unless another scheduler is running it, returns its statistics"""
+        with advisory_lock(IMPORT_LOCK_KEY) as locked:
+            if not locked:
+                logger.info('Import scheduler: the import is running in another process, skipped')
+                return None
+            for attempt in range(self.retries + 1):
+                stats = self.job()
+                if stats is not None or attempt == self.retries:
+                    break
+                delay = self.backoff * 2 ** attempt
+                logger.warning('Import scheduler: the import failed, retry %s of %s in %s s', attempt + 1, self.retries, delay)
+                if self.stopped.wait(delay):
+                    break
+        if stats is None:
+            logger.error('Import scheduler: the import failed')
+        return stats
+
+    def stop(self, *args):
+        self.stopped.set()
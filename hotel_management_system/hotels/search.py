@@ -0,0 +1,54 @@
+import re
+import unicodedata
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import QuerySet
+
+# The expression of the full-text GIN indexes of City and Hotel (it has to match to be used by the planner)
+NAME_SEARCH_VECTOR = SearchVector('search_name', config='simple')
+
+
+def normalize_name(name: str) -> str:
+    """
+    Search form of a name, stored in City.search_name and Hotel.search_name: lowercase, without accents ('Köln' -> 'koln')
+
+    Searches are normalized the same way, so they are case and accent-insensitive without a function applied
+    to every row.
+    """
+    if name.isascii():
+        return name.lower()
+    return ''.join(char for char in unicodedata.normalize('NFKD', name) if not unicodedata.combining(char)).lower()
+
+
+def prefix_tsquery(search: str) -> str:
+    """
+    Raw tsquery matching names having all the words of `search` as word prefixes ('ams air' -> 'ams:* & air:*')
+
+    Only word characters are kept, so the user input can't inject the tsquery syntax.
+    """
+    return ' & '.join(f'{word}:*' for word in re.findall(r'\w+', normalize_name(search)))
+
+
+def search_by_name(queryset: QuerySet, search: str) -> QuerySet:
+    """
+    Filters the queryset (of City or Hotel) by name according to settings.SEARCH_BACKEND
+
+    Both are case and accent-insensitive, they search the normalized search_name column (see normalize_name).
+    'contains': substring search (search_name__contains), supported by the trigram GIN indexes
+    on PostgreSQL (search_name gin_trgm_ops).
+    'fulltext': word-prefix full-text search ranked by relevance (the initial ordering of the queryset breaks ties),
+    supported by the full-text GIN indexes. PostgreSQL only, other databases fall back to 'contains'.
+    """
+    if settings.SEARCH_BACKEND == 'fulltext' and connection.vendor == 'postgresql':
+        tsquery = prefix_tsquery(search)
+        if tsquery:
+            query = SearchQuery(tsquery, search_type='raw', config='simple')
+            return (
+                queryset
+                .annotate(search_vector=NAME_SEARCH_VECTOR, rank=SearchRank(NAME_SEARCH_VECTOR, query))
+                .filter(search_vector=query)
+                .order_by('-rank', *queryset.query.order_by)
+            )
+    return queryset.filter(search_name__contains=normalize_name(search))
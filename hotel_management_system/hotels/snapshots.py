@@ -0,0 +1,182 @@
+"""
+Snapshots of the catalog: the cities and hotels with their primary keys, as a compact stream
+
+Snapshots copy a catalog between environments (see the dump_catalog and restore_catalog commands)
+without the cost of JSON fixtures, which loaddata deserializes as a whole and saves object by object.
+A snapshot is NDJSON, gzip or zstd compressed if the file name ends with .gz or .zst (compression is
+detected by the magic number on restore): a header, then the cities and then the hotels.
+
+    {"snapshot": "hotels.catalog", "version": 1, "created": "2024-05-01T00:00:00+00:00", "cities": 2, "hotels": 1}
+    ["c", "27694fa6-55a3-47c6-8971-9ffb48041d17", "AMS", "Amsterdam"]
+    ["c", "9d760e38-e0d7-4cf6-bb8e-1f19fbbf36a9", "ANT", "Antwerpen"]
+    ["h", "0058ddd0-bf20-4381-afcb-c38fe6dd6bf9", "27694fa6-55a3-47c6-8971-9ffb48041d17", "AMS01", "Ibis"]
+
+Denormalized columns (search names, hotel counts) are not stored, the restore computes them.
+Both directions stream the rows: the memory use does not depend on the size of the catalog.
+"""
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+from itertools import chain
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+import zstandard
+from django.db import connection, transaction
+
+from .cache import bump_data_generation
+from .feeds import decompressed
+from .loaders import replace_catalog
+from .models import City, Hotel
+from .sync import SyncStats
+
+SNAPSHOT = 'hotels.catalog'
+VERSION = 1
+RECORD_LENGTHS = {'c': 4, 'h': 5}  # ["c", id, code, name] and ["h", id, city id, code, name]
+
+
+def open_snapshot(path: Path, mode: str = 'rb') -> BinaryIO:
+    """Opens a snapshot file, written ones are compressed according to the file extension"""
+    if mode == 'rb':
+        return open(path, 'rb')
+    if path.suffix == '.gz':
+        return gzip.open(path, 'wb', compresslevel=6)
+    if path.suffix == '.zst':
+        return zstandard.open(path, 'wb')
+    return open(path, 'wb')
+
+
+def dump_catalog(file: BinaryIO, chunk_size: int = 10_000) -> tuple[int, int]:
+    """
+    Writes a snapshot of the catalog to the file, returns the numbers of cities and hotels
+
+    The rows are read with server-side cursors by chunks of `chunk_size`, in a repeatable read transaction
+    on PostgreSQL, so that an import running meanwhile does not make the cities and hotels inconsistent.
+    """
+    repeatable_read = connection.vendor == 'postgresql' and not connection.in_atomic_block
+    text = io.TextIOWrapper(file, encoding='utf-8', newline='\n', write_through=True)
+    try:
+        with transaction.atomic():
+            if repeatable_read:
+                with connection.cursor() as cursor:
+                    cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            header = {
+                'snapshot': SNAPSHOT,
+                'version': VERSION,
+                'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                'cities': City.objects.count(),
+                'hotels': Hotel.objects.count(),
+            }
+            text.write(json.dumps(header) + '\n')
+            cities = City.objects.order_by('code').values_list('id', 'code', 'name').iterator(chunk_size=chunk_size)
+            _write_records(text, (('c', str(id), code, name) for id, code, name in cities), chunk_size)
+            hotels = Hotel.objects.order_by('code').values_list('id', 'city_id', 'code', 'name').iterator(chunk_size=chunk_size)
+            _write_records(text, (('h', str(id), str(city_id), code, name) for id, city_id, code, name in hotels), chunk_size)
+    finally:
+        text.detach()  # The caller closes the file
+    return header['cities'], header['hotels']
+
+
+def restore_catalog(file: BinaryIO, batch_size: int | None = None) -> SyncStats:
+    """
+    Replaces the catalog by the snapshot in the file (see hotels.loaders.replace_catalog), in a transaction
+
+    Raises ValueError if the file is not a snapshot, if it is truncated or if a record is malformed, and
+    django.db errors if the database rejects the records (nothing is changed then).
+    """
+    lines = io.TextIOWrapper(decompressed(file), encoding='utf-8', newline='\n')
+    header = _read_header(lines.readline())
+    reader = _SnapshotReader(lines)
+    try:
+        with transaction.atomic():
+            stats = replace_catalog(cities=reader.cities(), hotels=reader.hotels(), batch_size=batch_size)
+            connection.check_constraints()  # Hotels of unknown cities fail here, not at the commit of an outer transaction
+            if (stats.cities_created, stats.hotels_created) != (header['cities'], header['hotels']):
+                raise ValueError(
+                    f'The snapshot is incomplete: {stats.cities_created} of {header["cities"]} cities '
+                    f'and {stats.hotels_created} of {header["hotels"]} hotels are read'
+                )
+    except Exception as error:
+        if reader.error is not None and reader.error is not error:
+            raise reader.error from error  # COPY reports the errors of the rows as database errors
+        raise
+    bump_data_generation()
+    return stats
+
+
+def _write_records(text: io.TextIOWrapper, records: Iterator[tuple], chunk_size: int):
+    lines = []
+    for record in records:
+        lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+        if len(lines) == chunk_size:
+            text.write('\n'.join(lines) + '\n')
+            lines = []
+    if lines:
+        text.write('\n'.join(lines) + '\n')
+
+
+def _read_header(line: str) -> dict:
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get('snapshot') != SNAPSHOT:
+        raise ValueError('Not a catalog snapshot')
+    if header.get('version') != VERSION:
+        raise ValueError(f'Unsupported snapshot version {header.get("version")}, expected {VERSION}')
+    if not all(isinstance(header.get(key), int) for key in ('cities', 'hotels')):
+        raise ValueError('The snapshot header has no numbers of cities and hotels')
+    return header
+
+
+def _read_record(line: str, number: int) -> list[str]:
+    """A city or hotel record: an array of strings of RECORD_LENGTHS (ids are checked by the database)"""
+    try:
+        record = json.loads(line)
+    except ValueError as error:
+        raise ValueError(f'Invalid snapshot record on line {number}: {error}')
+    if not (
+        isinstance(record, list) and record and all(isinstance(value, str) for value in record)
+        and len(record) == RECORD_LENGTHS.get(record[0])
+    ):
+        raise ValueError(f'Invalid snapshot record on line {number}: {line.strip()[:200]}')
+    return record
+
+
+class _SnapshotReader:
+    """Cities and then hotels of a snapshot, read in one pass: the hotels are read once the cities are consumed"""
+
+    def __init__(self, lines: Iterator[str]):
+        self._records = (_read_record(line, number) for number, line in enumerate(lines, start=2) if not line.isspace())
+        self._first_hotel = None
+        self.error: Exception | None = None  # Error of reading the rows
+
+    def cities(self) -> Iterator[tuple[str, str, str]]:
+        return self._tracked(self._cities())
+
+    def hotels(self) -> Iterator[tuple[str, str, str, str]]:
+        return self._tracked(self._hotels())
+
+    def _tracked(self, rows: Iterator[tuple]) -> Iterator[tuple]:
+        try:
+            yield from rows
+        except Exception as error:
+            self.error = error
+            raise
+
+    def _cities(self) -> Iterator[tuple[str, str, str]]:
+        for record in self._records:
+            if record[0] != 'c':
+                self._first_hotel = record
+                return
+            _, id, code, name = record
+            yield id, code, name
+
+    def _hotels(self) -> Iterator[tuple[str, str, str, str]]:
+        records = chain([self._first_hotel], self._records) if self._first_hotel is not None else self._records
+        for record in records:
+            if record[0] != 'h':
+                raise ValueError(f'Unexpected snapshot record {record!r}, cities have to go before hotels')
+            _, id, city_id, code, name = record
+            yield id, city_id, code, name
@@ -0,0 +1,153 @@
+import uuid
+from dataclasses import dataclass, fields
+from typing import Iterable, Iterator, NamedTuple
+
+from django.conf import settings
+
+from .models import City, Hotel
+from .timing import phase
+
+
+class CityRow(NamedTuple):
+    code: str
+    name: str
+
+
+class HotelRow(NamedTuple):
+    city_code: str
+    code: str
+    name: str
+
+
+@dataclass
+class SyncStats:
+    cities_created: int = 0
+    cities_updated: int = 0
+    cities_deleted: int = 0
+    hotels_created: int = 0
+    hotels_updated: int = 0
+    hotels_deleted: int = 0
+
+    @property
+    def writes(self) -> int:
+        """Total number of written (created, updated or deleted) rows"""
+        return sum(getattr(self, field.name) for field in fields(self))
+
+    def __str__(self):
+        return (
+            f'cities: {self.cities_created} created, {self.cities_updated} updated, {self.cities_deleted} deleted; '
+            f'hotels: {self.hotels_created} created, {self.hotels_updated} updated, {self.hotels_deleted} deleted'
+        )
+
+
+def _batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def sync_catalog(city_rows: Iterable[CityRow], hotel_rows: Iterable[HotelRow], batch_size: int | None = None) -> SyncStats:
+    """
+    Applies the difference between the feed rows and the database (keyed by City.code and Hotel.code)
+
+    Unchanged rows are not touched, so existing primary keys survive the import
+    and a run without changes issues read queries only.
+    The city feed is small and is diffed as a whole, while hotel rows are consumed lazily in batches:
+    only the set of seen hotel codes (needed to find stale hotels) grows with the feed size.
+    Hotels referring to a city which is absent from the city feed are skipped, the last row of a duplicate code wins
+    (the import job passes no duplicates: hotels.validation keeps the first row of a code and quarantines the others).
+    Search names are filled by the bulk writes (see hotels.models.SearchNameQuerySet) and hotel counts
+    of the cities are refreshed at the end.
+    Has to be called inside a transaction.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    stats = SyncStats()
+
+    city_ids, stale_city_ids = _sync_cities(city_rows=city_rows, stats=stats, batch_size=batch_size)
+
+    seen_hotel_codes: set[str] = set()
+    for batch in _batches(hotel_rows, batch_size):
+        _sync_hotel_batch(batch=batch, city_ids=city_ids, seen_codes=seen_hotel_codes, stats=stats)
+
+    # Stale hotels go first: stale cities may only be deleted once their hotels are moved or deleted
+    with phase('prepare'):
+        stale_hotel_ids = [
+            pk for pk, code in Hotel.objects.values_list('id', 'code').iterator(chunk_size=batch_size)
+            if code not in seen_hotel_codes
+        ]
+    with phase('delete'):
+        for batch in _batches(stale_hotel_ids, batch_size):
+            stats.hotels_deleted += Hotel.objects.filter(id__in=batch).delete()[0]
+
+        for batch in _batches(stale_city_ids, batch_size):
+            City.objects.filter(id__in=batch).delete()
+        stats.cities_deleted = len(stale_city_ids)
+
+    if stats.hotels_created or stats.hotels_updated or stats.hotels_deleted:
+        with phase('update'):
+            City.objects.refresh_hotel_counts()
+
+    return stats
+
+
+def _sync_cities(city_rows: Iterable[CityRow], stats: SyncStats, batch_size: int) -> tuple[dict[str, uuid.UUID], list]:
+    """Creates and updates cities, returns {code: id} of the feed cities and ids of the stale ones"""
+
+    with phase('prepare'):
+        # {'AMS': 'Amsterdam', 'ANT': 'Antwerpen', ... }
+        city_feed: dict[str, str] = {row.code: row.name for row in city_rows}
+
+        existing = {code: (pk, name) for pk, code, name in City.objects.values_list('id', 'code', 'name')}
+        city_ids = {code: pk for code, (pk, _) in existing.items() if code in city_feed}
+
+        to_create: list[City] = []
+        to_update: list[City] = []
+        for code, name in city_feed.items():
+            if code not in existing:
+                city = City(code=code, name=name)
+                city_ids[code] = city.id
+                to_create.append(city)
+            elif existing[code][1] != name:
+                to_update.append(City(id=existing[code][0], code=code, name=name))
+
+    with phase('insert'):
+        City.objects.bulk_create(to_create, batch_size=batch_size)
+    with phase('update'):
+        City.objects.bulk_update(to_update, fields=['name'], batch_size=batch_size)
+    stats.cities_created = len(to_create)
+    stats.cities_updated = len(to_update)
+
+    stale_ids = [pk for code, (pk, _) in existing.items() if code not in city_feed]
+    return city_ids, stale_ids
+
+
+def _sync_hotel_batch(batch: list[HotelRow], city_ids: dict[str, uuid.UUID], seen_codes: set[str], stats: SyncStats):
+    with phase('prepare'):
+        # {'AMS01': ('Ibis', <id of AMS>), 'AMS02': ('Novotel', <id of AMS>), ... }
+        feed = {row.code: (row.name, city_ids[row.city_code]) for row in batch if row.city_code in city_ids}
+
+        existing = {
+            code: (pk, name, city_id)
+            for pk, code, name, city_id in Hotel.objects.filter(code__in=feed).values_list('id', 'code', 'name', 'city_id')
+        }
+
+        to_create: list[Hotel] = []
+        to_update: list[Hotel] = []
+        for code, (name, city_id) in feed.items():
+            if code not in existing:
+                to_create.append(Hotel(code=code, name=name, city_id=city_id))
+            elif existing[code][1:] != (name, city_id):
+                to_update.append(Hotel(id=existing[code][0], code=code, name=name, city_id=city_id))
+
+    with phase('insert'):
+        Hotel.objects.bulk_create(to_create)
+    with phase('update'):
+        Hotel.objects.bulk_update(to_update, fields=['name', 'city'])
+    stats.hotels_created += len(to_create)
+    stats.hotels_updated += len(to_update)
+    seen_codes.update(feed)
@@ -0,0 +1,108 @@
+"""
+Synthetic city and hotel catalogs for benchmarks and development databases (see the generate_data command)
+
+The rows look like the feeds of the provider: cities have 3-letter codes ('AMS') and names, some with accents,
+hotels have the code of their city and a number ('AMS01') and names like 'Ibis Amsterdam Centrum' or 'Adagio'.
+Hotels are spread over the cities with a Zipf-like distribution: a few big cities have most of the hotels.
+The same arguments (and seed) always give the same rows, so datasets of different runs are comparable.
+"""
+import random
+import string
+from itertools import product
+from typing import Iterable, Iterator
+
+MAX_CITIES = 26 ** 3  # Distinct 3-letter city codes
+
+_SIZE_SUFFIXES = {'k': 10 ** 3, 'm': 10 ** 6}
+
+_SYLLABLES = ['am', 'ber', 'lin', 'ro', 'ma', 'sto', 'ck', 'hol', 'ant', 'wer', 'pen', 'ba', 'zel', 'ri', 'o', 'na',
+              'dam', 'burg', 'vi', 'en', 'mü', 'chen', 'zü', 'ri', 'gö', 'te', 'bor', 'mál', 'la', 'gá', 'sé', 'vil']
+_CITY_SUFFIXES = ['', '', '', '', '', '', ' am See', ' del Mar', '-sur-Mer', ' City']
+_CHAINS = ['Ibis', 'Hilton', 'NH', 'Novotel', 'Mercure', 'Holiday Inn', 'Best Western', 'Radisson', 'Marriott',
+           'Hampton', 'Crowne Plaza', 'Ibis Budget', 'Hôtel Campanile']
+_DISTRICTS = ['Centrum', 'Centraal', 'Airport', 'City Centre', 'Old Town', 'Station', 'Nord', 'Süd', 'Zuid', 'Expo']
+_HOTEL_WORDS = ['Hotel', 'Inn', 'Suites', 'Resort', 'Palace', 'Lodge', 'Hostel', 'Residence', 'Apartments', 'B&B']
+
+
+def parse_size(value: str) -> int:
+    """'1000', '100k', '1M', '10m' -> the number"""
+    value = value.strip().lower().replace('_', '')
+    multiplier = _SIZE_SUFFIXES.get(value[-1:], 1)
+    number = value[:-1] if multiplier > 1 else value
+    if not number.isdigit():
+        raise ValueError(f'invalid size {value!r}, expected a number like 1000, 100k or 1M')
+    return int(number) * multiplier
+
+
+def format_size(number: int) -> str:
+    """1000 -> '1k', 1000000 -> '1M', 1500 -> '1500'"""
+    for suffix, multiplier in (('M', 10 ** 6), ('k', 10 ** 3)):
+        if number >= multiplier and number % multiplier == 0:
+            return f'{number // multiplier}{suffix}'
+    return str(number)
+
+
+def default_city_count(hotels: int) -> int:
+    """About 100 hotels per city (the skew makes the big cities much bigger), within the 3-letter codes"""
+    return max(1, min(MAX_CITIES, hotels // 100))
+
+
+def city_rows(cities: int, seed: int = 0) -> Iterator[tuple[str, str]]:
+    """Yields (code, name) rows: random distinct 3-letter codes, in the order of their rank (the biggest city first)"""
+    if not 0 < cities <= MAX_CITIES:
+        raise ValueError(f'the number of cities must be between 1 and {MAX_CITIES}')
+    rnd = random.Random(seed)
+    codes = [''.join(letters) for letters in product(string.ascii_uppercase, repeat=3)]
+    for code in rnd.sample(codes, cities):
+        yield code, f'{_word(rnd)}{rnd.choice(_CITY_SUFFIXES)}'
+
+
+def hotel_rows(hotels: int, cities: int, seed: int = 0) -> Iterator[tuple[str, str, str]]:
+    """
+    Yields (city code, code, name) rows of hotels spread over city_rows(cities, seed)
+
+    A city of rank r gets a share of the hotels proportional to 1 / r. Hotel codes are unique: the city code
+    and the number of the hotel in its city (at least two digits, as in 'AMS01').
+    """
+    rnd = random.Random(seed + 1)
+    cities_by_rank = list(city_rows(cities, seed))
+    cum_weights = []
+    total = 0.0
+    for rank in range(1, cities + 1):
+        total += 1 / rank
+        cum_weights.append(total)
+
+    numbers = [0] * cities
+    block = 100_000  # Cities are drawn by blocks: random.choices of all the hotels at once would need a list of them
+    for start in range(0, hotels, block):
+        for index in rnd.choices(range(cities), cum_weights=cum_weights, k=min(block, hotels - start)):
+            city_code, city_name = cities_by_rank[index]
+            numbers[index] += 1
+            yield city_code, f'{city_code}{numbers[index]:02d}', _hotel_name(rnd, city_name)
+
+
+def feed_chunks(rows: Iterable[tuple[str, ...]], rows_per_chunk: int = 10_000) -> Iterator[bytes]:
+    """Encodes rows as the ';'-delimited quoted CSV of the feeds (the names never contain quotes)"""
+    lines = []
+    for row in rows:
+        lines.append(';'.join(f'"{value}"' for value in row))
+        if len(lines) == rows_per_chunk:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = []
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _word(rnd: random.Random) -> str:
+    return ''.join(rnd.choice(_SYLLABLES) for _ in range(rnd.randint(2, 4))).capitalize()
+
+
+def _hotel_name(rnd: random.Random, city_name: str) -> str:
+    kind = rnd.random()
+    if kind < 0.3:  # Chain hotels: 'Ibis Amsterdam Centrum'
+        name = f'{rnd.choice(_CHAINS)} {city_name}'
+        return f'{name} {rnd.choice(_DISTRICTS)}' if rnd.random() < 0.5 else name
+    if kind < 0.8:  # 'Hotel Berlin', 'Rozel Inn'
+        word = rnd.choice(_HOTEL_WORDS)
+        return f'{word} {_word(rnd)}' if word == 'Hotel' else f'{_word(rnd)} {word}'
+    return _word(rnd)  # 'Adagio'
@@ -0,0 +1,7 @@
+# The tests clear the cache: they must not use the file cache of the application (settings.CACHE_LOCATION)
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hotels-tests',
+    }
+}
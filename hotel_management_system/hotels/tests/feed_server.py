@@ -0,0 +1,62 @@
+import base64
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FeedServer:
+    """
+    Local HTTP stand-in for the feed provider
+
+    Serves `feeds` ({'/city.csv': b'...'}) with ETag and Last-Modified headers (unless `validators` is False),
+    answers conditional requests with 304 and records the headers of every request in `requests`.
+    """
+
+    last_modified = 'Wed, 26 Jun 2024 16:29:00 GMT'
+
+    def __init__(self, feeds: dict[str, bytes], validators: bool = True):
+        self.feeds = feeds
+        self.validators = validators
+        self.requests: list[tuple[str, dict[str, str]]] = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                if self.path not in server.feeds:
+                    self.send_error(404)
+                    return
+                body = server.feeds[self.path]
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if server.validators and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                if server.validators:
+                    self.send_header('ETag', etag)
+                    self.send_header('Last-Modified', server.last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+
+    def url(self, path: str) -> str:
+        return f'http://127.0.0.1:{self._server.server_port}{path}'
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def basic_auth_header(username: str, password: str) -> str:
+    return 'Basic ' + base64.b64encode(f'{username}:{password}'.encode()).decode()
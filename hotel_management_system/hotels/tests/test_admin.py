@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from hotels.admin import EstimatedCountPaginator
+from hotels.models import City, Hotel
+from hotels.tests import LOCMEM_CACHES
+
+
+class AdminTestMixin:
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_superuser(username='admin', password='password')
+        self.client = Client()
+        self.client.force_login(user)
+        self.amsterdam = City.objects.create(code='AMS', name='Amsterdam')
+        self.antwerpen = City.objects.create(code='ANT', name='Antwerpen')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AdminHotelCountTest(AdminTestMixin, TestCase):
+
+    def hotel_counts(self) -> dict[str, int]:
+        return dict(City.objects.values_list('code', 'hotel_count'))
+
+    def test_hotel_changes_refresh_counts(self):
+        self.client.post(reverse('admin:hotels_hotel_add'), {'code': 'AMS01', 'name': 'Ibis', 'city': self.amsterdam.pk})
+        self.assertEqual(self.hotel_counts(), {'AMS': 1, 'ANT': 0})
+
+        hotel = Hotel.objects.get(code='AMS01')
+        url = reverse('admin:hotels_hotel_change', args=[hotel.pk])
+        self.client.post(url, {'code': 'AMS01', 'name': 'Ibis', 'city': self.antwerpen.pk})
+        self.assertEqual(self.hotel_counts(), {'AMS': 0, 'ANT': 1})
+
+        self.client.post(reverse('admin:hotels_hotel_changelist'), {
+            'action': 'delete_selected', '_selected_action': [hotel.pk], 'post': 'yes',
+        })
+        self.assertFalse(Hotel.objects.exists())
+        self.assertEqual(self.hotel_counts(), {'AMS': 0, 'ANT': 0})
+
+    def test_filter_by_hotel_count(self):
+        Hotel.objects.create(code='AMS01', name='Ibis', city=self.amsterdam)
+        City.objects.refresh_hotel_counts()
+        response = self.client.get(reverse('admin:hotels_city_changelist'), {'hotels': '1-10'})
+        self.assertEqual([city.code for city in response.context['cl'].result_list], ['AMS'])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CatalogAdminTest(AdminTestMixin, TestCase):
+
+    def changelist_codes(self, model_name: str, params: dict) -> list[str]:
+        response = self.client.get(reverse(f'admin:hotels_{model_name}_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return [obj.code for obj in response.context['cl'].result_list]
+
+    def test_hotel_list_queries_do_not_depend_on_rows(self):
+        def queries() -> int:
+            with CaptureQueriesContext(connection) as context:
+                self.client.get(reverse('admin:hotels_hotel_changelist'))
+            return len(context)
+
+        Hotel.objects.create(code='AMS01', name='Ibis', city=self.amsterdam)
+        one = queries()
+        Hotel.objects.bulk_create([Hotel(code=f'ANT{i:02d}', name='Eden', city=self.antwerpen) for i in range(20)])
+        self.assertEqual(queries(), one)
+
+    def test_search_by_code_prefix_and_name(self):
+        Hotel.objects.bulk_create([
+            Hotel(code='AMS01', name='Ibis', city=self.amsterdam),
+            Hotel(code='ANT01', name='Hôtel Eden', city=self.antwerpen),
+            Hotel(code='BAR01', name='Amsterdam Inn', city=self.amsterdam),
+        ])
+        self.assertEqual(self.changelist_codes('hotel', {'q': 'ams'}), ['AMS01', 'BAR01'])
+        self.assertEqual(self.changelist_codes('hotel', {'q': 'hotel eden'}), ['ANT01'])
+        self.assertEqual(self.changelist_codes('hotel', {'q': 'S01'}), [])  # Not a prefix of a code
+        self.assertEqual(self.changelist_codes('city', {'q': 'an'}), ['ANT'])
+
+    def test_city_hotels_are_linked_not_inlined(self):
+        Hotel.objects.create(code='AMS01', name='Ibis', city=self.amsterdam)
+        City.objects.refresh_hotel_counts()
+        response = self.client.get(reverse('admin:hotels_city_change', args=[self.amsterdam.pk]))
+        self.assertNotContains(response, 'hotels-TOTAL_FORMS')
+        self.assertContains(response, f'{reverse("admin:hotels_hotel_changelist")}?city={self.amsterdam.pk}')
+        self.assertEqual(self.changelist_codes('hotel', {'city': self.amsterdam.pk}), ['AMS01'])
+
+    def test_city_autocomplete(self):
+        response = self.client.get(reverse('admin:hotels_hotel_add'))
+        self.assertContains(response, 'admin-autocomplete')
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'hotels', 'model_name': 'hotel', 'field_name': 'city', 'term': 'amst',
+        })
+        self.assertEqual([result['text'] for result in response.json()['results']], ['Amsterdam'])
+
+
+class EstimatedCountPaginatorTest(TestCase):
+
+    def test_unfiltered_count_is_estimated(self):
+        city = City.objects.create(code='AMS', name='Amsterdam')
+        Hotel.objects.bulk_create([Hotel(code=f'AMS0{i}', name='Ibis', city=city) for i in range(3)])
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Hotel._meta.db_table}')
+        Hotel.objects.create(code='AMS09', name='Hilton', city=city)  # Not in the estimate yet
+
+        with override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=1):
+            self.assertEqual(EstimatedCountPaginator(Hotel.objects.all(), per_page=10).count, 3)
+            self.assertEqual(EstimatedCountPaginator(Hotel.objects.filter(city=city), per_page=10).count, 4)
+        self.assertEqual(EstimatedCountPaginator(Hotel.objects.all(), per_page=10).count, 4)
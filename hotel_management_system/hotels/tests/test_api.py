@@ -0,0 +1,89 @@
+import json
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.shortcuts import reverse
+from django.test import Client, TestCase, override_settings
+
+from hotels.cache import bump_data_generation
+from hotels.models import City, Hotel
+from hotels.tests import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES, API_PAGE_SIZE=2, API_EXPORT_CHUNK_SIZE=2)
+class ApiTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(code='AMS', name='Amsterdam')
+        City.objects.create(code='ANT', name='Antwerpen')
+        City.objects.create(code='BER', name='Berlin')
+        Hotel.objects.bulk_create([
+            Hotel(city=cls.city, code=f'AMS0{i}', name=name)
+            for i, name in enumerate(['Ibis', 'Hilton', 'Ibis Budget'], start=1)
+        ])
+        City.objects.refresh_hotel_counts()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_cities_pages(self):
+        first = self.client.get(reverse('api-cities')).json()
+        self.assertEqual(first['results'], [
+            {'code': 'AMS', 'name': 'Amsterdam', 'hotel_count': 3}, {'code': 'ANT', 'name': 'Antwerpen', 'hotel_count': 0},
+        ])
+        self.assertIsNone(first['previous'])
+
+        second = self.client.get(reverse('api-cities'), {'cursor': first['next']}).json()
+        self.assertEqual(second['results'], [{'code': 'BER', 'name': 'Berlin', 'hotel_count': 0}])
+        self.assertIsNone(second['next'])
+        self.assertIsNotNone(second['previous'])
+
+    def test_search(self):
+        response = self.client.get(reverse('api-city-hotels', kwargs={'city_code': 'AMS'}), {'search': 'ibis'})
+        self.assertEqual([hotel['code'] for hotel in response.json()['results']], ['AMS01', 'AMS03'])
+
+    @override_settings(SEARCH_BACKEND='fulltext')
+    def test_ranked_search_pages_keep_the_rank_order(self):
+        Hotel.objects.create(city=self.city, code='AMS04', name='Ibis Ibis')
+        url = reverse('api-city-hotels', kwargs={'city_code': 'AMS'})
+        first = self.client.get(url, {'search': 'ibis'}).json()
+        second = self.client.get(url, {'search': 'ibis', 'cursor': first['next']}).json()
+        self.assertEqual([hotel['code'] for hotel in first['results'] + second['results']], ['AMS04', 'AMS01', 'AMS03'])
+        self.assertIsNone(second['next'])
+        previous = self.client.get(url, {'search': 'ibis', 'cursor': second['previous']}).json()
+        self.assertEqual(previous['results'], first['results'])
+
+    def test_all_hotels_include_city(self):
+        response = self.client.get(reverse('api-hotels'))
+        self.assertEqual(response.json()['results'][0], {'code': 'AMS01', 'name': 'Ibis', 'city': 'AMS'})
+
+    def test_unknown_city(self):
+        response = self.client.get(reverse('api-city-hotels', kwargs={'city_code': 'XXX'}))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(response.json(), {'detail': 'City code does not exist'})
+
+    def test_ndjson_export(self):
+        response = self.client.get(reverse('api-hotels'), {'format': 'ndjson'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'code': 'AMS01', 'name': 'Ibis', 'city': 'AMS'},
+            {'code': 'AMS02', 'name': 'Hilton', 'city': 'AMS'},
+            {'code': 'AMS03', 'name': 'Ibis Budget', 'city': 'AMS'},
+        ])
+
+    def test_etag_revalidation(self):
+        url = reverse('api-cities')
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        bump_data_generation()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
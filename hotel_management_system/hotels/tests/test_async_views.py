@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase, override_settings
+
+from hotels.models import City, Hotel
+from hotels.pagination import CursorPage, apaginate
+from hotels.tests import LOCMEM_CACHES
+from hotels.views import acities, ahotels
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(code='CITY', name='City Name')
+        Hotel.objects.bulk_create([
+            Hotel(code=f'HOTEL{i:02d}', name=f'Hotel Name {i}', city=cls.city)
+            for i in range(settings.ITEMS_PER_PAGE + 1)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+
+    async def test_apaginate_offset(self):
+        hotels = Hotel.objects.order_by('code', 'name')
+        page = await apaginate(request=self.factory.get('/', {'page': 2}), queryset=hotels)
+        self.assertEqual(page.number, 2)
+        self.assertEqual(page.paginator.num_pages, 2)
+        self.assertEqual([hotel.code for hotel in page], [f'HOTEL{settings.ITEMS_PER_PAGE:02d}'])
+        self.assertEqual(page.page_strip, [1, 2])
+
+    @override_settings(PAGINATION_MODE='cursor')
+    async def test_apaginate_cursor(self):
+        hotels = Hotel.objects.order_by('code', 'name')
+        first = await apaginate(request=self.factory.get('/'), queryset=hotels)
+        second = await apaginate(request=self.factory.get('/', {'cursor': first.next_cursor}), queryset=hotels)
+        self.assertIsInstance(second, CursorPage)
+        self.assertEqual(len(first), settings.ITEMS_PER_PAGE)
+        self.assertEqual([hotel.code for hotel in second], [f'HOTEL{settings.ITEMS_PER_PAGE:02d}'])
+        self.assertFalse(second.has_next())
+
+    async def test_acities(self):
+        response = await acities(self.factory.get('/', {'search': 'name'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'City Name')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = await acities(self.factory.get('/', {'search': 'name'}))
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    async def test_ahotels(self):
+        response = await ahotels(self.factory.get('/', {'page': 2}), city_code='CITY')
+        self.assertContains(response, f'HOTEL{settings.ITEMS_PER_PAGE:02d}')
+        self.assertNotContains(response, 'HOTEL00')
+
+    async def test_ahotels_unknown_city(self):
+        with self.assertRaises(Http404):
+            await ahotels(self.factory.get('/'), city_code='UNKNOWN')
+
+    @override_settings(IN_MEMORY_CATALOG=True)
+    async def test_ahotels_from_catalog(self):
+        response = await ahotels(self.factory.get('/'), city_code='CITY')
+        self.assertContains(response, 'HOTEL00')
@@ -0,0 +1,168 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.shortcuts import reverse
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+
+from hotels.cache import bump_data_generation, get_data_generation, get_response_cache_stats
+from hotels.checks import check_shared_cache
+from hotels.models import City, Hotel
+from hotels.tests import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.city = City.objects.create(code='CITY', name='City Name')
+        self.hotel = Hotel.objects.create(code='HOTEL', name='Hotel Name', city=self.city)
+
+    def test_second_request_is_served_from_cache(self):
+        for url in (reverse('cities'), reverse('hotels', kwargs={'city_code': self.city.code})):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                with self.assertNumQueries(0):
+                    second = self.client.get(url)
+                self.assertEqual(first['X-Cache'], 'MISS')
+                self.assertEqual(second['X-Cache'], 'HIT')
+                self.assertEqual(first.content, second.content)
+
+    def test_key_contains_view_arguments_and_parameters(self):
+        other_city = City.objects.create(code='OTHER', name='Other City')
+        urls = [
+            reverse('cities'),
+            reverse('cities') + '?search=City',
+            reverse('cities') + '?search=City&page=2',
+            reverse('hotels', kwargs={'city_code': self.city.code}),
+            reverse('hotels', kwargs={'city_code': other_city.code}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+    def test_data_generation_bump_invalidates_cache(self):
+        url = reverse('cities')
+        self.client.get(url)
+        City.objects.filter(pk=self.city.pk).update(name='Renamed City')
+        self.assertNotContains(self.client.get(url), 'Renamed City')
+
+        bump_data_generation()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Renamed City')
+
+    def test_missing_generation_is_initialized(self):
+        cache.delete('hotels:data-generation')
+        generation = get_data_generation()
+        self.assertIsNotNone(generation)
+        bump_data_generation()
+        self.assertEqual(get_data_generation(), generation + 1)
+
+    def test_not_found_is_not_cached(self):
+        url = reverse('hotels', kwargs={'city_code': 'MISSING'})
+        for _ in range(2):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(get_response_cache_stats(), {'hits': 0, 'misses': 2})
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_disabled_cache(self):
+        response = self.client.get(reverse('cities'))
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(get_response_cache_stats(), {'hits': 0, 'misses': 0})
+
+    def test_hit_miss_counters(self):
+        url = reverse('cities')
+        for _ in range(3):
+            self.client.get(url)
+        self.assertEqual(get_response_cache_stats(), {'hits': 2, 'misses': 1})
+
+        output = StringIO()
+        call_command('cache_stats', '--reset', stdout=output)
+        self.assertIn('Hit ratio: 66.7%', output.getvalue())
+        self.assertEqual(get_response_cache_stats(), {'hits': 0, 'misses': 0})
+
+
+@override_settings(CACHES=LOCMEM_CACHES, RESPONSE_CACHE_TIMEOUT=0)
+class FragmentCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.city = City.objects.create(code='CITY', name='City Name')
+        self.hotel = Hotel.objects.create(code='HOTEL', name='Hotel Name', city=self.city)
+
+    def test_cached_fragment_skips_the_objects_of_the_page(self):
+        for url, queries in ((reverse('cities'), 1), (reverse('hotels', kwargs={'city_code': self.city.code}), 2)):
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                with self.assertNumQueries(queries):  # The city and the count, the objects are not fetched
+                    second = self.client.get(url)
+                self.assertContains(second, 'HOTEL' if 'CITY' in url else 'City Name')
+                self.assertEqual(first.content, second.content)
+
+    def test_key_contains_search_and_resolved_page(self):
+        self.client.get(reverse('cities'))
+        with self.assertNumQueries(1):
+            self.client.get(reverse('cities') + '?page=invalid')  # The first page
+        with self.assertNumQueries(2):  # Not cached yet
+            self.client.get(reverse('cities') + '?search=City')
+
+    def test_data_generation_bump_invalidates_fragments(self):
+        url = reverse('cities')
+        self.client.get(url)
+        City.objects.filter(pk=self.city.pk).update(name='Renamed City')
+        self.assertNotContains(self.client.get(url), 'Renamed City')
+
+        bump_data_generation()
+        self.assertContains(self.client.get(url), 'Renamed City')
+
+    def test_templates_are_cached(self):
+        loaders = engines.all()[0].engine.template_loaders
+        self.assertEqual([type(loader) for loader in loaders], [CachedLoader])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class AdminDataGenerationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_superuser(username='admin', password='password')
+        self.client = Client()
+        self.client.force_login(user)
+        self.city = City.objects.create(code='CITY', name='City Name')
+
+    def test_admin_save_bumps_generation(self):
+        generation = get_data_generation()
+        url = reverse('admin:hotels_city_change', args=[self.city.pk])
+        data = {
+            'code': 'CITY', 'name': 'Renamed City',
+            'hotels-TOTAL_FORMS': '0', 'hotels-INITIAL_FORMS': '0',
+        }
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertGreater(get_data_generation(), generation)
+
+    def test_admin_delete_bumps_generation(self):
+        generation = get_data_generation()
+        url = reverse('admin:hotels_city_delete', args=[self.city.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'post': 'yes'})
+        self.assertFalse(City.objects.exists())
+        self.assertGreater(get_data_generation(), generation)
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+
+    def test_process_local_cache_is_reported(self):
+        with override_settings(CACHES=LOCMEM_CACHES):
+            self.assertEqual([warning.id for warning in check_shared_cache(None)], ['hotels.W001'])
+        file_caches = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+        with override_settings(CACHES=file_caches):
+            self.assertEqual(check_shared_cache(None), [])
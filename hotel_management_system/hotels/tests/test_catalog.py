@@ -0,0 +1,92 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.shortcuts import reverse
+from django.test import Client, TestCase, override_settings
+
+from hotels.cache import bump_data_generation
+from hotels.catalog import CatalogCity, CatalogHotel, get_catalog
+from hotels.models import City, Hotel
+from hotels.tests import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES, IN_MEMORY_CATALOG=True, RESPONSE_CACHE_TIMEOUT=0, ITEMS_PER_PAGE=2)
+class CatalogTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        amsterdam = City.objects.create(code='AMS', name='Amsterdam')
+        City.objects.create(code='ANT', name='Antwerpen')
+        City.objects.create(code='BER', name='Berlin')
+        Hotel.objects.bulk_create([
+            Hotel(city=amsterdam, code=f'AMS0{i}', name=name)
+            for i, name in enumerate(['Ibis', 'Hilton', 'Ibis Budget'], start=1)
+        ])
+        City.objects.refresh_hotel_counts()
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_load(self):
+        catalog = get_catalog()
+        self.assertEqual(catalog.get_city('AMS'), CatalogCity(code='AMS', name='Amsterdam', search_name='amsterdam', hotel_count=3))
+        self.assertIsNone(catalog.get_city('XXX'))
+        self.assertEqual(catalog.search_hotels('AMS', 'ibis'), [
+            CatalogHotel(code='AMS01', name='Ibis', search_name='ibis'),
+            CatalogHotel(code='AMS03', name='Ibis Budget', search_name='ibis budget'),
+        ])
+        self.assertEqual(catalog.search_hotels('BER', None), [])
+        self.assertEqual(catalog.hotel_count, 3)
+
+    def test_views_do_not_query_the_database(self):
+        get_catalog()
+        with self.assertNumQueries(0):
+            cities = self.client.get(reverse('cities'), {'page': 2}).context['cities']
+            hotels = self.client.get(reverse('hotels', kwargs={'city_code': 'AMS'}), {'search': 'ibis'}).context['hotels']
+            missing = self.client.get(reverse('hotels', kwargs={'city_code': 'XXX'}))
+        self.assertEqual([city.code for city in cities], ['BER'])
+        self.assertEqual([hotel.code for hotel in hotels], ['AMS01', 'AMS03'])
+        self.assertEqual(missing.status_code, 404)
+
+    @override_settings(PAGINATION_MODE='cursor')
+    def test_cursor_pages(self):
+        first = self.client.get(reverse('cities')).context['cities']
+        second = self.client.get(reverse('cities'), {'cursor': first.next_cursor}).context['cities']
+        back = self.client.get(reverse('cities'), {'cursor': second.previous_cursor}).context['cities']
+        self.assertEqual([city.code for city in second], ['BER'])
+        self.assertFalse(second.has_next())
+        self.assertEqual(list(back), list(first))
+
+    @override_settings(PAGINATION_MODE='cursor', ITEMS_PER_PAGE=1)
+    def test_cursor_pages_whatever_the_collation(self):
+        # 'b01' < 'BER' under a linguistic collation, but not by code points: the binary searches need the Python
+        # order, whatever order the database returns
+        City.objects.create(code='b01', name='Brussel')
+        bump_data_generation()
+        with mock.patch.object(City.objects, 'order_by', lambda *fields: City.objects.all().order_by('-code')):
+            get_catalog()
+        codes, cursor = [], None
+        for _ in range(5):
+            page = self.client.get(reverse('cities'), {'cursor': cursor} if cursor else {}).context['cities']
+            codes += [city.code for city in page]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(codes, ['AMS', 'ANT', 'BER', 'b01'])
+
+    def test_reloaded_when_generation_changes(self):
+        catalog = get_catalog()
+        self.assertIs(get_catalog(), catalog)
+
+        City.objects.create(code='CPH', name='Copenhagen')
+        bump_data_generation()
+        self.assertIsNotNone(get_catalog().get_city('CPH'))
+
+    def test_catalog_stats_command(self):
+        out = StringIO()
+        call_command('catalog_stats', stdout=out)
+        self.assertIn('Hotels: 3', out.getvalue())
+        self.assertIn('Memory (total):', out.getvalue())
@@ -0,0 +1,110 @@
+import gzip
+import os
+import tempfile
+from pathlib import Path
+
+import zstandard
+from django.test import SimpleTestCase, TestCase
+
+from hotels.feeds import Feed, detect_format, download_feed, download_feeds, fetch_feed
+from hotels.models import FeedState
+from hotels.sync import CityRow
+from hotels.tests.feed_server import FeedServer
+from hotels.validation import FeedValidator, Quarantine
+
+
+def city_rows(feed: Feed) -> list[CityRow]:
+    """The rows of a city feed, as the import job reads them"""
+    with FeedValidator(quarantine=Quarantine(), workers=1) as validator:
+        return list(validator.city_rows(feed.stream(), feed.format))
+
+
+class DownloadFeedTest(TestCase):
+
+    content = '"AMS";"Amsterdam"\n"KÖL";"Köln"\n'.encode('utf-8')
+
+    def test_download(self):
+        with FeedServer({'/city.csv': self.content}) as server:
+            feed = download_feed(server.url('/city.csv'))
+        self.assertFalse(feed.not_modified)
+        self.assertEqual(feed.size, len(self.content))
+        self.assertEqual(city_rows(feed), [CityRow('AMS', 'Amsterdam'), CityRow('KÖL', 'Köln')])
+        self.assertEqual(feed.last_modified, FeedServer.last_modified)
+        self.assertFalse(feed.is_unchanged(None))
+
+    def test_conditional_download(self):
+        with FeedServer({'/city.csv': self.content}) as server:
+            feed = download_feed(server.url('/city.csv'))
+            state = FeedState(url=feed.url, etag=feed.etag, content_hash=feed.content_hash)
+            not_modified = download_feed(server.url('/city.csv'), state=state)
+        self.assertTrue(not_modified.not_modified)
+        self.assertIsNone(not_modified.file)
+        self.assertTrue(not_modified.is_unchanged(state))
+
+    def test_parallel_download_keeps_order(self):
+        with FeedServer({'/city.csv': self.content, '/hotel.csv': b'"AMS";"AMS01";"Ibis"'}) as server:
+            feeds = download_feeds([server.url('/hotel.csv'), server.url('/city.csv')])
+        self.assertEqual([feed.url for feed in feeds], [server.url('/hotel.csv'), server.url('/city.csv')])
+        self.assertEqual(feeds[0].stream().read(), b'"AMS";"AMS01";"Ibis"')
+
+
+class FeedReadersTest(SimpleTestCase):
+
+    content = '"AMS";"Amsterdam"\n"KÖL";"Köln"\n'.encode('utf-8')
+
+    def test_format_detection(self):
+        self.assertEqual(detect_format('https://example.com/city.csv'), 'csv')
+        self.assertEqual(detect_format('https://example.com/city.ndjson.gz?v=2'), 'ndjson')
+        self.assertEqual(detect_format('/srv/feeds/hotel.jsonl.zst'), 'ndjson')
+        self.assertEqual(detect_format('https://example.com/feed', 'application/x-ndjson; charset=utf-8'), 'ndjson')
+        self.assertEqual(detect_format('https://example.com/feed'), 'csv')
+
+    def test_compressed_bodies_are_decompressed(self):
+        for name, body in (('gzip', gzip.compress(self.content)), ('zstd', zstandard.compress(self.content))):
+            with self.subTest(name), tempfile.SpooledTemporaryFile() as file:
+                file.write(body)
+                feed = Feed(url='city.csv', file=file)
+                self.assertEqual(feed.stream().read(), self.content)
+                self.assertEqual(city_rows(feed), [CityRow('AMS', 'Amsterdam'), CityRow('KÖL', 'Köln')])
+
+    def test_ndjson_rows(self):
+        with tempfile.SpooledTemporaryFile() as file:
+            file.write('{"code": "AMS", "name": "Amsterdam"}\n\n["ANT", "Antwerpen"]\n{"name": "Köln", "code": "KÖL"}\n'.encode())
+            feed = Feed(url='city.ndjson', file=file, format='ndjson')
+            self.assertEqual(city_rows(feed), [CityRow('AMS', 'Amsterdam'), CityRow('ANT', 'Antwerpen'), CityRow('KÖL', 'Köln')])
+
+
+class LocalFeedTest(TestCase):
+
+    content = '"AMS";"Amsterdam"\n"KÖL";"Köln"\n'.encode('utf-8')
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / 'city.csv.gz'
+        self.path.write_bytes(gzip.compress(self.content))
+
+    def test_open_local_file(self):
+        for url in (str(self.path), self.path.as_uri()):
+            with self.subTest(url=url):
+                feed = fetch_feed(url)
+                self.assertFalse(feed.not_modified)
+                self.assertEqual(feed.size, self.path.stat().st_size)
+                self.assertEqual(city_rows(feed), [CityRow('AMS', 'Amsterdam'), CityRow('KÖL', 'Köln')])
+                feed.close()
+
+    def test_unchanged_file_is_not_modified(self):
+        feed = fetch_feed(str(self.path))
+        feed.close()
+        state = FeedState(url=feed.url, etag=feed.etag, content_hash=feed.content_hash)
+        self.assertTrue(fetch_feed(str(self.path), state=state).not_modified)
+
+        os.utime(self.path, ns=(0, 0))
+        touched = fetch_feed(str(self.path), state=state)
+        self.assertFalse(touched.not_modified)
+        self.assertTrue(touched.is_unchanged(state))  # Same content
+        touched.close()
+
+    def test_unsupported_scheme(self):
+        with self.assertRaises(ValueError):
+            fetch_feed('ftp://example.com/city.csv')
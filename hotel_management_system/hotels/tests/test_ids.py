@@ -0,0 +1,30 @@
+import time
+import uuid
+
+from django.test import TestCase, override_settings
+
+from hotels.ids import new_id, uuid7
+from hotels.models import City, Hotel
+
+
+class IdsTest(TestCase):
+
+    def test_uuid7(self):
+        before = time.time_ns() // 1_000_000
+        keys = [uuid7() for _ in range(10_000)]  # More than the counter of a millisecond
+        after = time.time_ns() // 1_000_000
+
+        self.assertEqual({(key.version, key.variant) for key in keys}, {(7, uuid.RFC_4122)})
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+        # The timestamp may run ahead of the clock by the counter overflows only
+        self.assertTrue(before <= keys[0].int >> 80 <= keys[-1].int >> 80 <= after + len(keys) // 2048)
+
+    def test_new_id(self):
+        self.assertEqual(new_id().version, 4)
+        with override_settings(PRIMARY_KEY_UUID='uuid7'):
+            self.assertEqual(new_id().version, 7)
+            city = City.objects.create(code='AMS', name='Amsterdam')
+            hotels = Hotel.objects.bulk_create([Hotel(code=f'AMS0{i}', name='Ibis', city=city) for i in range(3)])
+        self.assertEqual(city.id.version, 7)
+        self.assertEqual([hotel.id for hotel in hotels], sorted(hotel.id for hotel in hotels))
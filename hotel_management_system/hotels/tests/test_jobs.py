@@ -1,17 +1,60 @@
+import gzip
+import os
+import tempfile
+import time
 from collections import defaultdict
-from unittest.mock import patch, Mock
+from contextlib import contextmanager
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-from django.test import TestCase
-from requests.auth import HTTPBasicAuth
+import zstandard
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
+from hotels.cache import get_data_generation
 from hotels.jobs import fetch_hotel_data
-from hotels.models import City, Hotel
+from hotels.models import City, FeedState, Hotel, ImportRun
+from hotels.scheduler import IMPORT_LOCK_KEY
+from hotels.sync import SyncStats
+from hotels.tests import LOCMEM_CACHES
+from hotels.tests.feed_server import FeedServer, basic_auth_header
+from hotels.tests.test_sync import write_queries
+from hotels.timing import PhaseTimer
 
+CSV_CITY_CONTENT = '"AMS";"Amsterdam"\n"ANT";"Antwerpen"\n"BAR";"Barcelona"'
+CSV_HOTEL_CONTENT = (
+    '"AMS";"AMS01";"Ibis Amsterdam Airport"\n"AMS";"AMS02";"Novotel Amsterdam Airport"\n'
+    '"ANT";"ANT01";"Express by Holiday Inn"\n"ANT";"ANT02";"Eden"\n"ANT";"ANT04";"Astoria"\n'
+    '"BAR";"BARA1";"Nouvel"\n"BAR";"BARA2";"Lleo"\n"BAR";"BARA6";"H10 Universitat"'
+)
 
+
+@override_settings(CACHES=LOCMEM_CACHES)
 class FetchHotelDataTest(TestCase):
 
-    @patch('hotels.jobs.requests.get')
-    def test_load_csv_to_db(self, mock_requests_get):
+    username = 'username'
+    password = 'password'
+
+    def setUp(self):
+        cache.clear()
+        self.server = FeedServer({
+            '/city.csv': CSV_CITY_CONTENT.encode('utf-8'),
+            '/hotel.csv': CSV_HOTEL_CONTENT.encode('utf-8'),
+        })
+
+    def fetch(self) -> SyncStats | None:
+        return fetch_hotel_data(
+            city_url=self.server.url('/city.csv'),
+            hotel_url=self.server.url('/hotel.csv'),
+            username=self.username,
+            password=self.password,
+        )
+
+    def test_load_csv_to_db(self):
 
         # Create some previous data (out job has to clear them)
         cities_prev = [City(code='CITY1', name='City Name 1'), City(code='CITY2', name='City Name 2')]
@@ -24,14 +67,6 @@ class FetchHotelDataTest(TestCase):
         City.objects.bulk_create(cities_prev)
         Hotel.objects.bulk_create(hotels_prev)
 
-        # Mock requests.get
-        csv_city_content = '"AMS";"Amsterdam"\n"ANT";"Antwerpen"\n"BAR";"Barcelona"'
-        csv_hotel_content = (
-            '"AMS";"AMS01";"Ibis Amsterdam Airport"\n"AMS";"AMS02";"Novotel Amsterdam Airport"\n'
-            '"ANT";"ANT01";"Express by Holiday Inn"\n"ANT";"ANT02";"Eden"\n"ANT";"ANT04";"Astoria"\n'
-            '"BAR";"BARA1";"Nouvel"\n"BAR";"BARA2";"Lleo"\n"BAR";"BARA6";"H10 Universitat"'
-        )
-
         correct_relations = {
             'AMS': (
                 'Amsterdam',
@@ -53,31 +88,9 @@ class FetchHotelDataTest(TestCase):
             )
         }
 
-        mock_response_city = Mock()
-        mock_response_city.status_code = 200
-        mock_response_city.content = csv_city_content.encode('utf-8')
-
-        mock_response_hotel = Mock()
-        mock_response_hotel.status_code = 200
-        mock_response_hotel.content = csv_hotel_content.encode('utf-8')
-
-        city_url = 'http://example.com/city.csv'
-        hotel_url = 'http://example.com/hotel.csv'
-        username = 'username'
-        password = 'password'
-
-        def side_effect(url, auth=None):
-            if url == city_url:
-                return mock_response_city
-            elif url == hotel_url:
-                return mock_response_hotel
-            else:
-                raise ValueError('Unmocked URL: ' + url)
-
-        mock_requests_get.side_effect = side_effect
-
         # Execute our job
-        fetch_hotel_data(city_url=city_url, hotel_url=hotel_url, username=username, password=password)
+        with self.server:
+            self.fetch()
 
         # Verify database models
         cities = City.objects.all()
@@ -99,7 +112,204 @@ class FetchHotelDataTest(TestCase):
 
         self.assertEqual(actual_relations, correct_relations)
 
-        # Verify that requests.get was called with the correct URLs
-        mock_requests_get.assert_any_call(city_url, auth=HTTPBasicAuth(username, password))
-        mock_requests_get.assert_any_call(hotel_url, auth=HTTPBasicAuth(username, password))
-        self.assertEqual(mock_requests_get.call_count, 2)
+        # Verify that both feeds were requested with the credentials
+        self.assertEqual(sorted(path for path, _ in self.server.requests), ['/city.csv', '/hotel.csv'])
+        for _, headers in self.server.requests:
+            self.assertEqual(headers['Authorization'], basic_auth_header(self.username, self.password))
+
+    def test_feed_states_are_saved(self):
+        with self.server:
+            self.fetch()
+        self.assertEqual(
+            set(FeedState.objects.values_list('url', 'last_modified')),
+            {(self.server.url('/city.csv'), FeedServer.last_modified),
+             (self.server.url('/hotel.csv'), FeedServer.last_modified)},
+        )
+        self.assertTrue(all(FeedState.objects.values_list('etag', flat=True)))
+
+    def test_not_modified_feeds_make_no_db_writes(self):
+        with self.server:
+            self.fetch()
+            generation = get_data_generation()
+            with CaptureQueriesContext(connection) as context:
+                stats = self.fetch()
+
+        self.assertEqual(stats, SyncStats())
+        self.assertEqual(write_queries(context), [])
+        self.assertEqual(get_data_generation(), generation)
+        # The second run used conditional requests answered with 304
+        conditional = [headers for _, headers in self.server.requests[2:]]
+        self.assertEqual(len(conditional), 2)
+        for headers in conditional:
+            self.assertIn('If-None-Match', headers)
+            self.assertEqual(headers['If-Modified-Since'], FeedServer.last_modified)
+
+    def test_same_content_without_validators_makes_no_db_writes(self):
+        self.server.validators = False
+        with self.server:
+            self.fetch()
+            with CaptureQueriesContext(connection) as context:
+                stats = self.fetch()
+        self.assertEqual(stats, SyncStats())
+        self.assertEqual(write_queries(context), [])
+
+    def test_changed_feed_is_imported_with_not_modified_one(self):
+        with self.server:
+            self.fetch()
+            generation = get_data_generation()
+            self.server.feeds['/hotel.csv'] += b'\n"BAR";"BARA7";"Arts"'
+            stats = self.fetch()
+
+        self.assertGreater(get_data_generation(), generation)
+        self.assertEqual(stats, SyncStats(hotels_created=1))
+        self.assertEqual(Hotel.objects.count(), 9)
+        # The city feed was answered with 304 and downloaded again unconditionally
+        city_requests = [headers for path, headers in self.server.requests if path == '/city.csv']
+        self.assertEqual(len(city_requests), 3)
+        self.assertNotIn('If-None-Match', city_requests[-1])
+
+    def test_malformed_rows_are_quarantined(self):
+        self.server.feeds['/city.csv'] += b'\n"AMS";"Amsterdam (duplicate)"'
+        self.server.feeds['/hotel.csv'] += (
+            b'\n"AMS"'
+            b'\n"XXX";"XXX01";"Orphan"'
+            b'\n"AMS";"AMS0000000001";"Too long code"'
+            b'\n"AMS";"AMS03";"Hotel"'
+        )
+        with self.server:
+            stats = self.fetch()
+
+        self.assertEqual(stats.hotels_created, 9)
+        self.assertEqual(City.objects.get(code='AMS').name, 'Amsterdam')
+        self.assertTrue(Hotel.objects.filter(code='AMS03').exists())
+        run = ImportRun.objects.get()
+        self.assertEqual((run.city_rows, run.hotel_rows, run.quarantined_rows), (4, 12, 4))
+        self.assertEqual(list(run.quarantine.values_list('feed', 'line', 'reason')), [
+            ('city', 4, 'duplicate code AMS'),
+            ('hotel', 9, 'expected 3 columns, got 1'),
+            ('hotel', 10, 'unknown city code XXX'),
+            ('hotel', 11, 'code is longer than 10 characters'),
+        ])
+
+    def test_local_compressed_feeds_of_other_formats(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        city_path = os.path.join(directory.name, 'city.ndjson.gz')
+        hotel_path = os.path.join(directory.name, 'hotel.csv.zst')
+        with open(city_path, 'wb') as file:
+            file.write(gzip.compress(b'{"code": "AMS", "name": "Amsterdam"}\n{"code": "ANT", "name": "Antwerpen"}\n'))
+        with open(hotel_path, 'wb') as file:
+            file.write(zstandard.compress('"AMS";"AMS01";"Ibis"\n"ANT";"ANT01";"Eden"\n"BAR";"BARA1";"Nouvel"'.encode()))
+
+        stats = fetch_hotel_data(city_url=city_path, hotel_url=Path(hotel_path).as_uri(), username=None, password=None)
+
+        self.assertEqual((stats.cities_created, stats.hotels_created), (2, 2))
+        self.assertEqual(
+            set(Hotel.objects.values_list('city__code', 'code', 'name')),
+            {('AMS', 'AMS01', 'Ibis'), ('ANT', 'ANT01', 'Eden')},
+        )
+        self.assertEqual(ImportRun.objects.get().quarantined_rows, 1)  # BAR is not in the city feed
+
+    def test_download_error(self):
+        with self.server:
+            stats = fetch_hotel_data(
+                city_url=self.server.url('/city.csv'),
+                hotel_url=self.server.url('/missing.csv'),
+                username=self.username,
+                password=self.password,
+            )
+        self.assertIsNone(stats)
+        self.assertFalse(City.objects.exists())
+
+    def test_successful_run_is_recorded(self):
+        with self.server:
+            stats = self.fetch()
+
+        run = ImportRun.objects.get()
+        self.assertEqual(run.status, ImportRun.Status.SUCCESS)
+        self.assertEqual((run.city_rows, run.hotel_rows), (3, 8))
+        self.assertEqual(run.bytes_downloaded, len(CSV_CITY_CONTENT) + len(CSV_HOTEL_CONTENT))
+        self.assertEqual((run.cities_created, run.hotels_created), (stats.cities_created, stats.hotels_created))
+        self.assertLessEqual({'download', 'parse', 'prepare', 'insert', 'commit'}, set(run.timings))
+        self.assertLessEqual(sum(run.timings.values()), run.duration)
+        self.assertIsNotNone(run.rows_per_second)
+
+    def test_failed_run_is_recorded(self):
+        del self.server.feeds['/hotel.csv']
+        with self.server:
+            self.assertIsNone(self.fetch())
+
+        run = ImportRun.objects.get()
+        self.assertEqual(run.status, ImportRun.Status.FAILED)
+        self.assertIn('404', run.error)
+        self.assertEqual(run.hotels_created, 0)
+
+    def test_failed_commit_ends_the_commit_phase(self):
+        failures = [DatabaseError('could not serialize access')]
+
+        @contextmanager
+        def atomic():
+            with transaction.atomic():
+                yield
+            if failures:
+                raise failures.pop()
+
+        # Only the transaction of the import fails on commit, the one saving the run does not
+        with self.server, mock.patch('hotels.jobs.transaction', mock.Mock(atomic=atomic)):
+            self.assertIsNone(self.fetch())
+
+        run = ImportRun.objects.get()
+        self.assertEqual(run.status, ImportRun.Status.FAILED)
+        self.assertIn('commit', run.timings)
+
+    def test_not_modified_run_is_not_recorded(self):
+        with self.server:
+            self.fetch()
+            self.fetch()
+        self.assertEqual(ImportRun.objects.count(), 1)
+
+    def test_import_command_profile(self):
+        with self.server, tempfile.TemporaryDirectory() as directory, override_settings(
+            CITY_FETCH_URL=self.server.url('/city.csv'),
+            HOTEL_FETCH_URL=self.server.url('/hotel.csv'),
+            FETCH_USERNAME=self.username,
+            FETCH_PASSWORD=self.password,
+        ):
+            path = os.path.join(directory, 'import.prof')
+            out = StringIO()
+            call_command('import_hotels', '--profile', path, stdout=out)
+            self.assertGreater(os.path.getsize(path), 0)
+
+        self.assertIn('cities: 3 created', out.getvalue())
+        self.assertIn('parse: ', out.getvalue())
+        self.assertEqual(Hotel.objects.count(), 8)
+
+    def test_import_command_refuses_to_run_during_a_scheduled_import(self):
+        other = connections.create_connection('default')
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_lock(%s)', [IMPORT_LOCK_KEY])
+            with self.assertRaisesMessage(CommandError, 'running in another process'):
+                call_command('import_hotels', stdout=StringIO())
+        finally:
+            # The backend of a closed connection releases its locks asynchronously
+            with other.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [IMPORT_LOCK_KEY])
+            other.close()
+        self.assertFalse(City.objects.exists())
+
+
+class PhaseTimerTest(SimpleTestCase):
+
+    def test_nested_phases_are_exclusive(self):
+        timer = PhaseTimer()
+        with timer.phase('insert'):
+            time.sleep(0.02)
+            for _ in timer.timed(iter([1, 2]), 'parse'):
+                time.sleep(0.01)
+            with timer.phase('parse'):
+                time.sleep(0.02)
+
+        self.assertGreaterEqual(timer.timings['insert'], 0.04)
+        self.assertGreaterEqual(timer.timings['parse'], 0.02)
+        self.assertLess(timer.timings['parse'], 0.03)
@@ -0,0 +1,84 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from hotels.loaders import copy_catalog, get_loader, staged_catalog, sync_catalog
+from hotels.models import City, Hotel
+from hotels.tests.test_sync import LoaderTestsMixin
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY loader requires PostgreSQL')
+class CopyCatalogTest(LoaderTestsMixin, TestCase):
+
+    loader = staticmethod(copy_catalog)
+
+    def physical_rows(self) -> set:
+        """(table, ctid) pairs: UPDATE creates a new row version with another ctid"""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT \'city\', ctid::text FROM {City._meta.db_table} '
+                f'UNION ALL SELECT \'hotel\', ctid::text FROM {Hotel._meta.db_table}'
+            )
+            return set(cursor.fetchall())
+
+    def test_unchanged_feed_rewrites_no_rows(self):
+        copy_catalog(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        rows_before = self.physical_rows()
+        copy_catalog(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        self.assertEqual(self.physical_rows(), rows_before)
+
+    def test_names_with_special_characters(self):
+        city_rows = [self.city_rows[0]._replace(name='"Amsterdam"; ,\n\\N')]
+        hotel_rows = [self.hotel_rows[0]._replace(name='')]
+        copy_catalog(city_rows=city_rows, hotel_rows=hotel_rows)
+        self.assertEqual(City.objects.get().name, city_rows[0].name)
+        self.assertEqual(Hotel.objects.get().name, '')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'COPY loader requires PostgreSQL')
+class StagedCatalogTest(LoaderTestsMixin, TransactionTestCase):
+
+    loader = staticmethod(staged_catalog)
+
+    def test_catalog_is_written_in_one_transaction(self):
+        with CaptureQueriesContext(connection) as context:
+            staged_catalog(city_rows=self.city_rows, hotel_rows=self.hotel_rows, batch_size=1)
+        # Staging statements commit on their own, the merge is the only transaction
+        self.assertEqual(sum(q['sql'] == 'COMMIT' for q in context.captured_queries), 1)
+
+    def test_failed_import_changes_nothing(self):
+        staged_catalog(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        catalog = set(Hotel.objects.values_list('id', 'code', 'name', 'city__code'))
+
+        def hotel_rows():
+            for row in self.hotel_rows[:2]:
+                yield row._replace(name=f'{row.name} (renamed)')
+            raise ValueError('Malformed row')
+
+        with self.assertRaises(ValueError):
+            staged_catalog(city_rows=self.city_rows[:1], hotel_rows=hotel_rows(), batch_size=1)
+        self.assertEqual(set(Hotel.objects.values_list('id', 'code', 'name', 'city__code')), catalog)
+        self.assertEqual(City.objects.count(), 2)
+
+        # The staging tables of the failed import are dropped
+        stats = staged_catalog(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        self.assertEqual(stats.writes, 0)
+
+
+class GetLoaderTest(TestCase):
+
+    @override_settings(IMPORT_LOADER='orm')
+    def test_orm_loader(self):
+        self.assertIs(get_loader(), sync_catalog)
+
+    @override_settings(IMPORT_LOADER='copy')
+    def test_copy_loader(self):
+        expected = copy_catalog if connection.vendor == 'postgresql' else sync_catalog
+        self.assertIs(get_loader(), expected)
+
+    @override_settings(IMPORT_LOADER='staged')
+    def test_staged_loader(self):
+        expected = staged_catalog if connection.vendor == 'postgresql' else sync_catalog
+        self.assertIs(get_loader(), expected)
@@ -64,3 +64,76 @@ class HotelModelTest(TestCase):
     def test_str(self):
         """__str__ in the model matches the name field"""
         self.assertEqual(self.hotel.__str__(), 'Hotel Name')
+
+
+class DenormalizedColumnsTest(TestCase):
+
+    def test_search_name_is_maintained(self):
+        city = City.objects.create(code='KOL', name='Köln')
+        self.assertEqual(city.search_name, 'koln')
+        city.name = 'Zürich'
+        city.save(update_fields=['name'])
+        self.assertEqual(City.objects.get(code='KOL').search_name, 'zurich')
+
+        hotels = Hotel.objects.bulk_create([Hotel(code='KOL01', name='Hôtel Öland', city=city)])
+        self.assertEqual(Hotel.objects.get(code='KOL01').search_name, 'hotel oland')
+        hotels[0].name = 'Ibis'
+        Hotel.objects.bulk_update(hotels, fields=['name'])
+        self.assertEqual(Hotel.objects.get(code='KOL01').search_name, 'ibis')
+
+    def test_refresh_hotel_counts(self):
+        amsterdam, antwerpen = City.objects.bulk_create([City(code='AMS', name='Amsterdam'), City(code='ANT', name='Antwerpen')])
+        Hotel.objects.bulk_create([Hotel(code=f'AMS0{i}', name='Ibis', city=amsterdam) for i in range(3)])
+        self.assertEqual(City.objects.refresh_hotel_counts(), 1)  # Antwerpen is unchanged
+        self.assertEqual(dict(City.objects.values_list('code', 'hotel_count')), {'AMS': 3, 'ANT': 0})
+
+        Hotel.objects.filter(code='AMS00').update(city=antwerpen)
+        self.assertEqual(City.objects.filter(code='ANT').refresh_hotel_counts(), 1)
+        self.assertEqual(dict(City.objects.values_list('code', 'hotel_count')), {'AMS': 3, 'ANT': 1})
+        self.assertEqual(City.objects.refresh_hotel_counts(), 1)
+        self.assertEqual(dict(City.objects.values_list('code', 'hotel_count')), {'AMS': 2, 'ANT': 1})
+
+
+class EqualityTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        amsterdam, antwerpen = City.objects.bulk_create([City(code='AMS', name='Amsterdam'), City(code='ANT', name='Antwerpen')])
+        Hotel.objects.bulk_create(
+            [Hotel(code=f'AMS{i:02d}', name='Ibis', city=amsterdam) for i in range(20)]
+            + [Hotel(code=f'ANT{i:02d}', name='Ibis', city=antwerpen) for i in range(20)]
+        )
+
+    def test_no_queries(self):
+        hotels, same_hotels = list(Hotel.objects.all()), list(Hotel.objects.all())
+        cities, same_cities = list(City.objects.all()), list(City.objects.all())
+        with self.assertNumQueries(0):
+            self.assertEqual(hotels, same_hotels)
+            self.assertEqual(set(hotels), set(same_hotels))
+            self.assertEqual(len({hotel: hotel.code for hotel in hotels + same_hotels}), 40)
+            self.assertIn(hotels[-1], same_hotels)
+            self.assertEqual(set(cities), set(same_cities))
+
+    def test_local_fields(self):
+        hotel = Hotel.objects.get(code='AMS00')
+        moved = Hotel.objects.get(code='AMS00')
+        moved.city_id = City.objects.get(code='ANT').id
+        renamed = Hotel.objects.get(code='AMS00')
+        renamed.name = 'Hilton'
+        self.assertNotEqual(hotel, moved)
+        self.assertNotEqual(hotel, renamed)
+        self.assertEqual(len({hotel, moved, renamed}), 3)  # The same hash, but not equal
+        self.assertNotEqual(hotel, hotel.city)
+
+    def test_same_values(self):
+        hotel = Hotel.objects.select_related('city').get(code='AMS00')
+        copy = Hotel(code='AMS00', name='Ibis', city=City(code='AMS', name='Amsterdam'))
+        self.assertNotEqual(hotel, copy)  # Other primary keys
+        with self.assertNumQueries(0):
+            self.assertTrue(hotel.same_values(copy))
+        copy.city.name = 'Amsterdam Centrum'
+        self.assertFalse(hotel.same_values(copy))
+
+        other = Hotel.objects.get(code='ANT00')
+        with self.assertNumQueries(1):  # Its city is not loaded
+            self.assertTrue(other.same_values(Hotel(code='ANT00', name='Ibis', city=City(code='ANT', name='Antwerpen'))))
@@ -0,0 +1,104 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.shortcuts import reverse
+from django.test import Client, TestCase, override_settings
+
+from hotels.models import City
+from hotels.pagination import CursorPage, CursorPaginator
+from hotels.tests import LOCMEM_CACHES
+
+
+class CursorPaginatorTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        City.objects.bulk_create([City(code=f'CITY{i:02d}', name=f'City Name {i}') for i in range(23)])
+        cls.codes = sorted(City.objects.values_list('code', flat=True))
+
+    def setUp(self):
+        self.paginator = CursorPaginator(object_list=City.objects.all(), per_page=10)
+
+    def codes_of(self, page: CursorPage) -> list[str]:
+        return [city.code for city in page]
+
+    def test_first_page(self):
+        with self.assertNumQueries(1):  # No COUNT
+            page = self.paginator.get_page(None)
+        self.assertEqual(self.codes_of(page), self.codes[:10])
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+    def test_walk_forward_and_backward(self):
+        pages = [self.paginator.get_page(None)]
+        while pages[-1].has_next():
+            pages.append(self.paginator.get_page(pages[-1].next_cursor))
+        self.assertEqual([self.codes_of(page) for page in pages], [self.codes[:10], self.codes[10:20], self.codes[20:]])
+        self.assertFalse(pages[-1].has_next())
+
+        page = pages[-1]
+        backward = [self.codes_of(page)]
+        while page.has_previous():
+            page = self.paginator.get_page(page.previous_cursor)
+            backward.append(self.codes_of(page))
+        self.assertEqual(backward, [self.codes[20:], self.codes[10:20], self.codes[:10]])
+
+    def test_invalid_cursor_returns_first_page(self):
+        for cursor in ('garbage', '!!!', CursorPaginator.encode_cursor('sideways', ('CITY01', 'City Name 1'))):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.codes_of(self.paginator.get_page(cursor)), self.codes[:10])
+
+    def test_cursor_with_wrong_key_types_returns_first_page(self):
+        for key in ((None, None), (1, 2), ('CITY01', ['City Name 1'])):
+            cursor = CursorPaginator.encode_cursor('next', key)
+            with self.subTest(key=key):
+                self.assertEqual(self.codes_of(self.paginator.get_page(cursor)), self.codes[:10])
+
+    def test_stale_cursor_returns_first_page(self):
+        cursor = CursorPaginator.encode_cursor('next', ('ZZZ', 'Last'))
+        self.assertEqual(self.codes_of(self.paginator.get_page(cursor)), self.codes[:10])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PaginationModeViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        City.objects.bulk_create([
+            City(code=f'CITY{i:03d}', name=f'City Name {i}') for i in range(settings.ITEMS_PER_PAGE * 20)
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.url = reverse('cities')
+
+    @override_settings(PAGINATION_MODE='cursor')
+    def test_cursor_mode(self):
+        first = self.client.get(self.url)
+        page = first.context['cities']
+        self.assertIsInstance(page, CursorPage)
+        self.assertContains(first, f'cursor={page.next_cursor}')
+        self.assertNotContains(first, 'page=')
+
+        second = self.client.get(self.url, {'cursor': page.next_cursor})
+        self.assertEqual(
+            second.context['cities'].object_list,
+            list(City.objects.order_by('code')[settings.ITEMS_PER_PAGE:settings.ITEMS_PER_PAGE * 2]),
+        )
+
+    @override_settings(PAGINATION_MODE='cursor')
+    def test_cursor_with_null_key_returns_first_page(self):
+        cursor = CursorPaginator.encode_cursor('next', (None, None))
+        for url in (self.url, reverse('api-cities')):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url, {'cursor': cursor}), 'CITY000')
+
+    def test_offset_mode_renders_page_window(self):
+        response = self.client.get(self.url, {'page': 10})
+        self.assertEqual(
+            response.context['cities'].page_strip,
+            [1, Paginator.ELLIPSIS, 8, 9, 10, 11, 12, Paginator.ELLIPSIS, 20],
+        )
+        self.assertContains(response, 'page=12')
+        self.assertNotContains(response, 'page=13"')
@@ -0,0 +1,125 @@
+import io
+
+import zstandard
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from hotels.parsing import Column, RejectedRow, iter_chunks, parse_chunk, parse_file, parse_pool
+from hotels.sync import CityRow, HotelRow
+from hotels.validation import CITY_COLUMNS, FeedValidator, Quarantine
+
+COLUMNS = (Column('code', 5, required=True), Column('name', 20))
+
+
+class ParseChunkTest(SimpleTestCase):
+
+    def test_rows_are_checked(self):
+        data = '"AMS";"Amsterdam"\n\n"";"No code"\n"AMSTERDAM";"Long code"\n"KÖL"\n"KÖL";"Köln"\n'.encode()
+        chunk = parse_chunk(data, first_line=10, columns=COLUMNS)
+        self.assertEqual(list(chunk.rows(2)), [(10, ('AMS', 'Amsterdam')), (15, ('KÖL', 'Köln'))])
+        self.assertEqual(chunk.rejected, [
+            RejectedRow(12, 'empty code', '"";"No code"'),
+            RejectedRow(13, 'code is longer than 5 characters', '"AMSTERDAM";"Long code"'),
+            RejectedRow(14, 'expected 2 columns, got 1', '"KÖL"'),
+        ])
+
+    def test_undecodable_line_is_rejected(self):
+        chunk = parse_chunk(b'"AMS";"Amsterdam"\n"K\xff";"Koln"\n"ANT";"Antwerpen"', first_line=1, columns=COLUMNS)
+        self.assertEqual(chunk.lines, [1, 3])
+        self.assertEqual(chunk.rejected, [RejectedRow(2, 'invalid utf-8', '"K�";"Koln"')])
+
+    def test_quoted_field_spanning_lines_is_rejected(self):
+        data = '"AMS";"Amster\ndam"\n"ANT";"Antwerpen"\n"KÖL";"Köln\n"BER";"Berlin"\n'.encode()
+        chunk = parse_chunk(data, first_line=1, columns=COLUMNS)
+        self.assertEqual(list(chunk.rows(2)), [(3, ('ANT', 'Antwerpen')), (5, ('BER', 'Berlin'))])
+        self.assertEqual(chunk.rejected, [
+            RejectedRow(1, 'quoted field spans lines', '"AMS";"Amster'),
+            RejectedRow(2, 'expected 2 columns, got 1', 'dam"'),
+            RejectedRow(4, 'quoted field spans lines', '"KÖL";"Köln'),
+        ])
+
+    def test_unterminated_quote_on_the_last_line_is_rejected(self):
+        for data in (b'AMS;Amsterdam\nBAD;"unterminated\n', b'AMS;Amsterdam\nBAD;"unterminated'):
+            with self.subTest(data):
+                chunk = parse_chunk(data, first_line=1, columns=COLUMNS)
+                self.assertEqual(list(chunk.rows(2)), [(1, ('AMS', 'Amsterdam'))])
+                self.assertEqual(chunk.rejected, [RejectedRow(2, 'quoted field spans lines', 'BAD;"unterminated')])
+
+    def test_byte_order_mark_is_skipped(self):
+        chunk = parse_chunk('\ufeff"AMS";"Amsterdam"\n'.encode(), first_line=1, columns=COLUMNS)
+        self.assertEqual(list(chunk.rows(2)), [(1, ('AMS', 'Amsterdam'))])
+
+    def test_ndjson_rows_are_checked(self):
+        data = (
+            '{"code": "AMS", "name": "Amsterdam", "country": "NL"}\n["ANT", "Antwerpen"]\n\n{"name": "No code"}\n'
+            '{"code": "KÖL", "name": 1}\n"KÖL"\n{"code": "KÖL",\n'
+        ).encode()
+        chunk = parse_chunk(data, first_line=1, columns=COLUMNS, format='ndjson')
+        self.assertEqual(list(chunk.rows(2)), [(1, ('AMS', 'Amsterdam')), (2, ('ANT', 'Antwerpen'))])
+        self.assertEqual([(row.line, row.reason) for row in chunk.rejected], [
+            (4, 'empty code'),
+            (5, 'expected string values'),
+            (6, 'expected a JSON object or array'),
+            (7, "JSON error: Expecting property name enclosed in double quotes: line 1 column 16 (char 15)"),
+        ])
+
+    def test_chunks_are_line_aligned(self):
+        lines = [f'"C{i:03d}";"City {i}"\n'.encode() for i in range(100)]
+        chunks = list(iter_chunks(io.BytesIO(b''.join(lines)), chunk_size=50))
+        self.assertTrue(all(data.endswith(b'\n') for data, _ in chunks))
+        self.assertEqual(b''.join(data for data, _ in chunks), b''.join(lines))
+        self.assertEqual(
+            [first_line for _, first_line in chunks],
+            [1 + sum(data.count(b'\n') for data, _ in chunks[:i]) for i in range(len(chunks))],
+        )
+        self.assertGreater(len(chunks), 1)
+
+    def test_chunks_of_a_stream_without_readline(self):
+        stream = zstandard.ZstdDecompressor().stream_reader(zstandard.compress(b'"AMS";"Amsterdam"\n"ANT";"Antwerpen"'))
+        self.assertEqual(
+            list(iter_chunks(stream, chunk_size=4)),
+            [(b'"AMS";"Amsterdam"\n', 1), (b'"ANT";"Antwerpen"', 2)],
+        )
+
+
+class ParseFileTest(SimpleTestCase):
+
+    data = b''.join(
+        f'"C{i:03d}";"City {i}"\n'.encode() if i % 10 else f'"C{i:03d}"\n'.encode() for i in range(1, 501)
+    )
+
+    def test_parallel_parsing_keeps_the_file_order(self):
+        expected = list(parse_file(io.BytesIO(self.data), COLUMNS, chunk_size=64))
+        with parse_pool(2) as executor:
+            rows = list(parse_file(io.BytesIO(self.data), COLUMNS, chunk_size=64, executor=executor, workers=2))
+        self.assertEqual(rows, expected)
+        self.assertGreater(len(rows), 1)
+        self.assertEqual([line for chunk in rows for line in chunk.lines], [i for i in range(1, 501) if i % 10])
+        self.assertEqual([row.line for chunk in rows for row in chunk.rejected], list(range(10, 501, 10)))
+
+
+class FeedValidatorTest(TestCase):
+
+    def test_duplicates_and_orphans_are_quarantined(self):
+        quarantine = Quarantine()
+        with FeedValidator(quarantine=quarantine, workers=1) as validator:
+            cities = list(validator.city_rows(io.BytesIO(b'"AMS";"Amsterdam"\n"AMS";"Amsterdam 2"\n"ANT";"Antwerpen"\n')))
+            hotels = list(validator.hotel_rows(io.BytesIO(b'"AMS";"AMS01";"Ibis"\n"BAR";"BARA1";"Nouvel"\n')))
+
+        self.assertEqual(cities, [CityRow('AMS', 'Amsterdam'), CityRow('ANT', 'Antwerpen')])
+        self.assertEqual(hotels, [HotelRow('AMS', 'AMS01', 'Ibis')])
+        self.assertEqual(validator.lines, {'city': 3, 'hotel': 2})
+        self.assertEqual(
+            [(row.feed, row.line, row.reason) for row in quarantine.rows],
+            [('city', 2, 'duplicate code AMS'), ('hotel', 2, 'unknown city code BAR')],
+        )
+
+    @override_settings(IMPORT_QUARANTINE_LIMIT=2)
+    def test_quarantine_limit(self):
+        quarantine = Quarantine()
+        with FeedValidator(quarantine=quarantine, workers=1) as validator:
+            list(validator.city_rows(io.BytesIO(b'"A"\n"B"\n"C"\n')))
+        self.assertEqual(quarantine.count, 3)
+        self.assertEqual(len(quarantine.rows), 2)
+
+    def test_city_columns_follow_the_model(self):
+        self.assertEqual([column.max_length for column in CITY_COLUMNS], [10, 255])
@@ -0,0 +1,78 @@
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.shortcuts import reverse
+from django.test import Client, TestCase, override_settings
+
+from hotels.models import City, Hotel
+from hotels.performance import get_performance_samples, histogram, reset_performance_samples, stats
+from hotels.tests import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES, RESPONSE_CACHE_TIMEOUT=0, PERFORMANCE_FLUSH_INTERVAL=0)
+class PerformanceMiddlewareTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        city = City.objects.create(code='CITY', name='City Name')
+        Hotel.objects.create(code='HOTEL', name='Hotel Name', city=city)
+
+    def setUp(self):
+        cache.clear()
+        stats.clear()
+        self.client = Client()
+
+    def server_timing(self, response) -> dict[str, str]:
+        return {metric.split(';')[0]: metric for metric in response['Server-Timing'].split(', ')}
+
+    def test_server_timing(self):
+        response = self.client.get(reverse('hotels', kwargs={'city_code': 'CITY'}))
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {'db', 'render', 'total'})
+        self.assertIn('desc="3 queries"', timing['db'])  # The city, the COUNT and the page of hotels
+
+    @override_settings(ROOT_URLCONF='hotels.tests.urls')
+    async def test_async_view_queries_are_counted(self):
+        response = await self.async_client.get(reverse('hotels', kwargs={'city_code': 'CITY'}))
+        self.assertIn('desc="3 queries"', self.server_timing(response)['db'])
+        self.assertEqual(len((await sync_to_async(get_performance_samples)())['hotels']), 1)
+
+    def test_samples_and_command(self):
+        for _ in range(3):
+            self.client.get(reverse('cities'))
+        self.client.get(reverse('hotels', kwargs={'city_code': 'CITY'}))
+
+        samples = get_performance_samples()
+        self.assertEqual(len(samples['cities']), 3)
+        self.assertEqual(len(samples['hotels']), 1)
+
+        out = StringIO()
+        call_command('performance_stats', '--reset', stdout=out)
+        self.assertIn('cities: 3 requests', out.getvalue())
+        self.assertIn('hotels: 1 requests', out.getvalue())
+        self.assertEqual(get_performance_samples(), {})
+
+    def test_samples_of_processes_are_merged(self):
+        self.client.get(reverse('cities'))
+        with mock.patch('os.getpid', return_value=-1):  # Another process: it claims its own slot
+            stats.clear()
+            self.client.get(reverse('cities'))
+        self.assertEqual(len(get_performance_samples()['cities']), 2)
+
+    def test_slow_requests_are_logged(self):
+        with self.assertLogs('hotels.performance', 'INFO') as logs:
+            self.client.get(reverse('cities'))
+            with override_settings(PERFORMANCE_SLOW_REQUEST=0):
+                self.client.get(reverse('cities'))
+        self.assertEqual([record.levelname for record in logs.records], ['INFO', 'WARNING'])
+        self.assertIn('view=cities status=200', logs.output[1])
+
+    def test_histogram(self):
+        self.assertEqual(histogram([0.5, 1, 1.5, 7000])[:3], [2, 1, 0])
+        self.assertEqual(histogram([7000])[-1], 1)
+
+    def tearDown(self):
+        reset_performance_samples()
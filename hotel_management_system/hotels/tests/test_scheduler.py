@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.db import connections
+from django.test import TestCase
+
+from hotels.scheduler import IMPORT_LOCK_KEY, Scheduler, advisory_lock
+from hotels.sync import SyncStats
+
+
+class SchedulerTest(TestCase):
+
+    def job(self, *results: SyncStats | None):
+        """A job returning `results` one by one, its calls are counted in self.calls"""
+        self.calls = 0
+        results = iter(results)
+
+        def job():
+            self.calls += 1
+            return next(results)
+        return job
+
+    def test_runs_are_aligned_to_the_interval(self):
+        scheduler = Scheduler(job=self.job(), interval=24 * 60 * 60)
+        self.assertEqual(scheduler.next_run(86400 * 10 + 5), 86400 * 11)
+        self.assertEqual(scheduler.next_run(86400 * 11), 86400 * 12)
+
+    def test_failed_run_is_retried_with_backoff(self):
+        scheduler = Scheduler(job=self.job(None, None, SyncStats(cities_created=1)), interval=60, retries=3, backoff=0.01)
+        with self.assertLogs('hotels.scheduler', 'WARNING') as logs:
+            stats = scheduler.run_once()
+        self.assertEqual(stats, SyncStats(cities_created=1))
+        self.assertEqual(self.calls, 3)
+        self.assertIn('retry 1 of 3 in 0.01 s', logs.output[0])
+        self.assertIn('retry 2 of 3 in 0.02 s', logs.output[1])
+
+    def test_retries_are_limited(self):
+        scheduler = Scheduler(job=self.job(None, None, None), interval=60, retries=2, backoff=0)
+        with self.assertLogs('hotels.scheduler', 'ERROR'):
+            self.assertIsNone(scheduler.run_once())
+        self.assertEqual(self.calls, 3)
+
+    def test_loop_survives_a_failed_run(self):
+        def job():
+            self.calls += 1
+            if self.calls == 1:
+                raise ConnectionError('The feed server is unreachable')
+            scheduler.stop()
+            return SyncStats()
+        self.calls = 0
+        scheduler = Scheduler(job=job, interval=60, backoff=0.01)
+
+        # close_old_connections would close the connection of the test transaction
+        with mock.patch('hotels.scheduler.close_old_connections'), self.assertLogs('hotels.scheduler', 'ERROR') as logs:
+            scheduler.run_forever(run_now=True)
+        self.assertEqual(self.calls, 2)
+        self.assertIn('the run failed, next attempt in 0.01 s', logs.output[0])
+        self.assertIn('ConnectionError', logs.output[0])
+
+    def test_run_is_skipped_while_another_process_holds_the_lock(self):
+        other = connections.create_connection('default')
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_lock(%s)', [IMPORT_LOCK_KEY])
+            scheduler = Scheduler(job=self.job(SyncStats()), interval=60)
+            self.assertIsNone(scheduler.run_once())
+            self.assertEqual(self.calls, 0)
+            with other.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [IMPORT_LOCK_KEY])
+        finally:
+            # The backend of a closed connection releases its locks asynchronously
+            other.close()
+
+        self.assertEqual(scheduler.run_once(), SyncStats())
+        self.assertEqual(self.calls, 1)
+
+    def test_lock_is_released_after_the_run(self):
+        with advisory_lock(IMPORT_LOCK_KEY) as locked:
+            self.assertTrue(locked)
+        other = connections.create_connection('default')
+        try:
+            with other.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', [IMPORT_LOCK_KEY])
+                self.assertTrue(cursor.fetchone()[0])
+                cursor.execute('SELECT pg_advisory_unlock(%s)', [IMPORT_LOCK_KEY])
+        finally:
+            other.close()
@@ -0,0 +1,120 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from hotels.models import City, Hotel
+from hotels.search import normalize_name, prefix_tsquery, search_by_name
+
+
+def index_exists(name: str) -> bool:
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_indexes WHERE indexname = %s', [name])
+        return cursor.fetchone() is not None
+
+
+def explain_without_seqscan(queryset) -> str:
+    """Query plan of the queryset when sequential scans are discouraged (the test tables are tiny)"""
+    with connection.cursor() as cursor:
+        cursor.execute('SET enable_seqscan = off')
+    try:
+        return queryset.explain()
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('RESET enable_seqscan')
+
+
+class PrefixTsqueryTest(TestCase):
+
+    def test_words_are_prefixes(self):
+        self.assertEqual(prefix_tsquery('ams  air'), 'ams:* & air:*')
+
+    def test_tsquery_syntax_is_removed(self):
+        self.assertEqual(prefix_tsquery("a|b & !c:*'"), 'a:* & b:* & c:*')
+
+    def test_no_words(self):
+        self.assertEqual(prefix_tsquery(' !& '), '')
+
+    def test_words_are_normalized(self):
+        self.assertEqual(prefix_tsquery('Köln Zürich'), 'koln:* & zurich:*')
+
+
+class NormalizeNameTest(TestCase):
+
+    def test_lowercase_without_accents(self):
+        self.assertEqual(normalize_name('Hotel Okura'), 'hotel okura')
+        self.assertEqual(normalize_name('Hôtel Köln Ångström'), 'hotel koln angstrom')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Search indexes require PostgreSQL')
+class SearchByNameTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.city = City.objects.create(code='AMS', name='Amsterdam')
+        Hotel.objects.bulk_create([
+            Hotel(code='AMS01', name='Ibis Amsterdam Airport', city=cls.city),
+            Hotel(code='AMS02', name='Novotel Amsterdam Airport', city=cls.city),
+            Hotel(code='AMS03', name='Airport Hotel Airport', city=cls.city),
+            Hotel(code='AMS04', name='Hotel Okura', city=cls.city),
+        ])
+
+    def search(self, search: str) -> list[str]:
+        return list(search_by_name(Hotel.objects.order_by('code'), search).values_list('code', flat=True))
+
+    @override_settings(SEARCH_BACKEND='contains')
+    def test_contains(self):
+        self.assertEqual(self.search('TEL'), ['AMS02', 'AMS03', 'AMS04'])
+
+    def test_accents_are_ignored(self):
+        Hotel.objects.create(code='AMS05', name='Hôtel Pulitzer', city=self.city)
+        for backend in ('contains', 'fulltext'):
+            with self.subTest(backend=backend), override_settings(SEARCH_BACKEND=backend):
+                self.assertEqual(self.search('hotel pul'), ['AMS05'])
+                self.assertEqual(set(self.search('HÔTEL')), {'AMS03', 'AMS04', 'AMS05'})
+
+    @override_settings(SEARCH_BACKEND='fulltext')
+    def test_fulltext_matches_word_prefixes(self):
+        self.assertEqual(self.search('TEL'), [])
+        self.assertEqual(self.search('amst air'), ['AMS01', 'AMS02'])
+
+    @override_settings(SEARCH_BACKEND='fulltext')
+    def test_fulltext_is_ranked(self):
+        # "Airport" twice ranks higher, the initial ordering breaks ties
+        self.assertEqual(self.search('airport'), ['AMS03', 'AMS01', 'AMS02'])
+
+    @override_settings(SEARCH_BACKEND='fulltext')
+    def test_fulltext_without_words_falls_back_to_contains(self):
+        Hotel.objects.create(code='AMS05', name='Hotel ***', city=self.city)
+        self.assertEqual(self.search('***'), ['AMS05'])
+
+    @override_settings(SEARCH_BACKEND='fulltext')
+    def test_fulltext_uses_index(self):
+        for model in (City, Hotel):
+            with self.subTest(model=model):
+                plan = explain_without_seqscan(search_by_name(model.objects.all(), 'ams'))
+                self.assertIn(f'hotels_{model._meta.model_name}_search_name_fts', plan)
+
+    @skipUnless(
+        connection.vendor == 'postgresql' and index_exists('hotels_hotel_search_name_trgm'),
+        'pg_trgm extension is not available',
+    )
+    @override_settings(SEARCH_BACKEND='contains')
+    def test_contains_uses_trigram_index(self):
+        for model in (City, Hotel):
+            with self.subTest(model=model):
+                plan = explain_without_seqscan(search_by_name(model.objects.all(), 'sterd'))
+                self.assertIn(f'hotels_{model._meta.model_name}_search_name_trgm', plan)
+
+
+class SearchIndexStateTest(TestCase):
+
+    def test_trigram_indexes_are_not_in_the_model_state(self):
+        # They are created only if pg_trgm is available (see the migrations)
+        for model in (City, Hotel):
+            self.assertEqual([index.name for index in model._meta.indexes if 'trgm' in index.name], [])
+
+    def test_models_match_the_migrations(self):
+        call_command('makemigrations', 'hotels', check=True, dry_run=True, stdout=StringIO())
@@ -0,0 +1,103 @@
+import gzip
+import io
+import json
+import tempfile
+import uuid
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from hotels.cache import get_data_generation
+from hotels.models import City, Hotel
+from hotels.snapshots import dump_catalog, restore_catalog
+
+
+def catalog() -> set[tuple]:
+    return (
+        set(City.objects.values_list('id', 'code', 'name', 'search_name', 'hotel_count'))
+        | set(Hotel.objects.values_list('id', 'city_id', 'code', 'name', 'search_name'))
+    )
+
+
+class SnapshotTest(TestCase):
+
+    def setUp(self):
+        self.amsterdam = City.objects.create(code='AMS', name='Amsterdam')
+        self.malaga = City.objects.create(code='AGP', name='Málaga')
+        Hotel.objects.bulk_create([
+            Hotel(code='AMS01', name='Ibis', city=self.amsterdam),
+            Hotel(code='AMS02', name='Hôtel "Eden"', city=self.amsterdam),
+            Hotel(code='AGP01', name='Parador', city=self.malaga),
+        ])
+        City.objects.refresh_hotel_counts()
+
+    def test_dump_and_restore_keep_primary_keys(self):
+        expected = catalog()
+        for name in ('catalog.ndjson', 'catalog.ndjson.gz', 'catalog.ndjson.zst'):
+            with self.subTest(name), tempfile.TemporaryDirectory() as directory:
+                path = Path(directory) / name
+                call_command('dump_catalog', path, stdout=StringIO())
+                # Changed after the dump: overwritten by the restore
+                Hotel.objects.filter(code='AMS01').update(name='Changed')
+                Hotel.objects.create(code='AMS09', name='Added', city=self.amsterdam)
+
+                generation = get_data_generation()
+                out = StringIO()
+                call_command('restore_catalog', path, '--no-input', stdout=out)
+                self.assertIn('Restored 2 cities and 3 hotels (replaced 2 cities and 4 hotels)', out.getvalue())
+                self.assertEqual(catalog(), expected)
+                self.assertNotEqual(get_data_generation(), generation)
+
+    def test_restore_without_copy(self):
+        expected = catalog()
+        snapshot = io.BytesIO()
+        dump_catalog(snapshot)
+        snapshot.seek(0)
+        Hotel.objects.all().delete()
+        with mock.patch.object(connection, 'vendor', 'sqlite'):  # The bulk_create() path of other databases
+            restore_catalog(snapshot, batch_size=2)
+        self.assertEqual(catalog(), expected)
+
+    def test_invalid_snapshot_changes_nothing(self):
+        expected = catalog()
+        snapshot = io.BytesIO()
+        dump_catalog(snapshot)
+        lines = snapshot.getvalue().splitlines(keepends=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            cases = {
+                'truncated': b''.join(lines[:-1]),
+                'truncated gzip': gzip.compress(b''.join(lines))[:-10],
+                'not a snapshot': b'[{"model": "hotels.city"}]',
+                'hotel before city': b''.join([lines[0], lines[-1], *lines[1:-1]]),
+                'missing value': b''.join([*lines[:-1], b'["h", "1b4e28ba-2fa1-11d2-883f-0016d3cca427", "AMS01"]\n']),
+                'wrong type': b''.join([*lines[:-1], b'["h", 1, 2, 3, 4]\n']),
+                'not a record': b''.join([*lines[:-1], b'{"h": "AMS01"}\n']),
+                'no counts': b''.join([b'{"snapshot": "hotels.catalog", "version": 1}\n', *lines[1:]]),
+                'invalid id': b''.join([*lines[:-1], lines[-1].replace(b'["h","', b'["h","x')]),
+                'duplicate id': b''.join([*lines[:-1], lines[-2]]),
+                'unknown city': b''.join([
+                    *lines[:-1], json.dumps([*json.loads(lines[-1])[:2], str(uuid.uuid4()), 'XXX01', 'Orphan']).encode(),
+                ]),
+            }
+            for name, content in cases.items():
+                with self.subTest(name):
+                    path = Path(directory) / 'catalog.ndjson'
+                    path.write_bytes(content)
+                    with self.assertRaisesMessage(CommandError, 'Restore failed'):
+                        call_command('restore_catalog', path, '--no-input', stdout=StringIO())
+                    self.assertEqual(catalog(), expected)
+
+
+class SampleSnapshotTest(TestCase):
+
+    def test_sample_snapshot_is_the_fixture(self):
+        call_command('loaddata', 'city_hotels.json', verbosity=0)
+        expected = catalog()
+        call_command('restore_catalog', settings.BASE_DIR / 'hotels/fixtures/city_hotels.ndjson.gz', '--no-input', stdout=StringIO())
+        self.assertEqual(catalog(), expected)
@@ -0,0 +1,108 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from hotels.models import City, Hotel
+from hotels.sync import CityRow, HotelRow, SyncStats, sync_catalog
+
+
+def write_queries(context: CaptureQueriesContext) -> list[str]:
+    return [
+        q['sql'] for q in context.captured_queries
+        if q['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+    ]
+
+
+class LoaderTestsMixin:
+    """Behaviour shared by all the loaders (see hotels.loaders.LOADERS)"""
+
+    loader = staticmethod(sync_catalog)
+
+    city_rows = [CityRow('AMS', 'Amsterdam'), CityRow('ANT', 'Antwerpen')]
+    hotel_rows = [
+        HotelRow('AMS', 'AMS01', 'Ibis Amsterdam Airport'),
+        HotelRow('AMS', 'AMS02', 'Novotel Amsterdam Airport'),
+        HotelRow('ANT', 'ANT01', 'Express by Holiday Inn'),
+    ]
+
+    def test_initial_load(self):
+        stats = self.loader(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        self.assertEqual(stats, SyncStats(cities_created=2, hotels_created=3))
+        self.assertEqual(
+            set(Hotel.objects.values_list('city__code', 'code', 'name')),
+            set(self.hotel_rows),
+        )
+
+    def test_unchanged_feed(self):
+        self.loader(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        hotel_ids = dict(Hotel.objects.values_list('code', 'id'))
+        stats = self.loader(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        self.assertEqual(stats, SyncStats())
+        self.assertEqual(dict(Hotel.objects.values_list('code', 'id')), hotel_ids)
+
+    def test_diff_is_applied_and_primary_keys_are_kept(self):
+        self.loader(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        city_ids = dict(City.objects.values_list('code', 'id'))
+        hotel_ids = dict(Hotel.objects.values_list('code', 'id'))
+
+        city_rows = [CityRow('AMS', 'Amsterdam'), CityRow('BAR', 'Barcelona')]
+        hotel_rows = [
+            HotelRow('AMS', 'AMS01', 'Ibis Amsterdam Airport'),  # unchanged
+            HotelRow('AMS', 'AMS02', 'Novotel Amsterdam'),  # renamed
+            HotelRow('BAR', 'ANT01', 'Express by Holiday Inn'),  # moved to another city
+            HotelRow('BAR', 'BARA1', 'Nouvel'),  # new
+        ]
+        stats = self.loader(city_rows=city_rows, hotel_rows=hotel_rows)
+
+        self.assertEqual(stats, SyncStats(
+            cities_created=1, cities_deleted=1,
+            hotels_created=1, hotels_updated=2,
+        ))
+        self.assertEqual(set(Hotel.objects.values_list('city__code', 'code', 'name')), set(hotel_rows))
+        self.assertEqual(set(City.objects.values_list('code', 'name')), set(city_rows))
+        self.assertEqual(City.objects.get(code='AMS').id, city_ids['AMS'])
+        for code in ('AMS01', 'AMS02', 'ANT01'):
+            with self.subTest(code=code):
+                self.assertEqual(Hotel.objects.get(code=code).id, hotel_ids[code])
+
+    def test_denormalized_columns(self):
+        self.loader(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        self.assertEqual(dict(City.objects.values_list('code', 'hotel_count')), {'AMS': 2, 'ANT': 1})
+        self.assertEqual(Hotel.objects.get(code='ANT01').search_name, 'express by holiday inn')
+
+        hotel_rows = [HotelRow('ANT', 'AMS01', 'Ibis Antwerpen'), HotelRow('ANT', 'ANT01', 'Express by Holiday Inn')]
+        self.loader(city_rows=self.city_rows, hotel_rows=hotel_rows)
+        self.assertEqual(dict(City.objects.values_list('code', 'hotel_count')), {'AMS': 0, 'ANT': 2})
+        self.assertEqual(Hotel.objects.get(code='AMS01').search_name, 'ibis antwerpen')
+
+    def test_stale_hotels_are_deleted(self):
+        self.loader(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        stats = self.loader(city_rows=self.city_rows, hotel_rows=self.hotel_rows[:1], batch_size=1)
+        self.assertEqual(stats, SyncStats(hotels_deleted=2))
+        self.assertEqual(list(Hotel.objects.values_list('code', flat=True)), ['AMS01'])
+
+    def test_hotels_without_city_in_feed_are_skipped(self):
+        hotel_rows = self.hotel_rows + [HotelRow('XXX', 'XXX01', 'Orphan')]
+        stats = self.loader(city_rows=self.city_rows, hotel_rows=hotel_rows)
+        self.assertEqual(stats.hotels_created, 3)
+        self.assertFalse(Hotel.objects.filter(code='XXX01').exists())
+
+    def test_last_duplicate_wins(self):
+        hotel_rows = self.hotel_rows + [HotelRow('ANT', 'AMS01', 'Ibis Antwerpen')]
+        stats = self.loader(city_rows=self.city_rows, hotel_rows=hotel_rows)
+        self.assertEqual(stats.hotels_created, 3)
+        self.assertEqual(
+            Hotel.objects.filter(code='AMS01').values_list('city__code', 'name').get(),
+            ('ANT', 'Ibis Antwerpen'),
+        )
+
+
+class SyncCatalogTest(LoaderTestsMixin, TestCase):
+
+    def test_unchanged_feed_writes_nothing(self):
+        sync_catalog(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        with CaptureQueriesContext(connection) as context:
+            stats = sync_catalog(city_rows=self.city_rows, hotel_rows=self.hotel_rows)
+        self.assertEqual(stats.writes, 0)
+        self.assertEqual(write_queries(context), [])
+
@@ -0,0 +1,60 @@
+import tempfile
+from collections import Counter
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from hotels.jobs import fetch_hotel_data
+from hotels.models import City, Hotel
+from hotels.synthetic import city_rows, default_city_count, format_size, hotel_rows, parse_size
+
+
+class SyntheticTest(SimpleTestCase):
+
+    def test_rows(self):
+        cities = list(city_rows(50))
+        hotels = list(hotel_rows(5000, 50))
+        self.assertEqual(hotels, list(hotel_rows(5000, 50)))  # Deterministic
+        self.assertNotEqual(hotels, list(hotel_rows(5000, 50, seed=1)))
+
+        self.assertEqual(len({code for code, _ in cities}), 50)
+        self.assertTrue(all(len(code) == 3 and code.isupper() for code, _ in cities))
+        self.assertEqual(len({code for _, code, _ in hotels}), 5000)
+        self.assertTrue(all(code.startswith(city_code) and len(code) <= 10 for city_code, code, _ in hotels))
+        self.assertTrue(all(name for _, _, name in hotels))
+
+        # The first cities have the most hotels
+        per_city = Counter(city_code for city_code, _, _ in hotels)
+        self.assertEqual(per_city.most_common(1)[0][0], cities[0][0])
+        self.assertGreater(per_city[cities[0][0]], 10 * per_city[cities[-1][0]])
+
+    def test_sizes(self):
+        self.assertEqual([parse_size(size) for size in ('1000', '1k', '100K', '1M', '10m')], [1000, 1000, 100_000, 10 ** 6, 10 ** 7])
+        self.assertEqual([format_size(size) for size in (1000, 10 ** 6, 1500)], ['1k', '1M', '1500'])
+        self.assertEqual([default_city_count(size) for size in (10, 10 ** 5, 10 ** 7)], [1, 1000, 17576])
+        with self.assertRaises(ValueError):
+            parse_size('many')
+
+
+class GenerateDataCommandTest(TestCase):
+
+    def test_database(self):
+        City.objects.create(code='XXX', name='Removed')
+        call_command('generate_data', '--hotels', '1k', '--cities', '20', '--no-input', stdout=StringIO())
+        self.assertEqual(City.objects.count(), 20)
+        self.assertEqual(Hotel.objects.count(), 1000)
+        self.assertFalse(City.objects.filter(code='XXX').exists())
+        self.assertEqual(sum(City.objects.values_list('hotel_count', flat=True)), 1000)
+        self.assertEqual(Hotel.objects.exclude(search_name='').count(), 1000)
+
+    def test_feeds_are_importable(self):
+        with tempfile.TemporaryDirectory() as directory:
+            call_command('generate_data', '--hotels', '500', '--feeds', directory, stdout=StringIO())
+            stats = fetch_hotel_data(str(Path(directory) / 'city.csv'), str(Path(directory) / 'hotel.csv'), None, None)
+        self.assertEqual((stats.cities_created, stats.hotels_created), (5, 500))
+        self.assertEqual(
+            set(Hotel.objects.values_list('city__code', 'code', 'name')),
+            set(hotel_rows(500, 5)),
+        )
@@ -2,11 +2,13 @@ from http import HTTPStatus
 
 from django.core.cache import cache
 from django.shortcuts import reverse
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 
 from hotels.models import City, Hotel
+from hotels.tests import LOCMEM_CACHES
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
 class URLTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -1,13 +1,21 @@
+from unittest import skipUnless
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.shortcuts import reverse
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from hotels.models import City, Hotel
+from hotels.tests import LOCMEM_CACHES
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
 class CityViewTests(TestCase):
 
     def setUp(self):
+        cache.clear()
         self.url = reverse('cities')
         self.title = 'Cities'
         self.client = Client()
@@ -88,9 +96,11 @@ class CityViewTests(TestCase):
         self.assertEqual(len(second_page_response.context['cities']), 0)
 
 
+@override_settings(CACHES=LOCMEM_CACHES)
 class HotelViewTests(TestCase):
 
     def setUp(self):
+        cache.clear()
         self.city = City.objects.create(code='CITY', name='City Name')
         self.url = reverse('hotels', kwargs={'city_code': self.city.code})
         self.title = 'Hotels'
@@ -180,5 +190,26 @@ class HotelViewTests(TestCase):
         self.assertEqual(second_page_response.context['search'], search)
         self.assertEqual(len(second_page_response.context['hotels']), 0)
 
+    def test_hotels_are_filtered_by_city_id_without_join(self):
+        Hotel.objects.bulk_create([
+            Hotel(code=f'HOTEL{i}', name=f'Hotel Name {i}', city=self.city) for i in range(settings.ITEMS_PER_PAGE + 1)
+        ])
+        # The city, the COUNT of its hotels and the page of hotels
+        with self.assertNumQueries(3), CaptureQueriesContext(connection) as context:
+            self.client.get(self.url + '?page=2')
+        self.assertFalse([query['sql'] for query in context.captured_queries if 'JOIN' in query['sql']])
+
+    @skipUnless(connection.vendor == 'postgresql', 'PostgreSQL only')
+    def test_page_of_hotels_uses_composite_index(self):
+        page = Hotel.objects.filter(city_id=self.city.id).order_by('code', 'name')[:settings.ITEMS_PER_PAGE]
+        # The test table is tiny, so scans which would never be used for a big one are disabled
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_bitmapscan = off')
+            plan = page.explain()
+        self.assertIn('Index Scan using hotels_hotel_city_code_name', plan)
+        self.assertNotIn('Sort', plan)
+
+
 # I understand that there is quite a lot of duplicate code here
 # I am ready to refactor it if necessary for the test assignment
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from hotels import views
+
+# The async views, for the tests of the async request cycle under the sync test settings
+urlpatterns = [
+    path('cities/', views.acities, name='cities'),
+    path('cities/<slug:city_code>/hotels', views.ahotels, name='hotels'),
+]
@@ -0,0 +1,70 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Iterable, Iterator
+
+
+class PhaseTimer:
+    """
+    Wall time of the import phases (download, parse, prepare, insert, update, delete, commit)
+
+    Phases may be nested, the time of the inner phase is not counted in the outer one: e.g. rows are parsed
+    lazily while a loader consumes them, so the parse time is excluded from the loader phases.
+    """
+
+    def __init__(self):
+        self.timings: dict[str, float] = defaultdict(float)
+        self._stack: list[str] = []
+        self._mark = 0.0
+
+    def enter(self, name: str):
+        now = time.perf_counter()
+        if self._stack:
+            self.timings[self._stack[-1]] += now - self._mark
+        self._stack.append(name)
+        self._mark = now
+
+    def exit(self):
+        now = time.perf_counter()
+        self.timings[self._stack.pop()] += now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.exit()
+
+    def timed(self, items: Iterable, name: str) -> Iterator:
+        """Iterates over `items` counting the time spent producing them as the `name` phase"""
+        iterator = iter(items)
+        while True:
+            self.enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.exit()
+            yield item
+
+    @contextmanager
+    def activate(self) -> Iterator['PhaseTimer']:
+        """Makes the timer the one of `phase()` (in this context)"""
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+
+_current: ContextVar[PhaseTimer | None] = ContextVar('hotels_phase_timer', default=None)
+
+
+def phase(name: str):
+    """Times the block as the `name` phase of the active PhaseTimer (if any)"""
+    timer = _current.get()
+    return timer.phase(name) if timer is not None else nullcontext()
@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, views
+
+# The async versions of the views are meant for the ASGI deployment (hotel_management_system.asgi)
+cities_view, hotels_view = (views.acities, views.ahotels) if settings.ASYNC_VIEWS else (views.cities, views.hotels)
 
 urlpatterns = [
     path('', views.index, name='index'),
-    path('cities/', views.cities, name='cities'),
-    path('cities/<slug:city_code>/hotels', views.hotels, name='hotels'),
+    path('cities/', cities_view, name='cities'),
+    path('cities/<slug:city_code>/hotels', hotels_view, name='hotels'),
+    path('api/cities/', api.cities, name='api-cities'),
+    path('api/cities/<slug:city_code>/hotels', api.city_hotels, name='api-city-hotels'),
+    path('api/hotels/', api.hotels, name='api-hotels'),
 ]
@@ -0,0 +1,97 @@
+import os
+from typing import BinaryIO, Iterator
+
+from django.conf import settings
+
+from .models import City, Hotel, ImportRun, QuarantinedRow
+from .parsing import Column, RejectedRow, parse_file, parse_pool
+from .sync import CityRow, HotelRow
+
+CITY_COLUMNS = (
+    Column('code', City._meta.get_field('code').max_length, required=True),
+    Column('name', City._meta.get_field('name').max_length),
+)
+HOTEL_COLUMNS = (
+    Column('city code', City._meta.get_field('code').max_length, required=True),
+    Column('code', Hotel._meta.get_field('code').max_length, required=True),
+    Column('name', Hotel._meta.get_field('name').max_length),
+)
+
+
+class Quarantine:
+    """Rejected rows of an import: all of them are counted, the first settings.IMPORT_QUARANTINE_LIMIT ones are kept"""
+
+    def __init__(self, limit: int | None = None):
+        self.limit = limit if limit is not None else settings.IMPORT_QUARANTINE_LIMIT
+        self.count = 0
+        self.rows: list[QuarantinedRow] = []
+
+    def add(self, feed: str, row: RejectedRow):
+        self.count += 1
+        if len(self.rows) < self.limit:
+            self.rows.append(QuarantinedRow(feed=feed, line=row.line, reason=row.reason, content=row.content))
+
+    def save(self, run: ImportRun):
+        for row in self.rows:
+            row.run = run
+        QuarantinedRow.objects.bulk_create(self.rows)
+
+
+class FeedValidator:
+    """
+    Parses and validates the city and hotel feeds of an import, bad rows are quarantined instead of failing it
+
+    Rows are checked by hotels.parsing (column count, empty codes, field lengths), in settings.IMPORT_PARSE_WORKERS
+    processes if there are several. Then the rows with an already seen code (the first one is kept)
+    and the hotels of a city which is absent from the (valid rows of the) city feed are rejected.
+    The city feed has to be consumed before the hotel feed, as the loaders do. Use it as a context manager
+    (the worker processes are stopped on exit).
+    """
+
+    def __init__(self, quarantine: Quarantine, workers: int | None = None):
+        self.quarantine = quarantine
+        workers = workers if workers is not None else settings.IMPORT_PARSE_WORKERS
+        self.workers = workers or os.cpu_count()
+        self.executor = None
+        self.city_codes: set[str] = set()
+        self.lines = {QuarantinedRow.Feed.CITY: 0, QuarantinedRow.Feed.HOTEL: 0}  # Parsed (non-blank) rows
+
+    def __enter__(self) -> 'FeedValidator':
+        if self.workers > 1:
+            self.executor = parse_pool(self.workers)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def city_rows(self, file: BinaryIO, format: str = 'csv') -> Iterator[CityRow]:
+        return self._validated(file, format, QuarantinedRow.Feed.CITY, CITY_COLUMNS, CityRow, seen_codes=self.city_codes)
+
+    def hotel_rows(self, file: BinaryIO, format: str = 'csv') -> Iterator[HotelRow]:
+        return self._validated(file, format, QuarantinedRow.Feed.HOTEL, HOTEL_COLUMNS, HotelRow, city_codes=self.city_codes)
+
+    def _validated(
+        self, file: BinaryIO, format: str, feed: str, columns: tuple[Column, ...], row_type: type[CityRow | HotelRow],
+        seen_codes: set[str] | None = None, city_codes: set[str] | None = None,
+    ) -> Iterator[CityRow | HotelRow]:
+        """Rows of the feed (in `format`, see hotels.parsing.PARSERS) with a new code (and a known city code if `city_codes` are given)"""
+        seen_codes = seen_codes if seen_codes is not None else set()
+        code_index = row_type._fields.index('code')
+        chunks = parse_file(file, columns, settings.IMPORT_PARSE_CHUNK_SIZE, self.executor, self.workers, format)
+        for chunk in chunks:
+            self.lines[feed] += len(chunk.lines) + len(chunk.rejected)
+            for row in chunk.rejected:
+                self.quarantine.add(feed, row)
+            for line, values in chunk.rows(len(columns)):
+                code = values[code_index]
+                if code in seen_codes:
+                    self.reject(feed, line, values, f'duplicate code {code}')
+                elif city_codes is not None and values[0] not in city_codes:
+                    self.reject(feed, line, values, f'unknown city code {values[0]}')
+                else:
+                    seen_codes.add(code)
+                    yield row_type(*values)
+
+    def reject(self, feed: str, line: int, values: tuple[str, ...], reason: str):
+        self.quarantine.add(feed, RejectedRow(line, reason, ';'.join(f'"{value}"' for value in values)))
@@ -1,61 +1,134 @@
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.core.paginator import Paginator
 from django.db.models import ObjectDoesNotExist
 from django.http import HttpResponse, HttpRequest, Http404
 from django.shortcuts import render, redirect
 from django.views.decorators.http import require_GET
 
+from .cache import cache_response, fragment_cache_key
+from .catalog import catalog_enabled, get_catalog
 from .models import City, Hotel
+from .pagination import apaginate, paginate
+from .search import search_by_name
+
+
+def _fragment_context(view_name: str, request: HttpRequest, view_kwargs: dict, page) -> dict:
+    """Context of the {% cache %} block of the item cards and pagination of a page"""
+    return {
+        'fragment_key': fragment_cache_key(view_name=view_name, request=request, view_kwargs=view_kwargs, page=page),
+        'fragment_cache_timeout': settings.FRAGMENT_CACHE_TIMEOUT,
+    }
 
 
 @require_GET
 def index(request: HttpRequest) -> HttpResponse:
-    return redirect(to=cities)
+    return redirect(to='cities')
 
 
 @require_GET
+@cache_response
 def cities(request: HttpRequest) -> HttpResponse:
     search = request.GET.get('search')
-    if search:
-        cities = City.objects.filter(name__icontains=search)
+    if catalog_enabled(search):
+        cities = get_catalog().search_cities(search)
     else:
-        cities = City.objects.all()
-    cities = cities.order_by('code', 'name')
-    paginator = Paginator(object_list=cities, per_page=settings.ITEMS_PER_PAGE)
-    page_number = request.GET.get('page')
-    cities = paginator.get_page(page_number)
+        cities = City.objects.order_by('code', 'name')
+        if search:
+            cities = search_by_name(queryset=cities, search=search)
+    cities = paginate(request=request, queryset=cities)
     data = {
         'title': 'Cities',
         'search': search,
         'cities': cities,
+        **_fragment_context(view_name='cities', request=request, view_kwargs={}, page=cities),
     }
     return render(request=request, template_name='hotels/cities.html', context=data)
 
 
 @require_GET
+@cache_response
 def hotels(request: HttpRequest, city_code: str) -> HttpResponse:
-    try:
-        city = City.objects.get(code=city_code)
-    except ObjectDoesNotExist as e:
-        raise Http404('City code does not exist')
+    search = request.GET.get('search')
+    if catalog_enabled(search):
+        catalog = get_catalog()
+        city = catalog.get_city(city_code)
+        if city is None:
+            raise Http404('City code does not exist')
+        hotels = paginate(request=request, queryset=catalog.search_hotels(city_code, search))
+    else:
+        try:
+            city = City.objects.get(code=city_code)
+        except ObjectDoesNotExist as e:
+            raise Http404('City code does not exist')
+
+        # I understand that this sorting is by digits (not numbers)
+        # This can be adjusted if the code format for hotels is clearly defined
+        hotels = Hotel.objects.filter(city_id=city.id).order_by('code', 'name')
+        if search:
+            hotels = search_by_name(queryset=hotels, search=search)
+        hotels = paginate(request=request, queryset=hotels)
+
+    data = {
+        'title': 'Hotels',
+        'search': search,
+        'city': city,
+        'hotels': hotels,
+        **_fragment_context(view_name='hotels', request=request, view_kwargs={'city_code': city_code}, page=hotels),
+    }
+    return render(request=request, template_name='hotels/hotels.html', context=data)
 
+
+# Async versions of the views (settings.ASYNC_VIEWS) for the ASGI deployment: queries are made by the async ORM,
+# so a slow query doesn't block the worker
+
+@require_GET
+@cache_response
+async def acities(request: HttpRequest) -> HttpResponse:
+    search = request.GET.get('search')
+    if catalog_enabled(search):
+        cities = paginate(request=request, queryset=(await sync_to_async(get_catalog)()).search_cities(search))
+    else:
+        cities = City.objects.order_by('code', 'name')
+        if search:
+            cities = search_by_name(queryset=cities, search=search)
+        cities = await apaginate(request=request, queryset=cities)
+    data = {
+        'title': 'Cities',
+        'search': search,
+        'cities': cities,
+        **await sync_to_async(_fragment_context)(view_name='cities', request=request, view_kwargs={}, page=cities),
+    }
+    return render(request=request, template_name='hotels/cities.html', context=data)
+
+
+@require_GET
+@cache_response
+async def ahotels(request: HttpRequest, city_code: str) -> HttpResponse:
     search = request.GET.get('search')
-    if search:
-        hotels = Hotel.objects.filter(city__code=city_code, name__icontains=search)
+    if catalog_enabled(search):
+        catalog = await sync_to_async(get_catalog)()
+        city = catalog.get_city(city_code)
+        if city is None:
+            raise Http404('City code does not exist')
+        hotels = paginate(request=request, queryset=catalog.search_hotels(city_code, search))
     else:
-        hotels = Hotel.objects.filter(city__code=city_code)
+        try:
+            city = await City.objects.aget(code=city_code)
+        except ObjectDoesNotExist:
+            raise Http404('City code does not exist')
 
-    # I understand that this sorting is by digits (not numbers)
-    # This can be adjusted if the code format for hotels is clearly defined
-    hotels = hotels.order_by('code', 'name')
+        hotels = Hotel.objects.filter(city_id=city.id).order_by('code', 'name')
+        if search:
+            hotels = search_by_name(queryset=hotels, search=search)
+        hotels = await apaginate(request=request, queryset=hotels)
 
-    paginator = Paginator(object_list=hotels, per_page=settings.ITEMS_PER_PAGE)
-    page_number = request.GET.get('page')
-    hotels = paginator.get_page(page_number)
     data = {
         'title': 'Hotels',
         'search': search,
         'city': city,
         'hotels': hotels,
+        **await sync_to_async(_fragment_context)(
+            view_name='hotels', request=request, view_kwargs={'city_code': city_code}, page=hotels
+        ),
     }
     return render(request=request, template_name='hotels/hotels.html', context=data)